@@ -1,11 +1,16 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Match
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 import base64
+import hashlib
 import io
 from PIL import Image
 import os
+import json
 import time
 import google.generativeai as genai
 from dotenv import load_dotenv
@@ -24,10 +29,19 @@ from .database import (
     COLLECTION_USER_STYLES
 )
 from .data_loader import load_order_history_to_user_styles
+from .ingestion import ingestion_snapshot
+from .llm import generate_content
+from .metrics import render_metrics, track_stage, HTTP_REQUEST_LATENCY, HTTP_IN_FLIGHT
+from .tracing import start_trace, dump_trace, choose_profile_mode, RequestProfiler, TRACE_ALL_REQUESTS, ALLOW_DEBUG_HEADERS, profiled
+from .log import get_logger, SAMPLED
+from .circuit_breaker import breaker_states
+from .upload_jobs import get_upload_queue, get_upload_job_store, UploadQueueFull
 
 load_dotenv()
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
+logger = get_logger(__name__)
+
 app = FastAPI(title="StyleSense AI API", version="2.0.0")
 
 app.add_middleware(
@@ -38,6 +52,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def route_template(request: Request) -> str:
+    """Route path template (e.g. /user/{user_id}/status) so metric labels stay low-cardinality."""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    """Track in-flight requests and latency per route."""
+    route = route_template(request)
+    HTTP_IN_FLIGHT.inc(method=request.method, route=route)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUEST_LATENCY.observe(time.perf_counter() - start, method=request.method, route=route, status=status)
+        HTTP_IN_FLIGHT.dec(method=request.method, route=route)
+
+@app.middleware("http")
+async def tracing_middleware(request: Request, call_next):
+    """Per-request trace spans, returned in X-StyleSense-Trace when X-Debug-Trace is set,
+    plus an opt-in cProfile/tracemalloc capture via X-Debug-Profile or PROFILE_SAMPLE_RATE.
+    The debug headers are ignored unless ALLOW_DEBUG_HEADERS is set."""
+    trace = start_trace(request.headers.get("X-Request-ID"), f"{request.method} {request.url.path}")
+    want_trace = TRACE_ALL_REQUESTS or (
+        ALLOW_DEBUG_HEADERS and request.headers.get("X-Debug-Trace", "").lower() in ("1", "true"))
+    
+    profile_mode = choose_profile_mode(request.headers.get("X-Debug-Profile"))
+    profiler = RequestProfiler(profile_mode, trace.request_id) if profile_mode else None
+    if profiler:
+        profiler.start()
+    
+    try:
+        response = await call_next(request)
+    finally:
+        if profiler:
+            trace.profile = profiler.stop()
+        trace.finish()
+    
+    response.headers["X-Request-ID"] = trace.request_id
+    if want_trace or trace.profile:
+        if want_trace:
+            response.headers["X-StyleSense-Trace"] = json.dumps(trace.to_dict(), separators=(",", ":"))
+        dump_trace(trace)
+    return response
+
 # Pydantic Schemas
 class StyleRequest(BaseModel):
     user_id: str
@@ -118,15 +183,53 @@ def analyze_wardrobe_image(base64_image: str):
             {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"}
         ]
         
-        response = model.generate_content([prompt, image_part], safety_settings=safety_settings)
+        response = generate_content("wardrobe_vision", [prompt, image_part], model=model, safety_settings=safety_settings)
         if response.text:
             return response.text.strip()
         return "Clothing item"
         
     except Exception as e:
-        print(f"Error analyzing wardrobe image: {e}")
+        logger.error("Error analyzing wardrobe image: %s", e)
         return "Clothing item"
 
+def process_wardrobe_upload(user_id: str, img_base64: str, on_stage=None):
+    """Describe, store and count one validated image; the upload response body, or None if storing failed."""
+    on_stage = on_stage or (lambda stage: None)
+    on_stage("analyzing")
+    with track_stage("wardrobe_vision"):
+        description = analyze_wardrobe_image(img_base64)
+    
+    on_stage("storing")
+    with track_stage("store_wardrobe_item"):
+        success = add_user_style_item(
+            user_id=user_id,
+            description=description,
+            source_type='wardrobe_upload',
+            metadata={'upload_method': 'base64'}
+        )
+    if not success:
+        return None
+    
+    on_stage("counting")
+    with track_stage("wardrobe_status"):
+        total_items = get_user_style_count(user_id)
+        wardrobe_items = len(get_user_items_by_source(user_id, 'wardrobe_upload'))
+    
+    return {
+        "success": True,
+        "message": "Image processed and added to your wardrobe",
+        "user_id": user_id,
+        "total_style_items": total_items,
+        "wardrobe_items": wardrobe_items,
+        "description": description[:100] + "..." if len(description) > 100 else description
+    }
+
+def _run_upload_job(on_stage, user_id: str, img_base64: str):
+    result = process_wardrobe_upload(user_id, img_base64, on_stage)
+    if result is None:
+        raise RuntimeError("Failed to process and store image")
+    return result
+
 # --- Endpoints ---
 
 @app.get("/")
@@ -145,14 +248,26 @@ def read_root():
 
 @app.get("/health")
 def health_check_endpoint():
-    """Health check for the API and database connections."""
+    """Health check for the API and database connections, with circuit breaker states per dependency."""
     health_status = health_check()
     
     if health_status["status"] == "error":
-        raise HTTPException(status_code=500, detail=health_status["message"])
+        return JSONResponse(status_code=500, content={"detail": health_status["message"], "circuit_breakers": breaker_states()})
     
+    health_status["circuit_breakers"] = breaker_states()
     return health_status
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """Prometheus-format latency histograms, in-flight gauges, cache hit rates and Gemini token usage."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/ready")
+def readiness_endpoint():
+    """Readiness of background dataset ingestion, with per-collection progress, rows/sec and ETA."""
+    snapshot = ingestion_snapshot()
+    return JSONResponse(status_code=200 if snapshot["ready"] else 503, content=snapshot)
+
 @app.get("/user/{user_id}/status", response_model=UserStatusResponse)
 def check_user_status(user_id: str):
     """Check if user has uploaded wardrobe items and purchase history."""
@@ -170,7 +285,7 @@ def check_user_status(user_id: str):
         )
         
     except Exception as e:
-        print(f"Error checking user status: {e}")
+        logger.error("Error checking user status: %s", e, extra={'user_id': user_id})
         return UserStatusResponse(
             user_exists=False,
             wardrobe_items_count=0,
@@ -180,45 +295,49 @@ def check_user_status(user_id: str):
         )
 
 @app.post("/user/styles/upload-base64")
-async def upload_user_image_base64(upload_data: UserImageUpload):
-    """Upload user's wardrobe image as base64 string."""
+async def upload_user_image_base64(upload_data: UserImageUpload, async_processing: bool = Query(False, alias="async")):
+    """Upload user's wardrobe image as base64 string.
+    With ?async=true the image is only validated here: returns 202 with a job to poll at /user/styles/upload-jobs/{job_id}."""
     try:
         try:
             img_data = base64.b64decode(upload_data.image_base64)
         except Exception:
             raise HTTPException(status_code=400, detail="Invalid base64 image data")
         
-        img_base64 = validate_and_convert_image(img_data)
+        with track_stage("validate_image"):
+            img_base64 = await run_in_threadpool(profiled, validate_and_convert_image, img_data)
         
-        description = analyze_wardrobe_image(img_base64)
+        if async_processing:
+            try:
+                # Keyed by image content, so a client retrying after a timeout gets the same job back
+                job = await run_in_threadpool(get_upload_queue().submit, upload_data.user_id,
+                                              hashlib.sha1(img_data).hexdigest(), _run_upload_job,
+                                              upload_data.user_id, img_base64)
+            except UploadQueueFull:
+                raise HTTPException(status_code=503, detail="Upload queue is full, please retry shortly",
+                                    headers={"Retry-After": "5"})
+            status_url = f"/user/styles/upload-jobs/{job['job_id']}"
+            return JSONResponse(status_code=202, headers={"Location": status_url},
+                                content={**job, "status_url": status_url})
         
-        success = add_user_style_item(
-            user_id=upload_data.user_id,
-            description=description,
-            source_type='wardrobe_upload',
-            metadata={'upload_method': 'base64'}
-        )
-        
-        if success:
-            total_items = get_user_style_count(upload_data.user_id)
-            wardrobe_items = len(get_user_items_by_source(upload_data.user_id, 'wardrobe_upload'))
-            
-            return {
-                "success": True,
-                "message": "Image processed and added to your wardrobe",
-                "user_id": upload_data.user_id,
-                "total_style_items": total_items,
-                "wardrobe_items": wardrobe_items,
-                "description": description[:100] + "..." if len(description) > 100 else description
-            }
-        else:
+        result = await run_in_threadpool(profiled, process_wardrobe_upload, upload_data.user_id, img_base64)
+        if result is None:
             raise HTTPException(status_code=500, detail="Failed to process and store image")
+        return result
             
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing image: {str(e)}")
 
+@app.get("/user/styles/upload-jobs/{job_id}")
+def get_upload_job(job_id: str):
+    """Status of an async wardrobe upload: queued, processing (with stage and progress), done (with result) or failed."""
+    job = get_upload_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Upload job not found or expired")
+    return job
+
 @app.post("/user/styles/load-orders")
 async def load_user_order_history(user_id: str = Form(...)):
     """Load user's order history into their style collection."""
@@ -243,33 +362,39 @@ async def load_user_order_history(user_id: str = Form(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error loading order history: {str(e)}")
 
-@app.post("/recommend", response_model=StyleRecommendation)
-async def recommend_style(request: StyleRequest):
-    """
-    Main endpoint for style recommendation using the recommender module.
-    Requires user to have uploaded wardrobe or have purchase history.
-    """
-    print(f"Received recommendation request from user: {request.user_id}")
-    print(f"User prompt: {request.user_prompt}")
-    
+def _recommend_for_user(request: StyleRequest):
+    """Status check and pipeline for /recommend; both block on Chroma and Gemini."""
     user_status = check_user_status(request.user_id)
     if not user_status.user_exists:
         raise HTTPException(
             status_code=400,
             detail="User must upload wardrobe items or load order history before getting recommendations."
         )
+    return generate_style_recommendation(
+        user_id=request.user_id,
+        user_prompt=request.user_prompt,
+        location=request.current_location
+    )
+
+@app.post("/recommend", response_model=StyleRecommendation)
+async def recommend_style(request: StyleRequest):
+    """
+    Main endpoint for style recommendation using the recommender module.
+    Requires user to have uploaded wardrobe or have purchase history.
+    """
+    logger.info("Received recommendation request", extra={'user_id': request.user_id})
+    logger.debug("User prompt", extra={**SAMPLED, 'user_prompt': request.user_prompt})
     
     try:
-        recommendation_data = generate_style_recommendation(
-            user_id=request.user_id,
-            user_prompt=request.user_prompt,
-            location=request.current_location
-        )
+        # Off the event loop so concurrent requests overlap (and identical ones can share work)
+        recommendation_data = await run_in_threadpool(profiled, _recommend_for_user, request)
         
         return StyleRecommendation(**recommendation_data)
 
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error during recommendation: {e}")
+        logger.exception("Error during recommendation: %s", e, extra={'user_id': request.user_id})
         raise HTTPException(status_code=500, detail=f"Recommendation failed: {str(e)}")
 
 @app.delete("/user/{user_id}/wardrobe")
@@ -292,7 +417,7 @@ def clear_user_wardrobe(user_id: str, source_type: Optional[str] = None):
             }
             
     except Exception as e:
-        print(f"Error clearing wardrobe: {e}")
+        logger.error("Error clearing wardrobe: %s", e, extra={'user_id': user_id})
         raise HTTPException(status_code=500, detail=f"Failed to clear wardrobe: {str(e)}")
 
 if __name__ == "__main__":
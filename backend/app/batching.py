@@ -0,0 +1,105 @@
+import os
+import queue
+import threading
+import time
+from .metrics import record_microbatch, track_dependency
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+class _Pending:
+    def __init__(self, item):
+        self.item = item
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class MicroBatcher:
+    """Gathers concurrent single-item calls for up to window_ms (or max_batch_size items) and runs
+    them as one batch_fn(items) call on a dispatcher thread; each caller gets its own result back.
+    The window is only held open under contention: a lone caller's item is dispatched at once."""
+
+    def __init__(self, name, batch_fn, max_batch_size=32, window_ms=2.0):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(max_batch_size, 1)
+        self.window = max(window_ms, 0) / 1000.0
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._in_flight = 0
+        self._last_batch_size = 0
+
+    def _ensure_dispatcher(self):
+        # Started lazily, and again in a forked worker where the parent's thread no longer exists
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.SimpleQueue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, item):
+        """Block until the batch containing item has run; returns its result or raises its error."""
+        self._ensure_dispatcher()
+        pending = _Pending(item)
+        with self._lock:
+            self._in_flight += 1
+        try:
+            self._queue.put(pending)
+            pending.done.wait()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _contended(self, batch):
+        """Other callers are on their way, or the last batch had company: worth waiting for the window."""
+        with self._lock:
+            in_flight = self._in_flight
+        return in_flight > len(batch) or self._last_batch_size > 1
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if not self._contended(batch):
+            self._last_batch_size = len(batch)
+            return batch
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Past the window, still take whatever is already queued
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._last_batch_size = len(batch)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            record_microbatch(self.name, len(batch))
+            try:
+                with track_dependency(self.name, "batch"):
+                    results = self.batch_fn([pending.item for pending in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"{self.name} batch returned {len(results)} results for {len(batch)} items")
+                for pending, result in zip(batch, results):
+                    pending.result = result
+            except Exception as e:
+                logger.error("Micro-batch failed: %s", e, extra={'batcher': self.name, 'size': len(batch)})
+                for pending in batch:
+                    pending.error = e
+            finally:
+                for pending in batch:
+                    pending.done.set()
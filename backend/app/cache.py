@@ -0,0 +1,57 @@
+import threading
+import time
+from collections import OrderedDict
+from .metrics import record_cache
+
+_MISSING = object()
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ttl_seconds. ttl_seconds <= 0 disables it."""
+
+    def __init__(self, name, max_size, ttl_seconds):
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, key, default=None):
+        """Return the cached value (refreshing its LRU position) or default; counts the hit or miss."""
+        if not self.enabled:
+            return default
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] <= now:
+                del self._entries[key]
+                entry = _MISSING
+            if entry is not _MISSING:
+                self._entries.move_to_end(key)
+        record_cache(self.name, entry is not _MISSING)
+        return default if entry is _MISSING else entry[1]
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, predicate=None):
+        """Drop every entry, or only those whose key matches predicate(key)."""
+        with self._lock:
+            if predicate is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,263 @@
+import os
+import threading
+import time
+import numpy as np
+from dotenv import load_dotenv
+from .ingestion import is_collection_ready
+from .log import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Compression mode for the catalog search path: none, int8, pca or pca_int8
+CATALOG_COMPRESSION = os.getenv("CATALOG_COMPRESSION", "none").lower()
+CATALOG_PCA_DIM = int(os.getenv("CATALOG_PCA_DIM", 128))
+CATALOG_RERANK_CANDIDATES = int(os.getenv("CATALOG_RERANK_CANDIDATES", 50))
+CATALOG_PCA_TRAIN_SAMPLES = int(os.getenv("CATALOG_PCA_TRAIN_SAMPLES", 20000))
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Rewritten whenever a catalog load or sync changes the collection (sync_catalog.py runs in its own
+# process); servers compare it and rebuild their index. Must be on storage every server can read
+CATALOG_VERSION_PATH = os.getenv("CATALOG_VERSION_PATH", os.path.join(
+    os.getenv("STYLESENSE_DATA_DIR", os.path.join(_PROJECT_ROOT, "data")), "catalog_version"))
+CATALOG_VERSION_CHECK_SECONDS = 60
+
+COMPRESSION_MODES = ("int8", "pca", "pca_int8")
+FETCH_PAGE_SIZE = 5000
+SCAN_CHUNK_SIZE = 65536
+
+class CompressedCatalogIndex:
+    """In-memory PCA / int8 codes for coarse catalog search with exact re-rank."""
+
+    def __init__(self, mode="int8", pca_dim=CATALOG_PCA_DIM, rerank_candidates=CATALOG_RERANK_CANDIDATES):
+        if mode not in COMPRESSION_MODES:
+            raise ValueError(f"Unknown catalog compression mode: {mode}")
+        self.mode = mode
+        self.pca_dim = pca_dim
+        self.rerank_candidates = rerank_candidates
+        self.mean = None
+        self.components = None
+        self.scale = None
+        self.codes = None
+        self.code_norms = None
+        self.ids = []
+
+    @property
+    def uses_pca(self):
+        return self.mode in ("pca", "pca_int8")
+
+    @property
+    def uses_int8(self):
+        return self.mode in ("int8", "pca_int8")
+
+    def train(self, embeddings):
+        """Fit the PCA projection and int8 scales on a sample of catalog vectors."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if len(embeddings) > CATALOG_PCA_TRAIN_SAMPLES:
+            rng = np.random.default_rng(0)
+            sample = embeddings[rng.choice(len(embeddings), CATALOG_PCA_TRAIN_SAMPLES, replace=False)]
+        else:
+            sample = embeddings
+
+        if self.uses_pca:
+            self.mean = sample.mean(axis=0)
+            dim = min(self.pca_dim, sample.shape[1], len(sample))
+            _, _, vt = np.linalg.svd(sample - self.mean, full_matrices=False)
+            self.components = vt[:dim].astype(np.float32)
+
+        if self.uses_int8:
+            projected = self._project(sample)
+            max_abs = np.abs(projected).max(axis=0)
+            self.scale = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+
+    def _project(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.uses_pca:
+            return (vectors - self.mean) @ self.components.T
+        return vectors
+
+    def encode(self, embeddings):
+        """Compress full vectors into the stored code representation."""
+        projected = self._project(embeddings)
+        if self.uses_int8:
+            return np.clip(np.rint(projected / self.scale), -127, 127).astype(np.int8)
+        return projected.astype(np.float32)
+
+    def _decode(self, codes):
+        if self.uses_int8:
+            return codes.astype(np.float32) * self.scale
+        return codes
+
+    def build(self, ids, embeddings):
+        """Train on and encode the given catalog vectors."""
+        self.train(embeddings)
+        self.ids = list(ids)
+        self.codes = self.encode(embeddings)
+        self.code_norms = np.concatenate([
+            (self._decode(self.codes[start:start + SCAN_CHUNK_SIZE]) ** 2).sum(axis=1)
+            for start in range(0, len(self.codes), SCAN_CHUNK_SIZE)
+        ]) if len(self.codes) else np.zeros(0, dtype=np.float32)
+
+    def memory_bytes(self):
+        """Size of the stored codes in bytes."""
+        return int(self.codes.nbytes) if self.codes is not None else 0
+
+    def coarse_search(self, query_embedding, n_candidates):
+        """Approximate squared-L2 search over the compressed codes."""
+        if self.codes is None or len(self.ids) == 0:
+            return [], np.zeros(0, dtype=np.float32)
+
+        query = self._project(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+        weighted_query = query * self.scale if self.uses_int8 else query
+
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        for start in range(0, len(self.codes), SCAN_CHUNK_SIZE):
+            chunk = self.codes[start:start + SCAN_CHUNK_SIZE].astype(np.float32, copy=False)
+            scores[start:start + len(chunk)] = chunk @ weighted_query
+        distances = float(query @ query) - 2 * scores + self.code_norms
+
+        n_candidates = min(n_candidates, len(distances))
+        top = np.argpartition(distances, n_candidates - 1)[:n_candidates]
+        top = top[np.argsort(distances[top])]
+        return [self.ids[i] for i in top], distances[top]
+
+    def search(self, collection, query_embedding, n_results=10):
+        """Coarse search on codes, then exact re-rank of the candidates against Chroma's full vectors."""
+        candidate_ids, _ = self.coarse_search(query_embedding, max(n_results, self.rerank_candidates))
+        if not candidate_ids:
+            return {'ids': [[]], 'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
+
+        # database imports this module, so take chroma_call (metrics + the chroma circuit breaker) lazily
+        from .database import chroma_call
+        candidates = chroma_call("get", collection.get, ids=candidate_ids, include=['embeddings', 'documents', 'metadatas'])
+        full_vectors = np.asarray(candidates['embeddings'], dtype=np.float32)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        exact = ((full_vectors - query) ** 2).sum(axis=1)
+        order = np.argsort(exact)[:n_results]
+
+        return {
+            'ids': [[candidates['ids'][i] for i in order]],
+            'documents': [[candidates['documents'][i] for i in order]],
+            'metadatas': [[candidates['metadatas'][i] for i in order]],
+            'distances': [[float(exact[i]) for i in order]]
+        }
+
+def fetch_collection_embeddings(collection):
+    """Page all ids and embeddings out of a Chroma collection."""
+    ids = []
+    embeddings = []
+    offset = 0
+    while True:
+        page = collection.get(include=['embeddings'], limit=FETCH_PAGE_SIZE, offset=offset)
+        if not page['ids']:
+            break
+        ids.extend(page['ids'])
+        embeddings.append(np.asarray(page['embeddings'], dtype=np.float32))
+        offset += len(page['ids'])
+    if not embeddings:
+        return [], np.zeros((0, 0), dtype=np.float32)
+    return ids, np.vstack(embeddings)
+
+def build_catalog_index(collection, mode=None, pca_dim=None):
+    """Build a compressed index from the vectors already stored in the catalog collection."""
+    index = CompressedCatalogIndex(mode or CATALOG_COMPRESSION, pca_dim or CATALOG_PCA_DIM)
+    ids, embeddings = fetch_collection_embeddings(collection)
+    index.build(ids, embeddings)
+    logger.info("Built %s catalog index over %d products (%.1f MB of codes)", index.mode, len(ids), index.memory_bytes() / 1e6)
+    return index
+
+def measure_recall(index, ids, embeddings, query_embeddings, k=10):
+    """Recall@k of the coarse (compressed-only) ranking against exact search on full vectors."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = (embeddings ** 2).sum(axis=1)
+    hits = 0
+    for query in np.asarray(query_embeddings, dtype=np.float32):
+        exact = norms - 2 * (embeddings @ query)
+        exact_top = {ids[i] for i in np.argsort(exact)[:k]}
+        approx_top, _ = index.coarse_search(query, k)
+        hits += len(exact_top.intersection(approx_top))
+    return hits / (k * len(query_embeddings)) if len(query_embeddings) else 0.0
+
+def read_catalog_version():
+    """The catalog version last written by bump_catalog_version, or None."""
+    try:
+        with open(CATALOG_VERSION_PATH) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def bump_catalog_version():
+    """Record that the catalog collection changed so every server rebuilds its compressed index."""
+    os.makedirs(os.path.dirname(os.path.abspath(CATALOG_VERSION_PATH)), exist_ok=True)
+    tmp_path = f"{CATALOG_VERSION_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(repr(time.time()))
+    os.replace(tmp_path, CATALOG_VERSION_PATH)
+    invalidate_catalog_index()
+
+_catalog_index = None
+_catalog_index_version = None
+_catalog_index_building = False
+_catalog_version_checked_at = 0.0
+_catalog_index_lock = threading.Lock()
+
+def _catalog_index_stale():
+    """True when there is no index yet or another process synced the catalog since it was built
+    (checked once a minute, so a failing build is not retried on every search)."""
+    global _catalog_version_checked_at
+    now = time.monotonic()
+    with _catalog_index_lock:
+        if _catalog_version_checked_at and now - _catalog_version_checked_at < CATALOG_VERSION_CHECK_SECONDS:
+            return False
+        _catalog_version_checked_at = now
+        index, version = _catalog_index, _catalog_index_version
+    return index is None or read_catalog_version() != version
+
+def _build_and_swap(collection):
+    global _catalog_index, _catalog_index_version, _catalog_index_building
+    try:
+        version = read_catalog_version()
+        index = build_catalog_index(collection)
+        with _catalog_index_lock:
+            _catalog_index, _catalog_index_version = index, version
+    except Exception as e:
+        logger.error("Error building compressed catalog index: %s", e)
+    finally:
+        with _catalog_index_lock:
+            _catalog_index_building = False
+
+def refresh_catalog_index(collection, wait=False):
+    """(Re)build the compressed index, on a background thread unless wait is set. Searches keep using
+    the current index, or Chroma directly, until the new one is swapped in. Call when ingestion finishes."""
+    global _catalog_index_building
+    if CATALOG_COMPRESSION not in COMPRESSION_MODES or collection is None:
+        return None
+    with _catalog_index_lock:
+        if _catalog_index_building:
+            return _catalog_index
+        _catalog_index_building = True
+    if wait:
+        _build_and_swap(collection)
+    else:
+        threading.Thread(target=_build_and_swap, args=(collection,), name="catalog-index-build", daemon=True).start()
+    return _catalog_index
+
+def get_catalog_index(collection):
+    """Return the shared compressed catalog index; None when disabled or not built yet. Never builds on
+    the request path: a missing or outdated index is (re)built in the background."""
+    if CATALOG_COMPRESSION not in COMPRESSION_MODES or collection is None:
+        return None
+    # Codes trained on a half-loaded catalog would be stale; search Chroma directly until ingestion finishes
+    if not is_collection_ready(collection.name):
+        return None
+    if _catalog_index_stale():
+        logger.info("Compressed catalog index missing or outdated; rebuilding in the background",
+                    extra={'catalog_version': read_catalog_version()})
+        refresh_catalog_index(collection)
+    return _catalog_index
+
+def invalidate_catalog_index():
+    """Mark the compressed index outdated so the next search starts a rebuild after the catalog changes."""
+    global _catalog_version_checked_at
+    with _catalog_index_lock:
+        _catalog_version_checked_at = 0.0
@@ -0,0 +1,170 @@
+import os
+import re
+import threading
+import numpy as np
+from dotenv import load_dotenv
+from .ingestion import is_collection_ready
+from .metrics import track_dependency
+from .log import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Search per-celebrity prototypes instead of every image description
+CELEBRITY_INDEX_ENABLED = os.getenv("CELEBRITY_INDEX_ENABLED", "true").lower() == "true"
+# Prototypes per celebrity: 1 = centroid, more = k-means over that celebrity's image descriptions
+CELEBRITY_PROTOTYPES = int(os.getenv("CELEBRITY_PROTOTYPES", 1))
+
+FETCH_PAGE_SIZE = 5000
+KMEANS_ITERATIONS = 10
+
+_IMAGE_SUFFIX = re.compile(r"\.(jpe?g|png)$", re.IGNORECASE)
+_INDEX_SUFFIX = re.compile(r"([_\-\s]*(\(\d+\)|\d+))+$")
+
+def normalise_celebrity_name(raw_name):
+    """'emma_stone_3.jpg' / 'Emma-Stone (2)' -> 'Emma Stone'."""
+    name = _IMAGE_SUFFIX.sub("", os.path.basename(str(raw_name or "")).strip())
+    name = _INDEX_SUFFIX.sub("", name)
+    words = re.split(r"[_\-\s]+", name)
+    return " ".join(word.capitalize() for word in words if word)
+
+def _unit(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+def _prototypes(embeddings, k):
+    """Centroid (k=1) or k-means prototypes with farthest-point initialisation."""
+    if k <= 1 or len(embeddings) <= 1:
+        return embeddings.mean(axis=0, keepdims=True)
+    k = min(k, len(embeddings))
+    centers = [embeddings[0]]
+    for _ in range(1, k):
+        distances = np.min([((embeddings - c) ** 2).sum(axis=1) for c in centers], axis=0)
+        centers.append(embeddings[int(np.argmax(distances))])
+    centers = np.asarray(centers)
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = np.argmin(((embeddings[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2), axis=1)
+        for j in range(k):
+            members = embeddings[assignment == j]
+            if len(members):
+                centers[j] = members.mean(axis=0)
+    return centers
+
+class CelebrityIndex:
+    """Normalised celebrity names with centroid/prototype vectors for the style-twin lookup."""
+
+    def __init__(self, prototypes_per_celebrity=CELEBRITY_PROTOTYPES):
+        self.prototypes_per_celebrity = prototypes_per_celebrity
+        self.names = []
+        self.image_urls = []
+        self.image_counts = []
+        self.prototypes = None
+        self.owners = None
+        self.source_count = 0
+
+    def build(self, embeddings, metadatas):
+        """Group image-description embeddings by normalised celebrity name and reduce each group."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        groups = {}
+        for i, meta in enumerate(metadatas):
+            meta = meta or {}
+            name = meta.get('celebrity_name') or normalise_celebrity_name(meta.get('celebrity', ''))
+            if name:
+                groups.setdefault(name, []).append(i)
+
+        prototypes, owners = [], []
+        for owner, (name, rows) in enumerate(sorted(groups.items())):
+            vectors = embeddings[rows]
+            centroid = vectors.mean(axis=0)
+            # Representative image: the one closest to the celebrity's centroid
+            representative = rows[int(np.argmin(((vectors - centroid) ** 2).sum(axis=1)))]
+            self.names.append(name)
+            self.image_urls.append((metadatas[representative] or {}).get('image_url', ''))
+            self.image_counts.append(len(rows))
+            group_prototypes = _prototypes(vectors, self.prototypes_per_celebrity)
+            prototypes.append(group_prototypes)
+            owners.extend([owner] * len(group_prototypes))
+
+        dim = embeddings.shape[1] if embeddings.ndim == 2 else 0
+        self.prototypes = _unit(np.vstack(prototypes)).astype(np.float32) if prototypes else np.zeros((0, dim), dtype=np.float32)
+        self.owners = np.asarray(owners, dtype=np.int64)
+        self.source_count = len(metadatas)
+        return self
+
+    def search(self, query_embedding, n_results=1):
+        """Closest celebrities by cosine distance to their nearest prototype (squared L2 on unit vectors)."""
+        if self.prototypes is None or len(self.prototypes) == 0:
+            return []
+        query = _unit(np.asarray(query_embedding, dtype=np.float32))
+        distances = 2.0 - 2.0 * (self.prototypes @ query)
+        best = {}
+        for i in np.argsort(distances):
+            owner = int(self.owners[i])
+            if owner not in best:
+                best[owner] = float(distances[i])
+                if len(best) >= n_results:
+                    break
+        return [
+            {
+                'celebrity': self.names[owner],
+                'image_url': self.image_urls[owner],
+                'images': self.image_counts[owner],
+                'distance': distance
+            }
+            for owner, distance in best.items()
+        ]
+
+    def __len__(self):
+        return len(self.names)
+
+def fetch_collection_vectors(collection):
+    """Page all embeddings and metadatas out of a Chroma collection."""
+    embeddings, metadatas = [], []
+    offset = 0
+    while True:
+        with track_dependency("chroma", "get"):
+            page = collection.get(include=['embeddings', 'metadatas'], limit=FETCH_PAGE_SIZE, offset=offset)
+        if not page['ids']:
+            break
+        embeddings.append(np.asarray(page['embeddings'], dtype=np.float32))
+        metadatas.extend(page['metadatas'])
+        offset += len(page['ids'])
+    if not embeddings:
+        return np.zeros((0, 0), dtype=np.float32), []
+    return np.vstack(embeddings), metadatas
+
+def build_celebrity_index(collection, prototypes_per_celebrity=None):
+    """Build the celebrity index from the image descriptions stored in Chroma."""
+    index = CelebrityIndex(prototypes_per_celebrity or CELEBRITY_PROTOTYPES)
+    embeddings, metadatas = fetch_collection_vectors(collection)
+    index.build(embeddings, metadatas)
+    logger.info("Built celebrity index: %d celebrities, %d prototypes from %d images",
+                len(index), len(index.prototypes), index.source_count)
+    return index
+
+_celebrity_index = None
+_celebrity_index_lock = threading.Lock()
+
+def get_celebrity_index(collection):
+    """Return the shared celebrity index, building it on first use. None when disabled, loading or empty."""
+    global _celebrity_index
+    if not CELEBRITY_INDEX_ENABLED or collection is None:
+        return None
+    if not is_collection_ready(collection.name):
+        return None
+    if _celebrity_index is None:
+        with _celebrity_index_lock:
+            if _celebrity_index is None:
+                try:
+                    _celebrity_index = build_celebrity_index(collection)
+                except Exception as e:
+                    logger.error("Error building celebrity index: %s", e)
+                    return None
+    return _celebrity_index if len(_celebrity_index) else None
+
+def invalidate_celebrity_index():
+    """Drop the index so it is rebuilt after the celebrity collection changes."""
+    global _celebrity_index
+    with _celebrity_index_lock:
+        _celebrity_index = None
@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+from collections import deque
+from dotenv import load_dotenv
+from .metrics import record_breaker_state, record_breaker_rejection
+from .log import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+CIRCUIT_BREAKERS_ENABLED = os.getenv("CIRCUIT_BREAKERS_ENABLED", "true").lower() == "true"
+# Open once this fraction of the calls in the window failed (with at least BREAKER_MIN_CALLS calls)
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", 0.5))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", 10))
+BREAKER_WINDOW_SECONDS = float(os.getenv("BREAKER_WINDOW_SECONDS", 30))
+# How long an open breaker fails fast before letting trial calls through (half-open)
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", 15))
+BREAKER_HALF_OPEN_CALLS = int(os.getenv("BREAKER_HALF_OPEN_CALLS", 2))
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+class CircuitBreaker:
+    """Failure-rate breaker: closed -> open (fail fast) -> half-open (a few trial calls) -> closed or open again."""
+
+    def __init__(self, name, failure_rate=BREAKER_FAILURE_RATE, min_calls=BREAKER_MIN_CALLS,
+                 window_seconds=BREAKER_WINDOW_SECONDS, open_seconds=BREAKER_OPEN_SECONDS,
+                 half_open_calls=BREAKER_HALF_OPEN_CALLS, ignore=()):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = max(half_open_calls, 1)
+        # Exceptions that say nothing about the dependency's health (e.g. no request budget left)
+        self.ignore = tuple(ignore)
+        self.state = STATE_CLOSED
+        self.opened_at = None
+        self._outcomes = deque()
+        self._trials = 0
+        self._trial_successes = 0
+        self._lock = threading.Lock()
+        record_breaker_state(name, self.state)
+
+    def _transition(self, state):
+        if state == self.state:
+            return
+        logger.warning("Circuit breaker %s: %s -> %s", self.name, self.state, state, extra={'breaker': self.name})
+        self.state = state
+        self.opened_at = time.monotonic() if state == STATE_OPEN else None
+        self._trials = 0
+        self._trial_successes = 0
+        if state == STATE_CLOSED:
+            self._outcomes.clear()
+        record_breaker_state(self.name, state)
+
+    def _allow(self):
+        with self._lock:
+            if self.state == STATE_OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    return False
+                self._transition(STATE_HALF_OPEN)
+            if self.state == STATE_HALF_OPEN:
+                if self._trials >= self.half_open_calls:
+                    return False
+                self._trials += 1
+            return True
+
+    def _record(self, success):
+        with self._lock:
+            if self.state == STATE_HALF_OPEN:
+                if not success:
+                    self._transition(STATE_OPEN)
+                else:
+                    self._trial_successes += 1
+                    if self._trial_successes >= self.half_open_calls:
+                        self._transition(STATE_CLOSED)
+                return
+            now = time.monotonic()
+            self._outcomes.append((now, success))
+            while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+                self._outcomes.popleft()
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if (self.state == STATE_CLOSED and len(self._outcomes) >= self.min_calls
+                    and failures / len(self._outcomes) >= self.failure_rate):
+                self._transition(STATE_OPEN)
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn through the breaker; raises CircuitOpenError without calling fn while open."""
+        if not CIRCUIT_BREAKERS_ENABLED:
+            return fn(*args, **kwargs)
+        if not self._allow():
+            record_breaker_rejection(self.name)
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = fn(*args, **kwargs)
+        except self.ignore:
+            self._release_trial()
+            raise
+        except Exception:
+            self._record(False)
+            raise
+        self._record(True)
+        return result
+
+    def _release_trial(self):
+        with self._lock:
+            if self.state == STATE_HALF_OPEN and self._trials > 0:
+                self._trials -= 1
+
+    def snapshot(self):
+        with self._lock:
+            now = time.monotonic()
+            recent = [ok for t, ok in self._outcomes if now - t <= self.window_seconds]
+            return {
+                "state": self.state,
+                "calls_in_window": len(recent),
+                "failure_rate": round(recent.count(False) / len(recent), 3) if recent else 0.0,
+                "retry_in_seconds": round(max(self.open_seconds - (now - self.opened_at), 0), 1)
+                                    if self.state == STATE_OPEN else None
+            }
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name, **kwargs):
+    """The process-wide breaker for a dependency, created on first use."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **kwargs)
+        return _breakers[name]
+
+def breaker_states():
+    """State of every breaker, for /health."""
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.snapshot() for name, breaker in sorted(breakers.items())}
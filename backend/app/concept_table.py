@@ -0,0 +1,163 @@
+import json
+import os
+import re
+import threading
+import time
+from dotenv import load_dotenv
+from .metrics import record_cache
+from .log import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Written by precompute_concepts.py; /recommend serves concepts from it when present
+CONCEPT_TABLE_ENABLED = os.getenv("CONCEPT_TABLE_ENABLED", "true").lower() == "true"
+CONCEPT_TABLE_PATH = os.getenv("CONCEPT_TABLE_PATH", os.path.join(
+    os.getenv("STYLESENSE_DATA_DIR", os.path.join(_PROJECT_ROOT, "data")), "concept_table.json"))
+# A table older than this is ignored (catalog matches go stale after catalog syncs). 0 never expires
+CONCEPT_TABLE_MAX_AGE_HOURS = float(os.getenv("CONCEPT_TABLE_MAX_AGE_HOURS", 48))
+CONCEPT_TABLE_RELOAD_SECONDS = 60
+TABLE_VERSION = 1
+
+UNAVAILABLE = "unavailable"
+# (band, lowest °C); a temperature belongs to the last band whose floor it reaches
+TEMPERATURE_BANDS = (("cold", None), ("cool", 10), ("mild", 18), ("warm", 24), ("hot", 30))
+BAND_DESCRIPTIONS = {"cold": "below 10°C", "cool": "10-18°C", "mild": "18-24°C", "warm": "24-30°C", "hot": "above 30°C"}
+# weatherapi condition texts -> condition bucket; anything else is uncommon and served live
+CONDITION_KEYWORDS = (
+    ("snow", ("snow", "sleet", "ice", "blizzard")),
+    ("rain", ("rain", "drizzle", "shower", "thunder")),
+    ("fog", ("fog", "mist", "haze")),
+    ("cloudy", ("cloud", "overcast")),
+    ("clear", ("sunny", "clear")),
+)
+CONDITION_DESCRIPTIONS = {"snow": "snow", "rain": "rain", "fog": "fog or mist", "cloudy": "cloudy skies", "clear": "clear skies"}
+
+_WEATHER_PATTERN = re.compile(r" is (-?\d+(?:\.\d+)?)°C with (.+?)\. Dress accordingly\.$")
+
+def parse_weather(weather_info: str):
+    """(temperature °C, condition text) from get_weather's sentence, or None when weather was unavailable."""
+    match = _WEATHER_PATTERN.search(weather_info or "")
+    if not match:
+        return None
+    return float(match.group(1)), match.group(2)
+
+def temperature_band(temp_c: float):
+    band = TEMPERATURE_BANDS[0][0]
+    for name, floor in TEMPERATURE_BANDS[1:]:
+        if temp_c >= floor:
+            band = name
+    return band
+
+def condition_bucket(condition: str):
+    condition = (condition or "").lower()
+    for bucket, keywords in CONDITION_KEYWORDS:
+        if any(keyword in condition for keyword in keywords):
+            return bucket
+    return None
+
+def weather_key(weather_info: str):
+    """'mild/cloudy', 'unavailable', or None for conditions the table does not cover."""
+    parsed = parse_weather(weather_info)
+    if parsed is None:
+        return UNAVAILABLE
+    condition = condition_bucket(parsed[1])
+    return f"{temperature_band(parsed[0])}/{condition}" if condition else None
+
+def weather_keys():
+    """Every weather bucket the precomputation covers."""
+    return [UNAVAILABLE] + [f"{band}/{condition}" for band, _ in TEMPERATURE_BANDS for condition in CONDITION_DESCRIPTIONS]
+
+def describe_weather_key(key: str):
+    """Weather text for the concept prompt of a bucket."""
+    if key == UNAVAILABLE:
+        return "Weather data is unavailable. Assume mild conditions."
+    band, condition = key.split("/", 1)
+    return f"{band.capitalize()} weather ({BAND_DESCRIPTIONS[band]}) with {CONDITION_DESCRIPTIONS[condition]}. Dress accordingly."
+
+def concept_key(emotion: str, celebrity_twin: str, weather_info: str = None, weather=None):
+    """Table key for a request, or None when its weather is uncommon."""
+    weather = weather or weather_key(weather_info)
+    if weather is None:
+        return None
+    return "|".join(((emotion or "").lower(), (celebrity_twin or "").strip().lower(), weather))
+
+class ConceptTable:
+    """Precomputed outfit concepts per (emotion, celebrity twin, weather bucket) and catalog matches per item,
+    loaded from CONCEPT_TABLE_PATH and reloaded when the file changes."""
+
+    def __init__(self, path=CONCEPT_TABLE_PATH, max_age_hours=CONCEPT_TABLE_MAX_AGE_HOURS):
+        self.path = path
+        self.max_age_seconds = max_age_hours * 3600
+        self.concepts = {}
+        self.catalog = {}
+        self.built_at = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._checked_at and now - self._checked_at < CONCEPT_TABLE_RELOAD_SECONDS:
+            return
+        with self._lock:
+            if self._checked_at and now - self._checked_at < CONCEPT_TABLE_RELOAD_SECONDS:
+                return
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                self.concepts, self.catalog, self.built_at, self._mtime = {}, {}, None, None
+                return
+            if mtime == self._mtime:
+                return
+            try:
+                with open(self.path) as f:
+                    table = json.load(f)
+                if table.get("version") != TABLE_VERSION:
+                    raise ValueError(f"unsupported table version {table.get('version')}")
+                self.concepts = table.get("concepts", {})
+                self.catalog = table.get("catalog", {})
+                self.built_at = table.get("built_at")
+                self._mtime = mtime
+                logger.info("Loaded concept table", extra={'concepts': len(self.concepts), 'catalog_items': len(self.catalog)})
+            except Exception as e:
+                logger.error("Could not load concept table %s: %s", self.path, e)
+
+    def _fresh(self):
+        self._refresh()
+        if self.built_at is None:
+            return False
+        return not self.max_age_seconds or time.time() - self.built_at <= self.max_age_seconds
+
+    def concept(self, emotion: str, celebrity_twin: str, weather_info: str):
+        """Precomputed outfit items for the request's bucket, or None."""
+        if not CONCEPT_TABLE_ENABLED or not self._fresh():
+            return None
+        key = concept_key(emotion, celebrity_twin, weather_info)
+        items = self.concepts.get(key) if key else None
+        record_cache("concept_table", items is not None)
+        return list(items) if items else None
+
+    def catalog_matches(self, item: str):
+        """Precomputed catalog search results for an item from the table or the fallbacks, or None."""
+        if not CONCEPT_TABLE_ENABLED or not self._fresh():
+            return None
+        results = self.catalog.get(item)
+        record_cache("concept_catalog", results is not None)
+        return [dict(result) for result in results] if results is not None else None
+
+def save_concept_table(concepts: dict, catalog: dict, path=CONCEPT_TABLE_PATH):
+    """Write the table atomically so serving workers never read a partial file."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": TABLE_VERSION, "built_at": time.time(), "concepts": concepts, "catalog": catalog}, f)
+    os.replace(tmp_path, path)
+
+_concept_table = ConceptTable()
+
+def get_concept_table():
+    return _concept_table
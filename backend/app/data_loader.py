@@ -5,18 +5,25 @@ import base64
 from PIL import Image 
 from dotenv import load_dotenv
 import google.generativeai as genai
-from tqdm import tqdm
 import time
+import hashlib
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 
 # FIXED IMPORTS - using unified collection names
-from .database import CHROMA_COLLECTIONS, COLLECTION_MYNTRA_CATALOG, COLLECTION_USER_STYLES, COLLECTION_CELEB_STYLES, create_embedding, add_user_style_item
+from .database import CHROMA_COLLECTIONS, COLLECTION_MYNTRA_CATALOG, COLLECTION_USER_STYLES, COLLECTION_CELEB_STYLES, create_embedding, create_embeddings, add_user_style_item, get_user_styles_collection
+from .catalog_index import bump_catalog_version
+from .celebrity_index import invalidate_celebrity_index, normalise_celebrity_name
+from .llm import generate_content
+from .ingestion import ingestion_progress, mark_collection, STATUS_READY, STATUS_SKIPPED, STATUS_FAILED
+from .log import get_logger
 
 load_dotenv()
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 MOCK_USER_ID = os.getenv("MOCK_USER_ID", "test_user")
 
+logger = get_logger(__name__)
+
 # Get the absolute path to the project root - fixed for your structure
 if __name__ == '__main__':
     # When run directly, use current directory structure
@@ -25,7 +32,7 @@ else:
     # When imported as module, go up one level from app directory
     PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+DATA_DIR = os.getenv("STYLESENSE_DATA_DIR", os.path.join(PROJECT_ROOT, "data"))
 
 # Use the exact paths from your directory structure
 CELEBRITY_IMAGE_DIR = os.path.join(DATA_DIR, "Celeb_FBI_Dataset")
@@ -37,6 +44,8 @@ BATCH_SIZE = 50
 MAX_WORKERS = 4
 RATE_LIMIT_DELAY = 1.0
 SKIP_CELEBRITY_IMAGES = False
+# skip: leave a non-empty catalog untouched; delta: upsert new/changed rows and delete removed ones
+CATALOG_SYNC_MODE = os.getenv("CATALOG_SYNC_MODE", "skip").lower()
 
 # Thread-safe counter for progress tracking
 class ProgressCounter:
@@ -89,7 +98,7 @@ def analyze_uploaded_image_vision(base64_image):
                     {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"}
                 ]
                 
-                response = model.generate_content([prompt, image_part], safety_settings=safety_settings)
+                response = generate_content("celebrity_vision", [prompt, image_part], model=model, safety_settings=safety_settings)
                 
                 if response.text:
                     return response.text
@@ -114,7 +123,7 @@ def analyze_uploaded_image_vision(base64_image):
 
 def create_sample_order_history(file_path):
     """Create sample order history data if file doesn't exist."""
-    print("Creating sample Order_History.csv with fashion items...")
+    logger.info("Creating sample Order_History.csv with fashion items")
     
     sample_orders = [
         {"Product_Description": "Navy Blue Formal Blazer", "Product_Category": "Apparel"},
@@ -146,53 +155,199 @@ def create_sample_order_history(file_path):
     
     # Save to CSV
     df.to_csv(file_path, index=False)
-    print(f"Created sample order history with {len(sample_orders)} fashion items at {file_path}")
+    logger.info("Created sample order history with %d fashion items at %s", len(sample_orders), file_path)
+
+def catalog_row_hash(row):
+    """Content hash of the catalog fields that feed the product embedding and metadata."""
+    content = "\x1f".join(str(row.get(field, '')) for field in ('name', 'seller', 'purl'))
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+def catalog_product_id(row):
+    """Stable product id: the product URL when present, otherwise name and seller."""
+    purl = row.get('purl', '')
+    key = str(purl) if isinstance(purl, str) and purl.strip() else f"{row['name']}\x1f{row['seller']}"
+    return "prod_" + hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def prepare_catalog_rows(product_df):
+    """Collapse duplicate products and return {product_id: (row_hash, row)}."""
+    products = {}
+    for _, row in product_df.iterrows():
+        # Later rows win, so a re-listed product picks up its latest name/seller
+        products[catalog_product_id(row)] = (catalog_row_hash(row), row)
+    return products
+
+def fetch_catalog_hashes(collection):
+    """Page through the catalog collection and return {product_id: row_hash}."""
+    hashes = {}
+    offset = 0
+    while True:
+        page = collection.get(include=['metadatas'], limit=5000, offset=offset)
+        if not page['ids']:
+            break
+        for product_id, metadata in zip(page['ids'], page['metadatas']):
+            hashes[product_id] = (metadata or {}).get('row_hash')
+        offset += len(page['ids'])
+    return hashes
+
+def legacy_catalog_key(metadata):
+    """(product_id, row_hash) for a row stored before delta sync, which used prod_{idx} ids and no row_hash.
+    Its metadata holds the same name / seller / purl strings the hash and id are computed from."""
+    link = metadata.get('link', '')
+    row = {'name': metadata.get('name', ''), 'seller': metadata.get('brand', ''), 'purl': link}
+    row_hash = catalog_row_hash(row)
+    # A missing purl was stored as str(NaN)
+    row['purl'] = '' if link == 'nan' else link
+    return catalog_product_id(row), row_hash
+
+def migrate_legacy_catalog_ids(collection, hashes):
+    """Re-key legacy rows to stable product ids and backfill row_hash, reusing their stored embeddings,
+    so the first delta sync over an old catalog only embeds rows that actually changed. Updates hashes."""
+    legacy_ids = [product_id for product_id, row_hash in hashes.items() if row_hash is None]
+    if not legacy_ids:
+        return 0
+    print(f"Re-keying {len(legacy_ids)} catalog rows stored with legacy ids...")
+    for start in range(0, len(legacy_ids), 5000):
+        chunk = legacy_ids[start:start + 5000]
+        page = collection.get(ids=chunk, include=['embeddings', 'documents', 'metadatas'])
+        rekeyed = {}
+        for embedding, document, metadata in zip(page['embeddings'], page['documents'], page['metadatas']):
+            metadata = dict(metadata or {})
+            product_id, metadata['row_hash'] = legacy_catalog_key(metadata)
+            rekeyed[product_id] = (embedding, document, metadata)
+        if rekeyed:
+            collection.upsert(
+                ids=list(rekeyed),
+                embeddings=[row[0] for row in rekeyed.values()],
+                documents=[row[1] for row in rekeyed.values()],
+                metadatas=[row[2] for row in rekeyed.values()]
+            )
+        collection.delete(ids=chunk)
+        for product_id in chunk:
+            hashes.pop(product_id, None)
+        hashes.update((product_id, row[2]['row_hash']) for product_id, row in rekeyed.items())
+    return len(legacy_ids)
 
 def process_product_batch(batch_data, collection, counter, pbar):
-    """Process a batch of products and add them to ChromaDB."""
-    batch_embeddings = []
+    """Embed a batch of products in one encode call and upsert them into ChromaDB."""
     batch_documents = []
     batch_metadatas = []
     batch_ids = []
     
-    for i, (idx, row) in enumerate(batch_data):
+    for product_id, row_hash, row in batch_data:
         try:
             search_text = str(row['name']) + " by " + str(row['seller'])
             if pd.isna(search_text) or search_text.strip() == "":
                 continue
                 
-            embedding = create_embedding(search_text)
-            if embedding:
-                batch_embeddings.append(embedding)
-                batch_documents.append(search_text)
-                batch_metadatas.append({
-                    'brand': str(row['seller']),
-                    'link': str(row.get('purl', '')),
-                    'name': str(row['name'])
-                })
-                batch_ids.append(f"prod_{idx}")
+            batch_documents.append(search_text)
+            batch_metadatas.append({
+                'brand': str(row['seller']),
+                'link': str(row.get('purl', '')),
+                'name': str(row['name']),
+                'row_hash': row_hash
+            })
+            batch_ids.append(product_id)
                 
         except Exception as e:
-            print(f"Error processing product at index {idx}: {e}")
+            print(f"Error processing product {product_id}: {e}")
             continue
     
-    # Batch insert to ChromaDB
-    if batch_embeddings:
-        try:
-            collection.add(
-                embeddings=batch_embeddings,
-                documents=batch_documents,
-                metadatas=batch_metadatas,
-                ids=batch_ids
-            )
-            counter.increment()
-            pbar.update(len(batch_embeddings))
-            return len(batch_embeddings)
-        except Exception as e:
-            print(f"Error adding batch to ChromaDB: {e}")
-            return 0
+    pbar.update(len(batch_data) - len(batch_ids))
+    if not batch_ids:
+        return 0
     
-    return 0
+    batch_embeddings = create_embeddings(batch_documents)
+    if not batch_embeddings:
+        pbar.update(len(batch_ids))
+        return 0
+    
+    # Batch upsert to ChromaDB
+    try:
+        collection.upsert(
+            embeddings=batch_embeddings,
+            documents=batch_documents,
+            metadatas=batch_metadatas,
+            ids=batch_ids
+        )
+        counter.increment()
+        pbar.update(len(batch_ids))
+        return len(batch_ids)
+    except Exception as e:
+        print(f"Error adding batch to ChromaDB: {e}")
+        pbar.update(len(batch_ids))
+        return 0
+
+def load_product_catalog(sync_mode=None):
+    """Load the Myntra catalog; in delta mode only new/changed rows are embedded and removed rows deleted."""
+    sync_mode = (sync_mode or CATALOG_SYNC_MODE).lower()
+    print(f"\nLoading Myntra Product Catalog (sync mode: {sync_mode})...")
+    
+    if COLLECTION_MYNTRA_CATALOG not in CHROMA_COLLECTIONS:
+        print("Product catalog collection not available.")
+        mark_collection(COLLECTION_MYNTRA_CATALOG, STATUS_FAILED, "Collection not available")
+        return 0
+    collection = CHROMA_COLLECTIONS[COLLECTION_MYNTRA_CATALOG]
+    
+    existing_products = check_collection_exists_and_size(COLLECTION_MYNTRA_CATALOG)
+    if existing_products > 0 and sync_mode != "delta":
+        print(f"Product catalog already has {existing_products} items. Skipping reload.")
+        mark_collection(COLLECTION_MYNTRA_CATALOG, STATUS_SKIPPED, f"Already has {existing_products} items")
+        return 0
+    if existing_products > 0:
+        # A delta sync upserts in place: keep serving the loaded catalog instead of reporting it as loading
+        mark_collection(COLLECTION_MYNTRA_CATALOG, STATUS_READY, f"Serving {existing_products} items during delta sync")
+    
+    try:
+        if not os.path.exists(MYNTRA_CATALOG_FILE):
+            print(f"Product catalog file not found at {MYNTRA_CATALOG_FILE}")
+            mark_collection(COLLECTION_MYNTRA_CATALOG, STATUS_SKIPPED, "Catalog file not found")
+            return 0
+        
+        print("Reading product catalog file...")
+        product_df = pd.read_csv(MYNTRA_CATALOG_FILE)
+        
+        if product_df.empty:
+            print("Product catalog file is empty.")
+            mark_collection(COLLECTION_MYNTRA_CATALOG, STATUS_SKIPPED, "Catalog file is empty")
+            return 0
+        
+        print(f"Found {len(product_df)} products in catalog")
+        
+        # Clean data
+        product_df = product_df.dropna(subset=['name', 'seller'])
+        products = prepare_catalog_rows(product_df)
+        print(f"After cleaning: {len(products)} unique products ({len(product_df) - len(products)} duplicates collapsed)")
+        
+        existing_hashes = fetch_catalog_hashes(collection) if existing_products > 0 else {}
+        migrate_legacy_catalog_ids(collection, existing_hashes)
+        changed = [
+            (product_id, row_hash, row)
+            for product_id, (row_hash, row) in products.items()
+            if existing_hashes.get(product_id) != row_hash
+        ]
+        removed = [product_id for product_id in existing_hashes if product_id not in products]
+        print(f"Catalog delta: {len(changed)} new or changed, {len(removed)} removed, "
+              f"{len(products) - len(changed)} unchanged")
+        
+        # Process in batches with progress tracking
+        counter = ProgressCounter()
+        loaded_count = 0
+        with ingestion_progress(COLLECTION_MYNTRA_CATALOG, len(changed), register=existing_products == 0) as pbar:
+            for start in range(0, len(changed), BATCH_SIZE):
+                loaded_count += process_product_batch(changed[start:start + BATCH_SIZE], collection, counter, pbar)
+            
+            for start in range(0, len(removed), 5000):
+                collection.delete(ids=removed[start:start + 5000])
+        
+        print(f"Upserted {loaded_count} items into Product Catalog, deleted {len(removed)}.")
+        if loaded_count or removed:
+            bump_catalog_version()
+        return loaded_count
+        
+    except Exception as e:
+        print(f"Error loading product catalog: {e}")
+        mark_collection(COLLECTION_MYNTRA_CATALOG, STATUS_FAILED, str(e))
+        return 0
 
 def process_celebrity_image(image_path, collection, counter, celebrity_idx):
     """Process a single celebrity image."""
@@ -213,6 +368,7 @@ def process_celebrity_image(image_path, collection, counter, celebrity_idx):
                     documents=[description],
                     metadatas=[{
                         'celebrity': celebrity_name, 
+                        'celebrity_name': normalise_celebrity_name(celebrity_name),
                         'image_url': f"local://{image_path}",
                         'description': description[:200] + "..." if len(description) > 200 else description
                     }],
@@ -241,9 +397,9 @@ def check_collection_exists_and_size(collection_name):
 def get_user_orders_count(user_id):
     """Get count of existing user order history items."""
     try:
-        if COLLECTION_USER_STYLES not in CHROMA_COLLECTIONS:
+        collection = get_user_styles_collection(user_id, create=False)
+        if collection is None:
             return 0
-        collection = CHROMA_COLLECTIONS[COLLECTION_USER_STYLES]
         
         # Fix: Use $and operator for multiple conditions in ChromaDB
         where_clause = {
@@ -256,7 +412,7 @@ def get_user_orders_count(user_id):
         results = collection.get(where=where_clause)
         return len(results['ids']) if results['ids'] else 0
     except Exception as e:
-        print(f"Error getting user orders count: {e}")
+        logger.warning("Error getting user orders count: %s", e, extra={'user_id': user_id})
         # Fallback: try getting all user items and filter manually
         try:
             all_user_results = collection.get(where={"user_id": user_id})
@@ -267,44 +423,44 @@ def get_user_orders_count(user_id):
                 )
                 return purchase_history_count
         except Exception as e2:
-            print(f"Fallback method also failed: {e2}")
+            logger.error("Fallback method also failed: %s", e2, extra={'user_id': user_id})
         return 0
 
-def load_order_history_to_user_styles(user_id):
+def load_order_history_to_user_styles(user_id, track_progress=False):
     """Load order history into User_Styles collection for the specified user."""
-    print(f"Loading Order History into User_Styles Collection for user: {user_id}")
+    logger.info("Loading order history into User_Styles", extra={'user_id': user_id})
     
     # Check if order history is already loaded for this user
     existing_orders = get_user_orders_count(user_id)
     if existing_orders > 0:
-        print(f"User '{user_id}' already has {existing_orders} order history items. Skipping reload.")
+        logger.info("Order history already loaded, skipping reload", extra={'user_id': user_id, 'items': existing_orders})
+        if track_progress:
+            mark_collection(COLLECTION_USER_STYLES, STATUS_SKIPPED, f"Order history already loaded for '{user_id}'")
         return existing_orders
     
     try:
         # Check if the actual file exists first
-        print(f"Looking for Order History file at: {ORDER_HISTORY_FILE}")
-        print(f"File exists: {os.path.exists(ORDER_HISTORY_FILE)}")
-        print(f"File is file: {os.path.isfile(ORDER_HISTORY_FILE)}")
+        logger.debug("Order history file", extra={'path': ORDER_HISTORY_FILE, 'exists': os.path.isfile(ORDER_HISTORY_FILE)})
         
         # Create sample order history if file doesn't exist
         if not os.path.exists(ORDER_HISTORY_FILE):
-            print(f"Order history file not found. Creating sample data...")
+            logger.info("Order history file not found, creating sample data")
             create_sample_order_history(ORDER_HISTORY_FILE)
         
         # Now try to load the file
         if os.path.exists(ORDER_HISTORY_FILE):
-            print(f"Reading order history file...")
+            logger.debug("Reading order history file")
             order_df = pd.read_csv(ORDER_HISTORY_FILE)
             
             if not order_df.empty:
-                print(f"Found {len(order_df)} orders in history")
+                logger.debug("Found %d orders in history", len(order_df))
                 
                 # Filter for fashion items
                 FASHION_KEYWORDS = ['Apparel', 'Accessories', 'Footwear', 'Jewelry', 'Bag', 'Clothing']
                 
                 # Handle the case where Product_Category might not exist
                 if 'Product_Category' not in order_df.columns:
-                    print("Product_Category column not found. Adding default category.")
+                    logger.warning("Product_Category column not found, adding default category")
                     order_df['Product_Category'] = 'Apparel'
                 
                 fashion_filter = order_df['Product_Category'].astype(str).str.contains(
@@ -312,7 +468,7 @@ def load_order_history_to_user_styles(user_id):
                 )
                 order_df = order_df[fashion_filter]
                 
-                print(f"After filtering for fashion items: {len(order_df)} orders")
+                logger.debug("After filtering for fashion items: %d orders", len(order_df))
                 
                 if not order_df.empty:
                     # Create search text for embedding
@@ -328,7 +484,7 @@ def load_order_history_to_user_styles(user_id):
                     order_df = order_df.dropna(subset=['search_text'])
 
                     loaded_count = 0
-                    with tqdm(total=len(order_df), desc="Processing order history into User_Styles", unit="orders") as pbar:
+                    with ingestion_progress(COLLECTION_USER_STYLES, len(order_df), register=track_progress) as pbar:
                         for i, row in order_df.iterrows():
                             try:
                                 # USE THE UNIFIED add_user_style_item FUNCTION
@@ -342,23 +498,26 @@ def load_order_history_to_user_styles(user_id):
                                     loaded_count += 1
                                 pbar.update(1)
                             except Exception as e:
-                                print(f"Error processing order {i}: {e}")
+                                logger.error("Error processing order %s: %s", i, e, extra={'user_id': user_id})
                                 pbar.update(1)
 
-                    print(f"Loaded {loaded_count} order history items for '{user_id}' into User_Styles Collection.")
+                    logger.info("Loaded order history into User_Styles", extra={'user_id': user_id, 'items': loaded_count})
                     return loaded_count
                 else:
-                    print("No fashion items found in order history.")
-                    return 0
+                    logger.info("No fashion items found in order history")
             else:
-                print("Order history file is empty.")
-                return 0
+                logger.info("Order history file is empty")
         else:
-            print("Could not create or find order history file.")
-            return 0
+            logger.error("Could not create or find order history file", extra={'path': ORDER_HISTORY_FILE})
+        
+        if track_progress:
+            mark_collection(COLLECTION_USER_STYLES, STATUS_SKIPPED, "No order history items to load")
+        return 0
                 
     except Exception as e:
-        print(f"Error loading order history: {e}")
+        logger.exception("Error loading order history: %s", e, extra={'user_id': user_id})
+        if track_progress:
+            mark_collection(COLLECTION_USER_STYLES, STATUS_FAILED, str(e))
         return 0
 
 def add_user_wardrobe_image(user_id, image_path_or_base64, is_base64=False):
@@ -404,93 +563,18 @@ def add_user_wardrobe_image(user_id, image_path_or_base64, is_base64=False):
         print(f"Error adding user wardrobe image: {e}")
         return False
 
-def load_external_datasets():
-    """Loads and embeds all static external datasets with optimizations."""
-    
-    if not CHROMA_COLLECTIONS:
-        print("Cannot load data: ChromaDB client is not ready.")
-        return
-
-    print("Starting optimized data loading process...")
-    
-    # Debug: Print all paths to verify they're correct
-    print(f"\nPath Verification:")
-    print(f"   Project Root: {PROJECT_ROOT}")
-    print(f"   Data Directory: {DATA_DIR}")
-    print(f"   Celebrity images: {CELEBRITY_IMAGE_DIR}")
-    print(f"   Myntra catalog: {MYNTRA_CATALOG_FILE}")
-    print(f"   Order history: {ORDER_HISTORY_FILE}")
-    print(f"   Data dir exists: {os.path.isdir(DATA_DIR)}")
-    print(f"   Celebrity dir exists: {os.path.isdir(CELEBRITY_IMAGE_DIR)}")
-    print(f"   Myntra file exists: {os.path.exists(MYNTRA_CATALOG_FILE)}")
-    print(f"   Order file exists: {os.path.exists(ORDER_HISTORY_FILE)}")
-    
-    start_time = time.time()
-
-    # 1. Load Product Catalog (Myntra) with batch processing
-    print(f"\nLoading Myntra Product Catalog...")
-    
-    existing_products = check_collection_exists_and_size(COLLECTION_MYNTRA_CATALOG)
-    if existing_products > 0:
-        print(f"Product catalog already has {existing_products} items. Skipping reload.")
-    else:
-        try:
-            if not os.path.exists(MYNTRA_CATALOG_FILE):
-                print(f"Product catalog file not found at {MYNTRA_CATALOG_FILE}")
-            else:
-                print("Reading product catalog file...")
-                product_df = pd.read_csv(MYNTRA_CATALOG_FILE)
-                
-                if not product_df.empty:
-                    print(f"Found {len(product_df)} products in catalog")
-                    
-                    # Clean data
-                    product_df = product_df.dropna(subset=['name', 'seller'])
-                    print(f"After cleaning: {len(product_df)} products")
-                    
-                    # Process in batches with progress bar
-                    counter = ProgressCounter()
-                    batch_data = []
-                    loaded_count = 0
-                    
-                    with tqdm(total=len(product_df), desc="Processing products", unit="items") as pbar:
-                        for idx, row in product_df.iterrows():
-                            batch_data.append((idx, row))
-                            
-                            if len(batch_data) >= BATCH_SIZE:
-                                loaded_count += process_product_batch(
-                                    batch_data, 
-                                    CHROMA_COLLECTIONS[COLLECTION_MYNTRA_CATALOG],
-                                    counter,
-                                    pbar
-                                )
-                                batch_data = []
-                        
-                        # Process remaining items
-                        if batch_data:
-                            loaded_count += process_product_batch(
-                                batch_data,
-                                CHROMA_COLLECTIONS[COLLECTION_MYNTRA_CATALOG],
-                                counter,
-                                pbar
-                            )
-                    
-                    print(f"Loaded {loaded_count} items into Product Catalog.")
-                else:
-                    print("Product catalog file is empty.")
-                    
-        except Exception as e:
-            print(f"Error loading product catalog: {e}")
-
-    # 2. Load Style Inspiration (Celebrity Images)
+def load_celebrity_styles():
+    """Describe and embed the celebrity style images (Gemini Vision) into the Style Inspiration collection."""
     print(f"\nLoading Style Inspiration Catalog from images...")
     
     if SKIP_CELEBRITY_IMAGES:
         print("Skipping celebrity images due to configuration.")
+        mark_collection(COLLECTION_CELEB_STYLES, STATUS_SKIPPED, "Disabled by configuration")
     else:
         existing_styles = check_collection_exists_and_size(COLLECTION_CELEB_STYLES)
         if existing_styles > 0:
             print(f"Style Inspiration already has {existing_styles} items. Skipping reload.")
+            mark_collection(COLLECTION_CELEB_STYLES, STATUS_SKIPPED, f"Already has {existing_styles} items")
         else:
             if os.path.isdir(CELEBRITY_IMAGE_DIR):
                 image_paths = []
@@ -502,7 +586,7 @@ def load_external_datasets():
                     counter = ProgressCounter()
                     
                     # Process with limited concurrency to avoid API rate limits
-                    with tqdm(total=len(image_paths), desc="Processing celebrity images", unit="images") as pbar:
+                    with ingestion_progress(COLLECTION_CELEB_STYLES, len(image_paths)) as pbar:
                         with ThreadPoolExecutor(max_workers=2) as executor:
                             futures = []
                             
@@ -527,13 +611,45 @@ def load_external_datasets():
                                     pbar.update(1)
                     
                     print(f"Loaded {loaded_count} styles into Style Inspiration Catalog.")
+                    invalidate_celebrity_index()
                 else:
                     print(f"No image files found in {CELEBRITY_IMAGE_DIR}")
+                    mark_collection(COLLECTION_CELEB_STYLES, STATUS_SKIPPED, "No celebrity images found")
             else:
                 print(f"Directory not found: {CELEBRITY_IMAGE_DIR}")
+                mark_collection(COLLECTION_CELEB_STYLES, STATUS_SKIPPED, "Celebrity image directory not found")
+
+def load_external_datasets():
+    """Loads and embeds all static external datasets with optimizations."""
+    
+    if not CHROMA_COLLECTIONS:
+        print("Cannot load data: ChromaDB client is not ready.")
+        return
+
+    print("Starting optimized data loading process...")
+    
+    # Debug: Print all paths to verify they're correct
+    print(f"\nPath Verification:")
+    print(f"   Project Root: {PROJECT_ROOT}")
+    print(f"   Data Directory: {DATA_DIR}")
+    print(f"   Celebrity images: {CELEBRITY_IMAGE_DIR}")
+    print(f"   Myntra catalog: {MYNTRA_CATALOG_FILE}")
+    print(f"   Order history: {ORDER_HISTORY_FILE}")
+    print(f"   Data dir exists: {os.path.isdir(DATA_DIR)}")
+    print(f"   Celebrity dir exists: {os.path.isdir(CELEBRITY_IMAGE_DIR)}")
+    print(f"   Myntra file exists: {os.path.exists(MYNTRA_CATALOG_FILE)}")
+    print(f"   Order file exists: {os.path.exists(ORDER_HISTORY_FILE)}")
+    
+    start_time = time.time()
+
+    # 1. Load Product Catalog (Myntra) with batch processing
+    load_product_catalog()
+
+    # 2. Load Style Inspiration (Celebrity Images)
+    load_celebrity_styles()
 
     # 3. Load Order History into User Styles Collection (ALWAYS LOAD FOR DEFAULT USER)
-    load_order_history_to_user_styles(MOCK_USER_ID)
+    load_order_history_to_user_styles(MOCK_USER_ID, track_progress=True)
     
     end_time = time.time()
     duration = end_time - start_time
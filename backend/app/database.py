@@ -1,53 +1,243 @@
 import chromadb
 import os
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
 import uuid
+import atexit
+import hashlib
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from .catalog_index import get_catalog_index
+from .embeddings import load_embedding_model
+from .metrics import track_dependency, record_microbatch
+from .log import get_logger
+from .singleflight import SingleFlight
+from .batching import MicroBatcher
+from .embedding_pool import EMBEDDING_POOL_WORKERS, get_embedding_pool
+from .wardrobe_cache import WardrobeCache, WardrobeMatrix
+from .circuit_breaker import get_breaker
 
 # Load environment variables
 load_dotenv()
 
+logger = get_logger(__name__)
+
 CHROMA_HOST = os.getenv("CHROMA_HOST", "localhost")
 CHROMA_PORT = int(os.getenv("CHROMA_PORT", 8000))
+# http (dedicated `chroma run` server), persistent (embedded, on-disk) or ephemeral (embedded, in-memory)
+CHROMA_MODE = os.getenv("CHROMA_MODE", "http").lower()
+CHROMA_PERSIST_DIR = os.getenv(
+    "CHROMA_PERSIST_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "chroma")
+)
+# Users whose wardrobe embeddings are kept in memory for local matching; 0 disables
+WARDROBE_CACHE_USERS = int(os.getenv("WARDROBE_CACHE_USERS", 1000))
+# Batch concurrent single-text embeddings into one encode: gather for up to the window or max batch
+EMBEDDING_BATCHING = os.getenv("EMBEDDING_BATCHING", "true").lower() == "true"
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", 2))
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", 32))
+# User_Styles layout: shared (one collection filtered by user_id), sharded (USER_STYLES_SHARDS
+# collections routed by a hash of user_id) or per_user (one collection per user)
+USER_STYLES_STORAGE = os.getenv("USER_STYLES_STORAGE", "shared").lower()
+USER_STYLES_SHARDS = int(os.getenv("USER_STYLES_SHARDS", 16))
+# Open per-user / shard collection handles kept around
+USER_STYLES_HANDLE_CACHE = int(os.getenv("USER_STYLES_HANDLE_CACHE", 10000))
+# Buffer User_Styles inserts and write them as one batched add per collection every
+# USER_STYLES_FLUSH_MS or once USER_STYLES_FLUSH_MAX rows are pending
+USER_STYLES_WRITE_BEHIND = os.getenv("USER_STYLES_WRITE_BEHIND", "false").lower() == "true"
+USER_STYLES_FLUSH_MS = float(os.getenv("USER_STYLES_FLUSH_MS", 5))
+USER_STYLES_FLUSH_MAX = int(os.getenv("USER_STYLES_FLUSH_MAX", 256))
+USER_STYLES_STORAGE_MODES = ("shared", "sharded", "per_user")
 
-# Initialize embedding model
-EMBEDDING_MODEL = SentenceTransformer('all-MiniLM-L6-v2')
+# Initialize embedding model (torch or ONNX Runtime, see EMBEDDING_BACKEND); with a pool it lives in the pool processes
+EMBEDDING_MODEL = load_embedding_model() if EMBEDDING_POOL_WORKERS <= 0 else None
 
 # ChromaDB Collection Names - 3 collections total
 COLLECTION_USER_STYLES = "User_Styles"  # Combined: Order history + uploaded wardrobe
 COLLECTION_MYNTRA_CATALOG = "myntra202305041052"
 COLLECTION_CELEB_STYLES = "Celeb_FBI_Dataset"
 
+# Per-user wardrobe version, bumped on every add/remove/clear; part of the recommendation cache key
+_wardrobe_versions = {}
+_wardrobe_versions_lock = threading.Lock()
+_shared_wardrobe_versions = None
+_wardrobe_cache = WardrobeCache(WARDROBE_CACHE_USERS)
+
+def share_wardrobe_versions(slots: int):
+    """Keep wardrobe versions in shared memory so a bump in one forked worker invalidates the
+    caches of all of them. Call before forking. Users hash onto slots; a collision only costs a cache miss."""
+    global _shared_wardrobe_versions
+    _shared_wardrobe_versions = multiprocessing.Array('q', slots)
+
+def _wardrobe_version_slot(user_id: str):
+    return int(hashlib.sha1(str(user_id).encode("utf-8")).hexdigest()[:15], 16) % len(_shared_wardrobe_versions)
+
+def get_wardrobe_version(user_id: str):
+    if _shared_wardrobe_versions is not None:
+        return _shared_wardrobe_versions[_wardrobe_version_slot(user_id)]
+    with _wardrobe_versions_lock:
+        return _wardrobe_versions.get(user_id, 0)
+
+def bump_wardrobe_version(user_id: str):
+    if _shared_wardrobe_versions is not None:
+        slot = _wardrobe_version_slot(user_id)
+        with _shared_wardrobe_versions.get_lock():
+            _shared_wardrobe_versions[slot] += 1
+            version = _shared_wardrobe_versions[slot]
+    else:
+        with _wardrobe_versions_lock:
+            _wardrobe_versions[user_id] = _wardrobe_versions.get(user_id, 0) + 1
+            version = _wardrobe_versions[user_id]
+    _wardrobe_cache.invalidate(user_id)
+    return version
+
+USER_STYLES_PER_USER_PREFIX = f"{COLLECTION_USER_STYLES}_u_"
+
+def user_styles_shard_name(shard: int):
+    return f"{COLLECTION_USER_STYLES}_shard_{shard:03d}"
+
+def user_styles_collection_name(user_id: str, storage: str = None, shards: int = None):
+    """Collection holding user_id's style items under the given (default: configured) storage layout."""
+    storage = storage or USER_STYLES_STORAGE
+    digest = hashlib.sha1(str(user_id).encode("utf-8")).hexdigest()
+    if storage == "sharded":
+        return user_styles_shard_name(int(digest[:15], 16) % (shards or USER_STYLES_SHARDS))
+    if storage == "per_user":
+        return USER_STYLES_PER_USER_PREFIX + digest[:24]
+    return COLLECTION_USER_STYLES
+
+# Shard / per-user collection handles by name (LRU-bounded for per_user)
+USER_STYLE_COLLECTIONS = OrderedDict()
+_user_style_collections_lock = threading.Lock()
+
+def _remember_user_styles_collection(name, collection):
+    with _user_style_collections_lock:
+        USER_STYLE_COLLECTIONS[name] = collection
+        USER_STYLE_COLLECTIONS.move_to_end(name)
+        while len(USER_STYLE_COLLECTIONS) > max(USER_STYLES_HANDLE_CACHE, USER_STYLES_SHARDS):
+            USER_STYLE_COLLECTIONS.popitem(last=False)
+    return collection
+
+def get_user_styles_collection(user_id: str, create: bool = True):
+    """Route a user to their User_Styles collection. With create=False a missing per-user collection gives None.
+    create=False is the read path: the user's buffered inserts are flushed first (read-your-writes)."""
+    if not create and _write_buffer is not None and _write_buffer.has_unflushed(user_id):
+        _write_buffer.flush()
+    if USER_STYLES_STORAGE not in ("sharded", "per_user"):
+        return CHROMA_COLLECTIONS.get(COLLECTION_USER_STYLES)
+    name = user_styles_collection_name(user_id)
+    with _user_style_collections_lock:
+        collection = USER_STYLE_COLLECTIONS.get(name)
+        if collection is not None:
+            USER_STYLE_COLLECTIONS.move_to_end(name)
+            return collection
+    if CHROMA_CLIENT is None:
+        return None
+    if create:
+        collection = chroma_call("get_or_create_collection", CHROMA_CLIENT.get_or_create_collection, name=name)
+    else:
+        try:
+            # Not wrapped in chroma_call: a user without a collection yet is not a dependency error
+            collection = CHROMA_CLIENT.get_collection(name=name)
+        except Exception:
+            return None
+    return _remember_user_styles_collection(name, collection)
+
 def get_chroma_client():
-    """Returns the HTTP client to connect to the dedicated ChromaDB server."""
+    """Returns the ChromaDB client for the configured CHROMA_MODE (HTTP server or embedded)."""
+    if CHROMA_MODE == "persistent":
+        try:
+            client = chromadb.PersistentClient(path=CHROMA_PERSIST_DIR)
+            client.list_collections()
+            logger.info("Using embedded ChromaDB persisted at %s", CHROMA_PERSIST_DIR)
+            return client
+        except Exception as e:
+            logger.error("Error opening embedded ChromaDB at %s: %s", CHROMA_PERSIST_DIR, e)
+            return None
+
+    if CHROMA_MODE == "ephemeral":
+        try:
+            client = chromadb.EphemeralClient()
+            logger.info("Using in-memory (ephemeral) ChromaDB")
+            return client
+        except Exception as e:
+            logger.error("Error creating ephemeral ChromaDB client: %s", e)
+            return None
+
     try:
         client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
         client.list_collections() 
         return client
     except Exception as e:
-        print(f"Error connecting to ChromaDB server at {CHROMA_HOST}:{CHROMA_PORT}. Ensure the server is running.")
-        print(f"Error details: {e}")
+        logger.error("Error connecting to ChromaDB server at %s:%s. Ensure the server is running. Error details: %s",
+                     CHROMA_HOST, CHROMA_PORT, e)
         return None
 
 def setup_collections(client):
     """Creates the necessary collections if they don't exist."""
-    if not client:
-        return {}
     if not client:
         return {}
     collections = {}
     collections[COLLECTION_USER_STYLES] = client.get_or_create_collection(name=COLLECTION_USER_STYLES)
     collections[COLLECTION_MYNTRA_CATALOG] = client.get_or_create_collection(name=COLLECTION_MYNTRA_CATALOG)
     collections[COLLECTION_CELEB_STYLES] = client.get_or_create_collection(name=COLLECTION_CELEB_STYLES)
-    print("ChromaDB collections verified/created successfully.")
+    if USER_STYLES_STORAGE not in USER_STYLES_STORAGE_MODES:
+        logger.warning("Unknown USER_STYLES_STORAGE %s, using shared", USER_STYLES_STORAGE)
+    if USER_STYLES_STORAGE == "sharded":
+        for shard in range(USER_STYLES_SHARDS):
+            name = user_styles_shard_name(shard)
+            _remember_user_styles_collection(name, client.get_or_create_collection(name=name))
+    logger.info("ChromaDB collections verified/created successfully.", extra={'user_styles_storage': USER_STYLES_STORAGE})
     return collections
 
+_chroma_breaker = get_breaker("chroma")
+
+def chroma_call(operation, fn, *args, **kwargs):
+    """Invoke a ChromaDB client/collection method with latency and error metrics, failing fast
+    (CircuitOpenError) while the chroma breaker is open."""
+    return _chroma_breaker.call(_tracked_chroma_call, operation, fn, *args, **kwargs)
+
+def _tracked_chroma_call(operation, fn, *args, **kwargs):
+    with track_dependency("chroma", operation):
+        return fn(*args, **kwargs)
+
+def _encode_texts(texts, batch_size=64):
+    """Encode in the embedding pool processes when enabled, otherwise with the in-process model."""
+    if EMBEDDING_POOL_WORKERS > 0:
+        return get_embedding_pool().encode(texts)
+    return EMBEDDING_MODEL.encode(texts, batch_size=batch_size)
+
+_embedding_flight = SingleFlight("embedding")
+_embedding_batcher = MicroBatcher(
+    "embedding",
+    lambda texts: _encode_texts(texts, batch_size=len(texts)).tolist(),
+    max_batch_size=EMBEDDING_MAX_BATCH,
+    window_ms=EMBEDDING_BATCH_WINDOW_MS
+)
+
 def create_embedding(text):
     """Create embedding for given text."""
+    return _embedding_flight.do(text, _create_embedding, text)
+
+def _create_embedding(text):
     try:
-        return EMBEDDING_MODEL.encode(text).tolist()
+        with track_dependency("embedding", "encode"):
+            if EMBEDDING_BATCHING:
+                return _embedding_batcher.submit(text)
+            return _encode_texts([text])[0].tolist()
     except Exception as e:
-        print(f"Error creating embedding: {e}")
+        logger.error("Error creating embedding: %s", e)
+        return None
+
+def create_embeddings(texts, batch_size=64):
+    """Create embeddings for a list of texts in batched encode calls."""
+    try:
+        with track_dependency("embedding", "encode_batch"):
+            return _encode_texts(list(texts), batch_size=batch_size).tolist()
+    except Exception as e:
+        logger.error("Error creating embeddings: %s", e)
         return None
 
 def process_and_add_item(collection, text, metadata, item_id):
@@ -55,7 +245,7 @@ def process_and_add_item(collection, text, metadata, item_id):
     try:
         embedding = create_embedding(text)
         if embedding:
-            collection.add(
+            chroma_call("add", collection.add,
                 embeddings=[embedding],
                 documents=[text],
                 metadatas=[metadata],
@@ -63,18 +253,18 @@ def process_and_add_item(collection, text, metadata, item_id):
             )
             return True
     except Exception as e:
-        print(f"Error adding item to collection: {e}")
+        logger.error("Error adding item to collection: %s", e)
     return False
 
 def get_user_orders_count(user_id):
     """Get count of existing user order history items."""
     try:
-        if COLLECTION_USER_STYLES not in CHROMA_COLLECTIONS:
+        collection = get_user_styles_collection(user_id, create=False)
+        if collection is None:
             return 0
-        collection = CHROMA_COLLECTIONS[COLLECTION_USER_STYLES]
         
         # Get all user items and count purchase_history manually
-        results = collection.get(where={"user_id": user_id})
+        results = chroma_call("get", collection.get, where={"user_id": user_id})
         
         if not results['metadatas']:
             return 0
@@ -86,21 +276,137 @@ def get_user_orders_count(user_id):
         return purchase_history_count
         
     except Exception as e:
-        print(f"Error getting user orders count: {e}")
+        logger.error("Error getting user orders count: %s", e)
         return 0
 
+class UserStylesWriteBuffer:
+    """Write-behind buffer for User_Styles inserts. Rows are written by a flusher thread as one
+    batched add per collection; a reader of a user with unflushed rows flushes before reading.
+    Each add returns a future resolved once its row is written (True) or dropped (False), and the
+    user's wardrobe version is bumped only after the write, so no worker caches a pre-write wardrobe."""
+
+    def __init__(self, flush_ms, max_items):
+        self.flush_interval = max(flush_ms, 0) / 1000.0
+        self.max_items = max(max_items, 1)
+        self._pending = []
+        self._unflushed = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_flusher(self):
+        # Started lazily, and again in a forked worker where the parent's thread no longer exists
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="user-styles-flusher", daemon=True)
+                self._thread.start()
+
+    def add(self, collection, user_id, item_id, embedding, document, metadata):
+        self._ensure_flusher()
+        written = Future()
+        with self._lock:
+            self._pending.append((collection, user_id, item_id, embedding, document, metadata, written))
+            self._unflushed[user_id] = self._unflushed.get(user_id, 0) + 1
+            full = len(self._pending) >= self.max_items
+        if full:
+            self.flush()
+        else:
+            self._wakeup.set()
+        return written
+
+    def has_unflushed(self, user_id):
+        with self._lock:
+            return self._unflushed.get(user_id, 0) > 0
+
+    def flush(self):
+        """Write every pending row; returns once rows buffered before the call are in Chroma (or failed)."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+            record_microbatch("user_styles_writes", len(rows))
+            groups = {}
+            for row in rows:
+                groups.setdefault(row[0].name, []).append(row)
+            written = set()
+            try:
+                for group in groups.values():
+                    written.update(self._write(group))
+            finally:
+                for user_id in {row[1] for row in rows if row[2] in written}:
+                    bump_wardrobe_version(user_id)
+                for row in rows:
+                    row[6].set_result(row[2] in written)
+                with self._lock:
+                    for row in rows:
+                        remaining = self._unflushed.get(row[1], 0) - 1
+                        if remaining > 0:
+                            self._unflushed[row[1]] = remaining
+                        else:
+                            self._unflushed.pop(row[1], None)
+            return len(rows)
+
+    def _write(self, group):
+        """Ids of the rows that made it into the collection."""
+        collection = group[0][0]
+        try:
+            chroma_call("add", collection.add,
+                ids=[row[2] for row in group],
+                embeddings=[row[3] for row in group],
+                documents=[row[4] for row in group],
+                metadatas=[row[5] for row in group]
+            )
+            return [row[2] for row in group]
+        except Exception as e:
+            # Retry row by row so one bad row does not drop the whole batch
+            logger.error("Batched User_Styles add failed, retrying %d rows individually: %s", len(group), e)
+            written = []
+            for _, user_id, item_id, embedding, document, metadata, _ in group:
+                try:
+                    chroma_call("add", collection.add, ids=[item_id], embeddings=[embedding],
+                                documents=[document], metadatas=[metadata])
+                    written.append(item_id)
+                except Exception as row_error:
+                    logger.error("Dropped buffered User_Styles item %s: %s", item_id, row_error, extra={'user_id': user_id})
+            return written
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            time.sleep(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Error flushing User_Styles write buffer: %s", e)
+
+_write_buffer = UserStylesWriteBuffer(USER_STYLES_FLUSH_MS, USER_STYLES_FLUSH_MAX) if USER_STYLES_WRITE_BEHIND else None
+
+def flush_user_styles():
+    """Write any buffered User_Styles inserts now (called on shutdown)."""
+    if _write_buffer is not None:
+        _write_buffer.flush()
+
+atexit.register(flush_user_styles)
+
 def add_user_style_item(user_id: str, description: str, source_type: str, metadata: dict = None):
     """Add a user's style item to the unified collection."""
     try:
-        if COLLECTION_USER_STYLES not in CHROMA_COLLECTIONS:
-            print(f"User_Styles collection not available in CHROMA_COLLECTIONS")
+        collection = get_user_styles_collection(user_id)
+        if collection is None:
+            logger.error("User_Styles collection not available for user %s", user_id)
             return False
-            
-        collection = CHROMA_COLLECTIONS[COLLECTION_USER_STYLES]
+
         embedding = create_embedding(description)
         
         if not embedding:
-            print(f"Failed to create embedding for description: {description[:100]}...")
+            logger.error("Failed to create embedding for description", extra={'user_id': user_id, 'description': description[:100]})
             return False
         
         # Create metadata with user_id and source type
@@ -117,42 +423,71 @@ def add_user_style_item(user_id: str, description: str, source_type: str, metada
         unique_id = str(uuid.uuid4())
         item_id = f"{user_id}_{source_type}_{unique_id}"
         
-        collection.add(
-            embeddings=[embedding],
-            documents=[description],
-            metadatas=[item_metadata],
-            ids=[item_id]
-        )
+        if _write_buffer is not None:
+            # Concurrent uploads share the flush; wait for ours so a dropped row is reported as a failure
+            if not _write_buffer.add(collection, user_id, item_id, embedding, description, item_metadata).result():
+                return False
+        else:
+            chroma_call("add", collection.add,
+                embeddings=[embedding],
+                documents=[description],
+                metadatas=[item_metadata],
+                ids=[item_id]
+            )
+            bump_wardrobe_version(user_id)
         
         return True
         
     except Exception as e:
-        print(f"Error adding user style item: {e}")
-        print(f"User ID: {user_id}, Source: {source_type}")
-        print(f"Description: {description[:100]}...")
+        logger.error("Error adding user style item: %s", e,
+                     extra={'user_id': user_id, 'source': source_type, 'description': description[:100]})
         return False
 
 def get_user_style_count(user_id: str):
     """Get count of user's style items."""
     try:
-        if COLLECTION_USER_STYLES not in CHROMA_COLLECTIONS:
+        collection = get_user_styles_collection(user_id, create=False)
+        if collection is None:
             return 0
-        collection = CHROMA_COLLECTIONS[COLLECTION_USER_STYLES]
-        results = collection.get(where={"user_id": user_id})
+        results = chroma_call("get", collection.get, where={"user_id": user_id})
         return len(results['ids']) if results['ids'] else 0
     except Exception as e:
-        print(f"Error getting user style count: {e}")
+        logger.error("Error getting user style count: %s", e)
         return 0
 
+def _load_user_wardrobe(user_id: str):
+    try:
+        collection = get_user_styles_collection(user_id, create=False)
+        if collection is None:
+            return WardrobeMatrix([], [], [], [])
+        results = chroma_call("get", collection.get, where={"user_id": user_id},
+                              include=['embeddings', 'documents', 'metadatas'])
+        embeddings = results.get('embeddings')
+        return WardrobeMatrix(
+            results['ids'],
+            embeddings if embeddings is not None else [],
+            results.get('documents') or [],
+            results.get('metadatas') or []
+        )
+    except Exception as e:
+        logger.error("Error loading wardrobe for user %s: %s", user_id, e)
+        return None
+
+def get_user_wardrobe_matrix(user_id: str):
+    """The user's wardrobe as an in-memory matrix (LRU-cached per user), or None when the cache is disabled."""
+    if not _wardrobe_cache.enabled:
+        return None
+    return _wardrobe_cache.get(user_id, get_wardrobe_version(user_id), _load_user_wardrobe)
+
 def get_user_items_by_source(user_id: str, source_type: str):
     """Get user's items filtered by source type."""
     try:
-        if COLLECTION_USER_STYLES not in CHROMA_COLLECTIONS:
+        collection = get_user_styles_collection(user_id, create=False)
+        if collection is None:
             return []
-        collection = CHROMA_COLLECTIONS[COLLECTION_USER_STYLES]
         
         # Get all user items first, then filter by source
-        results = collection.get(where={"user_id": user_id})
+        results = chroma_call("get", collection.get, where={"user_id": user_id})
         
         if not results['ids']:
             return []
@@ -167,22 +502,21 @@ def get_user_items_by_source(user_id: str, source_type: str):
         return filtered_ids
         
     except Exception as e:
-        print(f"Error getting user items by source: {e}")
+        logger.error("Error getting user items by source: %s", e)
         return []
 
 def search_user_styles(user_id: str, query: str, n_results: int = 10):
     """Search through user's style items."""
     try:
-        if COLLECTION_USER_STYLES not in CHROMA_COLLECTIONS:
+        collection = get_user_styles_collection(user_id, create=False)
+        if collection is None:
             return []
-        
-        collection = CHROMA_COLLECTIONS[COLLECTION_USER_STYLES]
         query_embedding = create_embedding(query)
         
         if not query_embedding:
             return []
         
-        results = collection.query(
+        results = chroma_call("query", collection.query,
             query_embeddings=[query_embedding],
             where={"user_id": user_id},
             n_results=n_results,
@@ -192,7 +526,7 @@ def search_user_styles(user_id: str, query: str, n_results: int = 10):
         return results
         
     except Exception as e:
-        print(f"Error searching user styles: {e}")
+        logger.error("Error searching user styles: %s", e)
         return []
 
 def search_products(query: str, n_results: int = 10):
@@ -207,7 +541,11 @@ def search_products(query: str, n_results: int = 10):
         if not query_embedding:
             return []
         
-        results = collection.query(
+        catalog_index = get_catalog_index(collection)
+        if catalog_index:
+            return catalog_index.search(collection, query_embedding, n_results=n_results)
+        
+        results = chroma_call("query", collection.query,
             query_embeddings=[query_embedding],
             n_results=n_results,
             include=['documents', 'metadatas', 'distances']
@@ -216,7 +554,7 @@ def search_products(query: str, n_results: int = 10):
         return results
         
     except Exception as e:
-        print(f"Error searching products: {e}")
+        logger.error("Error searching products: %s", e)
         return []
 
 def search_celebrity_styles(query: str, n_results: int = 10):
@@ -231,7 +569,7 @@ def search_celebrity_styles(query: str, n_results: int = 10):
         if not query_embedding:
             return []
         
-        results = collection.query(
+        results = chroma_call("query", collection.query,
             query_embeddings=[query_embedding],
             n_results=n_results,
             include=['documents', 'metadatas', 'distances']
@@ -240,64 +578,64 @@ def search_celebrity_styles(query: str, n_results: int = 10):
         return results
         
     except Exception as e:
-        print(f"Error searching celebrity styles: {e}")
+        logger.error("Error searching celebrity styles: %s", e)
         return []
 
 def remove_user_style_item(user_id: str, item_id: str):
     """Remove a specific user style item."""
     try:
-        if COLLECTION_USER_STYLES not in CHROMA_COLLECTIONS:
+        collection = get_user_styles_collection(user_id, create=False)
+        if collection is None:
             return False
         
-        collection = CHROMA_COLLECTIONS[COLLECTION_USER_STYLES]
-        
         # First verify the item belongs to the user
-        existing_item = collection.get(ids=[item_id])
+        existing_item = chroma_call("get", collection.get, ids=[item_id])
         
         if not existing_item['ids'] or len(existing_item['ids']) == 0:
-            print(f"Item {item_id} not found")
+            logger.warning("Item %s not found", item_id)
             return False
             
         # Check if item belongs to the user
         if existing_item['metadatas'][0]['user_id'] != user_id:
-            print(f"Item {item_id} does not belong to user {user_id}")
+            logger.warning("Item %s does not belong to user %s", item_id, user_id)
             return False
         
         # Remove the item
-        collection.delete(ids=[item_id])
+        chroma_call("delete", collection.delete, ids=[item_id])
+        bump_wardrobe_version(user_id)
         return True
         
     except Exception as e:
-        print(f"Error removing user style item: {e}")
+        logger.error("Error removing user style item: %s", e)
         return False
 
 def clear_user_styles(user_id: str, source_type: str = None):
     """Clear all user style items or items of specific source type."""
     try:
-        if COLLECTION_USER_STYLES not in CHROMA_COLLECTIONS:
+        collection = get_user_styles_collection(user_id, create=False)
+        if collection is None:
             return False
         
-        collection = CHROMA_COLLECTIONS[COLLECTION_USER_STYLES]
-        
         # Build where clause
         where_clause = {"user_id": user_id}
         if source_type:
             where_clause["source"] = source_type
         
         # Get all matching items
-        results = collection.get(where=where_clause)
+        results = chroma_call("get", collection.get, where=where_clause)
         
         if results['ids'] and len(results['ids']) > 0:
             # Delete all matching items
-            collection.delete(ids=results['ids'])
-            print(f"Cleared {len(results['ids'])} items for user {user_id}" + (f" with source {source_type}" if source_type else ""))
+            chroma_call("delete", collection.delete, ids=results['ids'])
+            bump_wardrobe_version(user_id)
+            logger.info("Cleared %d items for user %s", len(results['ids']), user_id, extra={'source': source_type})
             return True
         else:
-            print(f"No items found to clear for user {user_id}" + (f" with source {source_type}" if source_type else ""))
+            logger.info("No items found to clear for user %s", user_id, extra={'source': source_type})
             return False
             
     except Exception as e:
-        print(f"Error clearing user styles: {e}")
+        logger.error("Error clearing user styles: %s", e)
         return False
 
 def get_collection_stats():
@@ -306,13 +644,22 @@ def get_collection_stats():
     try:
         for collection_name, collection in CHROMA_COLLECTIONS.items():
             try:
-                count = collection.count()
+                count = chroma_call("count", collection.count)
                 stats[collection_name] = count
             except Exception as e:
-                print(f"Error getting stats for {collection_name}: {e}")
+                logger.error("Error getting stats for %s: %s", collection_name, e)
                 stats[collection_name] = 0
+        if USER_STYLES_STORAGE == "sharded":
+            with _user_style_collections_lock:
+                shards = list(USER_STYLE_COLLECTIONS.items())
+            for name, collection in shards:
+                try:
+                    stats[name] = chroma_call("count", collection.count)
+                except Exception as e:
+                    logger.error("Error getting stats for %s: %s", name, e)
+                    stats[name] = 0
     except Exception as e:
-        print(f"Error getting collection stats: {e}")
+        logger.error("Error getting collection stats: %s", e)
     
     return stats
 
@@ -323,7 +670,7 @@ def health_check():
             return {"status": "error", "message": "ChromaDB client not connected"}
         
         # Test connection
-        collections_list = CHROMA_CLIENT.list_collections()
+        collections_list = chroma_call("list_collections", CHROMA_CLIENT.list_collections)
         
         # Get collection stats
         stats = get_collection_stats()
@@ -338,6 +685,18 @@ def health_check():
     except Exception as e:
         return {"status": "error", "message": f"Health check failed: {e}"}
 
+def reconnect_chroma():
+    """Open a fresh client and collection handles, e.g. in a worker forked from a preloaded parent.
+    CHROMA_COLLECTIONS is refilled in place because other modules import it by name."""
+    global CHROMA_CLIENT
+    CHROMA_CLIENT = get_chroma_client()
+    with _user_style_collections_lock:
+        USER_STYLE_COLLECTIONS.clear()
+    collections = setup_collections(CHROMA_CLIENT) if CHROMA_CLIENT else {}
+    CHROMA_COLLECTIONS.clear()
+    CHROMA_COLLECTIONS.update(collections)
+    return CHROMA_CLIENT
+
 # Global client variable
 CHROMA_CLIENT = get_chroma_client()
 CHROMA_COLLECTIONS = setup_collections(CHROMA_CLIENT) if CHROMA_CLIENT else {}
\ No newline at end of file
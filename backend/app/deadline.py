@@ -0,0 +1,126 @@
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from .metrics import record_deadline_event
+from .tracing import profiled
+
+load_dotenv()
+
+# End-to-end budget for one /recommend; stages past it use their fallbacks. 0 disables
+RECOMMEND_BUDGET_SECONDS = float(os.getenv("RECOMMEND_BUDGET_SECONDS", 20))
+# Upper bound for any single Gemini / weather call, inside or outside a request budget. 0 means no per-call cap
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 30))
+WEATHER_TIMEOUT_SECONDS = float(os.getenv("WEATHER_TIMEOUT_SECONDS", 5))
+# Send a duplicate Gemini text call once the first has run longer than this percentile of recent calls
+HEDGE_LLM_CALLS = os.getenv("HEDGE_LLM_CALLS", "false").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", 95))
+HEDGE_MIN_SAMPLES = 20
+# Threads running budgeted calls (and singleflight followers waiting on them); size it above the peak
+# number of concurrent Gemini / weather calls (request threads x 2 with hedging) so calls never queue
+DEADLINE_POOL_SIZE = int(os.getenv("DEADLINE_POOL_SIZE", 128))
+LATENCY_WINDOW = 200
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+class BudgetExhausted(DeadlineExceeded):
+    """Raised without calling the dependency at all: the request had no time left for it."""
+
+_deadline = contextvars.ContextVar("stylesense_deadline", default=None)
+_executor = ThreadPoolExecutor(max_workers=DEADLINE_POOL_SIZE, thread_name_prefix="deadline")
+
+@contextmanager
+def request_deadline(budget_seconds=RECOMMEND_BUDGET_SECONDS):
+    """Set the deadline every call inside the block is bounded by (propagates with the context)."""
+    token = _deadline.set(time.monotonic() + budget_seconds if budget_seconds > 0 else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining_seconds():
+    """Seconds left in the current request budget, or None outside a budget."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+def time_budget(cap=None):
+    """Timeout for the next call: the smaller of cap and the remaining request budget (None if neither).
+    A cap of 0 or less means uncapped."""
+    if cap is not None and cap <= 0:
+        cap = None
+    remaining = remaining_seconds()
+    if remaining is None:
+        return cap
+    return remaining if cap is None else min(cap, remaining)
+
+class _LatencyWindow:
+    def __init__(self):
+        self._samples = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct):
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100.0))]
+
+_latencies = {}
+_latencies_lock = threading.Lock()
+
+def _latency_window(name):
+    with _latencies_lock:
+        if name not in _latencies:
+            _latencies[name] = _LatencyWindow()
+        return _latencies[name]
+
+def run_with_deadline(name, fn, *args, cap=None, hedge_fn=None, **kwargs):
+    """Run fn(*args, **kwargs) within the request budget and cap, raising DeadlineExceeded when time runs out.
+    With hedge_fn, a duplicate hedge_fn(*args, **kwargs) starts once the call outlives the recent p95 and the
+    first to succeed wins. Abandoned calls finish in the background; their results are dropped."""
+    timeout = time_budget(cap)
+    if timeout is not None and timeout <= 0:
+        record_deadline_event(name, "skipped")
+        raise BudgetExhausted(f"No time left in the request budget for {name}")
+    hedge_after = _latency_window(name).percentile(HEDGE_PERCENTILE) if hedge_fn and HEDGE_LLM_CALLS else None
+    if timeout is None and hedge_after is None:
+        return fn(*args, **kwargs)
+
+    start = time.monotonic()
+    end = start + timeout if timeout is not None else None
+    hedge_at = start + hedge_after if hedge_after is not None else None
+    futures = {_executor.submit(contextvars.copy_context().run, profiled, fn, *args, **kwargs): "primary"}
+    error = None
+    while futures:
+        wake = [t for t in (end, hedge_at) if t is not None]
+        done, _ = wait(list(futures), timeout=max(min(wake) - time.monotonic(), 0) if wake else None,
+                       return_when=FIRST_COMPLETED)
+        for future in done:
+            role = futures.pop(future)
+            if future.exception() is not None:
+                error = future.exception()
+                continue
+            _latency_window(name).add(time.monotonic() - start)
+            if role == "hedge":
+                record_deadline_event(name, "hedge_won")
+            return future.result()
+        if done:
+            continue
+        now = time.monotonic()
+        if hedge_at is not None and now >= hedge_at and (end is None or now < end):
+            record_deadline_event(name, "hedged")
+            futures[_executor.submit(contextvars.copy_context().run, profiled, hedge_fn, *args, **kwargs)] = "hedge"
+            hedge_at = None
+        elif end is not None and now >= end:
+            record_deadline_event(name, "timeout")
+            raise DeadlineExceeded(f"{name} did not finish within {timeout:.2f}s")
+    raise error
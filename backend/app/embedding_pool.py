@@ -0,0 +1,177 @@
+import atexit
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from dotenv import load_dotenv
+from .embeddings import EMBEDDING_DIM, load_embedding_model, set_torch_threads, EMBEDDING_THREADS
+from .log import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Embedding processes per web worker; 0 encodes in the web process itself
+EMBEDDING_POOL_WORKERS = int(os.getenv("EMBEDDING_POOL_WORKERS", 0))
+# Most texts one pool request carries (size of a shared-memory result slot)
+EMBEDDING_POOL_MAX_BATCH = int(os.getenv("EMBEDDING_POOL_MAX_BATCH", 64))
+EMBEDDING_POOL_TIMEOUT = float(os.getenv("EMBEDDING_POOL_TIMEOUT", 30))
+
+def _pool_worker(shm_name, shape, requests, events, status, generations, threads):
+    """Pool process: encode texts from the request queue straight into this request's shared-memory slot.
+    A request whose slot generation has moved on (it timed out and the slot was reused) is dropped."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Spawned children share the parent's resource tracker, so the parent's unlink covers this attachment
+    shm = SharedMemory(name=shm_name)
+    results = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+    set_torch_threads(threads)
+    model = load_embedding_model(threads=threads)
+    try:
+        while True:
+            request = requests.get()
+            if request is None:
+                break
+            slot, generation, texts = request
+            if generations[slot] != generation:
+                continue
+            try:
+                vectors, count = model.encode(texts, batch_size=len(texts)), len(texts)
+            except Exception as e:
+                logger.error("Embedding pool encode failed: %s", e, extra={'texts': len(texts)})
+                vectors, count = None, -1
+            # Write under the generation lock so a late result never lands in the slot's next request
+            with generations.get_lock():
+                if generations[slot] != generation:
+                    continue
+                if vectors is not None:
+                    results[slot, :count] = vectors
+                status[slot] = count
+                events[slot].set()
+    finally:
+        del results
+        shm.close()
+
+class EmbeddingPool:
+    """Dedicated embedding processes. Texts go over a queue; vectors come back through per-request
+    shared-memory slots, so results are never pickled and encoding never holds the web process's GIL."""
+
+    def __init__(self, workers, max_batch=EMBEDDING_POOL_MAX_BATCH, dim=EMBEDDING_DIM, timeout=EMBEDDING_POOL_TIMEOUT):
+        self.workers = workers
+        self.max_batch = max_batch
+        self.dim = dim
+        self.timeout = timeout
+        self.slots = workers * 2
+        self._context = multiprocessing.get_context("spawn")
+        self._shape = (self.slots, max_batch, dim)
+        self._shm = SharedMemory(create=True, size=int(np.prod(self._shape)) * 4)
+        self._results = np.ndarray(self._shape, dtype=np.float32, buffer=self._shm.buf)
+        self._requests = self._context.Queue()
+        self._events = [self._context.Event() for _ in range(self.slots)]
+        self._status = self._context.Array('i', self.slots, lock=False)
+        # Bumped whenever a slot is handed out or abandoned; results for an older generation are discarded
+        self._generations = self._context.Array('i', self.slots)
+        self._free = queue.Queue()
+        for slot in range(self.slots):
+            self._free.put(slot)
+        self._threads = EMBEDDING_THREADS or max(1, (os.cpu_count() or 1) // workers)
+        self._processes = []
+        self._lock = threading.Lock()
+        self.pid = os.getpid()
+
+    def start(self):
+        with self._lock:
+            self._processes = [process for process in self._processes if process.is_alive()]
+            while len(self._processes) < self.workers:
+                process = self._context.Process(
+                    target=_pool_worker,
+                    args=(self._shm.name, self._shape, self._requests, self._events, self._status,
+                          self._generations, self._threads),
+                    name="embedding-pool",
+                    daemon=True
+                )
+                process.start()
+                self._processes.append(process)
+        logger.info("Embedding pool running", extra={'workers': self.workers, 'threads_per_worker': self._threads})
+        return self
+
+    def _submit(self, texts):
+        slot = self._free.get(timeout=self.timeout)
+        with self._generations.get_lock():
+            self._generations[slot] += 1
+            generation = self._generations[slot]
+            self._events[slot].clear()
+            self._status[slot] = 0
+        self._requests.put((slot, generation, list(texts)))
+        return slot
+
+    def _collect(self, slot, count):
+        if not self._events[slot].wait(self.timeout):
+            # Abandon this generation so a late result is dropped, and the slot can be reused right away
+            with self._generations.get_lock():
+                self._generations[slot] += 1
+            self._free.put(slot)
+            if any(not process.is_alive() for process in self._processes):
+                self.start()
+            raise TimeoutError(f"Embedding pool did not answer within {self.timeout}s")
+        try:
+            if self._status[slot] != count:
+                raise RuntimeError("Embedding pool failed to encode batch")
+            return self._results[slot, :count].copy()
+        finally:
+            self._free.put(slot)
+
+    def encode(self, texts):
+        """(len(texts), dim) float32 vectors; larger inputs are split into slot-sized chunks spread over the pool."""
+        texts = list(texts)
+        chunks = [texts[i:i + self.max_batch] for i in range(0, len(texts), self.max_batch)]
+        vectors = []
+        # At most one chunk per worker in flight, so a large call never holds every slot while waiting
+        for start in range(0, len(chunks), self.workers):
+            group = chunks[start:start + self.workers]
+            slots = [self._submit(chunk) for chunk in group]
+            error = None
+            for slot, chunk in zip(slots, group):
+                try:
+                    vectors.append(self._collect(slot, len(chunk)))
+                except Exception as e:
+                    error = error or e
+            if error is not None:
+                raise error
+        return np.vstack(vectors) if vectors else np.zeros((0, self.dim), dtype=np.float32)
+
+    def close(self):
+        with self._lock:
+            for _ in self._processes:
+                self._requests.put(None)
+            for process in self._processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            self._processes = []
+        del self._results
+        self._shm.close()
+        self._shm.unlink()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_embedding_pool():
+    """This process's pool, started on first use (a forked web worker starts its own)."""
+    global _pool
+    if _pool is None or _pool.pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                _pool = EmbeddingPool(EMBEDDING_POOL_WORKERS).start()
+    return _pool
+
+def shutdown_embedding_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.close()
+        _pool = None
+
+atexit.register(shutdown_embedding_pool)
@@ -0,0 +1,87 @@
+import os
+import platform
+from dotenv import load_dotenv
+from sentence_transformers import SentenceTransformer
+from .log import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384
+# torch (PyTorch), onnx (ONNX Runtime, fp32) or onnx-int8 (ONNX Runtime, dynamically quantised to int8)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+# ONNX file inside the model repo to load instead of the default for the backend, e.g. onnx/model_O3.onnx
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "")
+# Intra-op threads per process; 0 splits the cores evenly between WEB_CONCURRENCY workers
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", 0))
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+def embedding_threads(workers=None):
+    workers = workers or int(os.getenv("WEB_CONCURRENCY", 1))
+    return EMBEDDING_THREADS or max(1, (os.cpu_count() or 1) // max(workers, 1))
+
+def _cpu_flags():
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+def default_onnx_file(backend):
+    """ONNX export shipped with the model: fp32, or the int8 build matching this CPU's instruction set."""
+    if backend == "onnx":
+        return "onnx/model.onnx"
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return "onnx/model_qint8_arm64.onnx"
+    flags = _cpu_flags()
+    if "avx512_vnni" in flags:
+        return "onnx/model_qint8_avx512_vnni.onnx"
+    if "avx512f" in flags:
+        return "onnx/model_qint8_avx512.onnx"
+    return "onnx/model_quint8_avx2.onnx"
+
+def set_torch_threads(threads):
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+def _onnx_session_options(threads=None):
+    import onnxruntime
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = threads or embedding_threads()
+    return options
+
+def load_embedding_model(backend=None, threads=None, strict=False):
+    """MiniLM SentenceTransformer on the requested backend; falls back to torch if ONNX Runtime is unavailable,
+    or raises RuntimeError with strict=True (for tools whose results depend on the backend).
+    All backends share the tokenizer, mean pooling and normalisation, so vectors stay comparable."""
+    backend = (backend or EMBEDDING_BACKEND).lower()
+    if backend not in EMBEDDING_BACKENDS:
+        if strict:
+            raise RuntimeError(f"Unknown embedding backend {backend}; expected one of {', '.join(EMBEDDING_BACKENDS)}")
+        logger.warning("Unknown EMBEDDING_BACKEND %s, using torch", backend)
+        backend = "torch"
+    if backend != "torch":
+        file_name = EMBEDDING_ONNX_FILE or default_onnx_file(backend)
+        try:
+            model = SentenceTransformer(EMBEDDING_MODEL_NAME, backend="onnx", model_kwargs={
+                "file_name": file_name,
+                "provider": "CPUExecutionProvider",
+                "session_options": _onnx_session_options(threads)
+            })
+            logger.info("Loaded %s embedding model with ONNX Runtime", EMBEDDING_MODEL_NAME,
+                        extra={'backend': backend, 'onnx_file': file_name})
+            return model
+        except Exception as e:
+            if strict:
+                raise RuntimeError(f"Could not load the {backend} embedding backend ({e}); "
+                                   "install it with `pip install -r requirements-onnx.txt`") from e
+            logger.error("Could not load %s embedding backend (%s); falling back to torch", backend, e)
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
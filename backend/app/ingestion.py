@@ -0,0 +1,179 @@
+import multiprocessing
+import threading
+import time
+from contextlib import contextmanager
+
+# Collection ingestion states; anything other than pending/running counts as ready to serve
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_READY = "ready"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+STATUSES = (STATUS_PENDING, STATUS_RUNNING, STATUS_READY, STATUS_SKIPPED, STATUS_FAILED)
+MESSAGE_BYTES = 256
+
+class CollectionProgress:
+    """Thread-safe progress for one ingestion stage (replaces the tqdm bars)."""
+
+    def __init__(self, name, total=0):
+        self.name = name
+        self.total = total
+        self.done = 0
+        self.status = STATUS_PENDING
+        self.message = ""
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def start(self, total=None):
+        with self._lock:
+            if total is not None:
+                self.total = total
+            self.done = 0
+            self.status = STATUS_RUNNING
+            self.started_at = time.time()
+            self.finished_at = None
+
+    def update(self, n=1):
+        with self._lock:
+            self.done += n
+
+    def finish(self, status=STATUS_READY, message=""):
+        with self._lock:
+            self.status = status
+            self.message = message
+            self.finished_at = time.time()
+
+    def to_dict(self):
+        with self._lock:
+            elapsed = ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0
+            rate = self.done / elapsed if elapsed > 0 else 0.0
+            remaining = max(self.total - self.done, 0)
+            eta = remaining / rate if rate > 0 and self.status == STATUS_RUNNING else None
+            return {
+                "status": self.status,
+                "done": self.done,
+                "total": self.total,
+                "percent": round(100.0 * self.done / self.total, 1) if self.total else None,
+                "rows_per_second": round(rate, 2),
+                "eta_seconds": round(eta, 1) if eta is not None else None,
+                "elapsed_seconds": round(elapsed, 1),
+                "message": self.message
+            }
+
+def _timestamp(value):
+    return value or None
+
+def _shared_field(index, cast):
+    def get(self):
+        return cast(self._values[index])
+    def set(self, value):
+        self._values[index] = value or 0
+    return property(get, set)
+
+class SharedCollectionProgress(CollectionProgress):
+    """Progress kept in shared memory, so the ingestion process and every web worker forked
+    after share_ingestion_progress see the same state."""
+
+    done = _shared_field(1, int)
+    total = _shared_field(2, int)
+    started_at = _shared_field(3, _timestamp)
+    finished_at = _shared_field(4, _timestamp)
+
+    def __init__(self, name, total=0):
+        # status index, done, total, started_at, finished_at
+        self._values = multiprocessing.Array('d', 5)
+        self._message = multiprocessing.Array('c', MESSAGE_BYTES)
+        super().__init__(name, total)
+        self._lock = self._values.get_lock()
+
+    @property
+    def status(self):
+        return STATUSES[int(self._values[0])]
+
+    @status.setter
+    def status(self, value):
+        self._values[0] = STATUSES.index(value)
+
+    @property
+    def message(self):
+        return self._message.value.decode("utf-8", "ignore")
+
+    @message.setter
+    def message(self, value):
+        self._message.value = (value or "").encode("utf-8")[:MESSAGE_BYTES - 1]
+
+_PROGRESS = {}
+_PROGRESS_LOCK = threading.Lock()
+
+def share_ingestion_progress(collection_names):
+    """Keep these collections' progress in shared memory. Call before forking the ingestion
+    process and the web workers so /ready and is_collection_ready reflect the ingestion process."""
+    with _PROGRESS_LOCK:
+        for name in collection_names:
+            _PROGRESS[name] = SharedCollectionProgress(name)
+
+def get_progress(name):
+    """Return (creating if needed) the registered progress entry for a collection."""
+    with _PROGRESS_LOCK:
+        if name not in _PROGRESS:
+            _PROGRESS[name] = CollectionProgress(name)
+        return _PROGRESS[name]
+
+def mark_collection(name, status, message=""):
+    """Record a terminal or pending state for a collection without row progress."""
+    progress = get_progress(name)
+    if status == STATUS_PENDING:
+        with progress._lock:
+            progress.status = STATUS_PENDING
+            progress.message = message
+    else:
+        progress.finish(status, message)
+
+@contextmanager
+def ingestion_progress(name, total, register=True):
+    """Context manager used like a tqdm bar: call .update(n) while rows are ingested."""
+    progress = get_progress(name) if register else CollectionProgress(name)
+    progress.start(total)
+    try:
+        yield progress
+    except Exception as e:
+        progress.finish(STATUS_FAILED, str(e))
+        raise
+    else:
+        progress.finish(STATUS_READY)
+
+def is_collection_ready(name):
+    """True unless the collection is still queued for or undergoing ingestion."""
+    with _PROGRESS_LOCK:
+        progress = _PROGRESS.get(name)
+    return progress is None or progress.status not in (STATUS_PENDING, STATUS_RUNNING)
+
+def ingestion_snapshot():
+    """Per-collection progress plus an overall readiness flag."""
+    with _PROGRESS_LOCK:
+        entries = dict(_PROGRESS)
+    collections = {name: progress.to_dict() for name, progress in entries.items()}
+    ready = all(c["status"] not in (STATUS_PENDING, STATUS_RUNNING) for c in collections.values())
+    return {"ready": ready, "collections": collections}
+
+def start_background_ingestion(target, collection_names, on_finished=None):
+    """Run dataset ingestion on a daemon thread so the API can start serving immediately;
+    on_finished runs on the same thread once it is done (e.g. to build in-memory indexes)."""
+    for name in collection_names:
+        mark_collection(name, STATUS_PENDING)
+
+    def run():
+        try:
+            target()
+        finally:
+            # Anything the loader never reached is no longer pending
+            for name in collection_names:
+                if not is_collection_ready(name):
+                    mark_collection(name, STATUS_FAILED, "Ingestion ended before this collection was loaded")
+            if on_finished is not None:
+                on_finished()
+
+    thread = threading.Thread(target=run, name="dataset-ingestion", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,56 @@
+import os
+import google.generativeai as genai
+from dotenv import load_dotenv
+from .metrics import track_dependency, record_gemini_usage
+from .singleflight import SingleFlight
+from .deadline import run_with_deadline, time_budget, LLM_TIMEOUT_SECONDS, BudgetExhausted
+from .circuit_breaker import get_breaker
+
+load_dotenv()
+genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+
+_generative_model = None
+_text_flight = SingleFlight("gemini")
+_gemini_breaker = get_breaker("gemini", ignore=(BudgetExhausted,))
+
+def get_generative_model():
+    """Returns the shared Gemini model used by the recommendation pipeline."""
+    global _generative_model
+    if _generative_model is None:
+        _generative_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+    return _generative_model
+
+def reset_client():
+    """Reconfigure Gemini and drop the cached model so a forked worker opens its own connections."""
+    global _generative_model
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    _generative_model = None
+
+def generate_content(stage: str, contents, model=None, **kwargs):
+    """Single entry point for Gemini calls: records latency, errors and token usage per stage.
+    Bounded by the request deadline and LLM_TIMEOUT_SECONDS (raises DeadlineExceeded) and fails fast
+    with CircuitOpenError while the gemini breaker is open."""
+    # Identical concurrent text prompts on the shared model share one call (hedges bypass it); vision/custom calls always run.
+    # The breaker sits inside the flight so only the leader records an outcome: one upstream failure counts once
+    if isinstance(contents, str) and model is None and not kwargs:
+        return run_with_deadline(f"gemini.{stage}", _text_flight.do, (stage, contents),
+                                 _gemini_breaker.call, _generate_content, stage, contents, None,
+                                 cap=LLM_TIMEOUT_SECONDS, hedge_fn=_hedged_text_call)
+    return _gemini_breaker.call(run_with_deadline, f"gemini.{stage}", _generate_content, stage, contents, model,
+                                cap=LLM_TIMEOUT_SECONDS, **kwargs)
+
+def _hedged_text_call(key, breaker_call, fn, stage, contents, model):
+    return breaker_call(_generate_content, stage, contents, model)
+
+def _generate_content(stage, contents, model=None, **kwargs):
+    model = model or get_generative_model()
+    timeout = time_budget(LLM_TIMEOUT_SECONDS)
+    if timeout is not None and 'request_options' not in kwargs:
+        # Let the client abandon the HTTP call too, not just the waiting caller
+        kwargs['request_options'] = {'timeout': max(timeout, 0.1)}
+    with track_dependency("gemini", stage):
+        response = model.generate_content(contents, **kwargs)
+    record_gemini_usage(stage, response)
+    return response
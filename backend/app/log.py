@@ -0,0 +1,124 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from dotenv import load_dotenv
+from .tracing import current_request_id
+
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# json (one object per line) or text
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Fraction of verbose per-item records (logged with extra=SAMPLED) that are kept
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 0.01))
+
+# Pass as extra= on per-item / per-search records so they are sampled
+SAMPLED = {'sampled': True}
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {'message', 'asctime', 'request_id', 'sampled'}
+
+_listener = None
+_queue_handler = None
+_setup_lock = threading.Lock()
+
+class RequestContextFilter(logging.Filter):
+    """Stamps each record with the current request ID (runs in the calling thread)."""
+
+    def filter(self, record):
+        record.request_id = current_request_id()
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Keeps only LOG_SAMPLE_RATE of records marked sampled; everything else passes."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if not getattr(record, 'sampled', False) or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with timestamp, level, logger, request ID and any extra fields."""
+
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', None),
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = None
+        return super().format(record)
+
+def setup_logging():
+    """Route the stylesense loggers through a queue so request threads never block on stdout."""
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is not None:
+            return
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(RequestContextFilter())
+        queue_handler.addFilter(SamplingFilter(LOG_SAMPLE_RATE))
+
+        root = logging.getLogger("stylesense")
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(queue_handler)
+        root.propagate = False
+        _queue_handler = queue_handler
+
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            logging.getLogger("stylesense").removeHandler(_queue_handler)
+            _listener = None
+            _queue_handler = None
+
+atexit.register(shutdown_logging)
+
+def reset_after_fork():
+    """Start a new listener in a forked worker; the parent's listener thread does not survive fork."""
+    global _listener, _queue_handler, _setup_lock
+    _setup_lock = threading.Lock()
+    if _queue_handler is not None:
+        logging.getLogger("stylesense").removeHandler(_queue_handler)
+    _listener = None
+    _queue_handler = None
+    setup_logging()
+
+def get_logger(name):
+    """Logger under the stylesense namespace, e.g. get_logger(__name__) -> stylesense.app.recommender."""
+    setup_logging()
+    return logging.getLogger(f"stylesense.{name}")
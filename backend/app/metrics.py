@@ -0,0 +1,281 @@
+import threading
+import time
+from contextlib import contextmanager
+from .tracing import record_span
+
+# Latency buckets in seconds, from sub-millisecond cache hits up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((key, dict(state, buckets=list(state["buckets"]))) for key, state in self._values.items())
+        for key, state in items:
+            for bound, count in zip(self.buckets, state["buckets"]):
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', bound)])} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', '+Inf')])} {state['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {state['sum']}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state['count']}")
+        return lines
+
+REGISTRY = []
+
+STAGE_LATENCY = Histogram(
+    "stylesense_stage_duration_seconds",
+    "Latency of recommendation pipeline stages.",
+    ("stage",)
+)
+STAGE_IN_FLIGHT = Gauge(
+    "stylesense_stage_in_flight",
+    "Pipeline stages currently executing.",
+    ("stage",)
+)
+DEPENDENCY_LATENCY = Histogram(
+    "stylesense_dependency_duration_seconds",
+    "Latency of calls to external dependencies (gemini, weatherapi, chroma, embedding model).",
+    ("dependency", "operation")
+)
+DEPENDENCY_IN_FLIGHT = Gauge(
+    "stylesense_dependency_in_flight",
+    "Calls to external dependencies currently executing.",
+    ("dependency",)
+)
+DEPENDENCY_ERRORS = Counter(
+    "stylesense_dependency_errors_total",
+    "Failed calls to external dependencies.",
+    ("dependency", "operation")
+)
+GEMINI_TOKENS = Counter(
+    "stylesense_gemini_tokens_total",
+    "Gemini token usage by pipeline stage and token kind.",
+    ("stage", "kind")
+)
+CACHE_REQUESTS = Counter(
+    "stylesense_cache_requests_total",
+    "Cache lookups by cache and result (hit or miss).",
+    ("cache", "result")
+)
+SINGLEFLIGHT_CALLS = Counter(
+    "stylesense_singleflight_calls_total",
+    "Deduplicated calls by flight and role (leader ran the call, follower shared its result).",
+    ("flight", "role")
+)
+MICROBATCH_SIZE = Histogram(
+    "stylesense_microbatch_size",
+    "Requests served per micro-batch by batcher.",
+    ("batcher",),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+DEADLINE_EVENTS = Counter(
+    "stylesense_deadline_events_total",
+    "Budgeted calls that timed out, were skipped for lack of budget, or were hedged (and whether the hedge won).",
+    ("operation", "event")
+)
+SPECULATIVE_CATALOG = Counter(
+    "stylesense_speculative_catalog_searches_total",
+    "Catalog searches started before the wardrobe match was known: used (wardrobe miss) or wasted (wardrobe hit).",
+    ("outcome",)
+)
+UPLOAD_JOBS = Counter(
+    "stylesense_upload_jobs_total",
+    "Async wardrobe upload jobs by outcome (queued, deduplicated, rejected, done, failed).",
+    ("status",)
+)
+UPLOAD_QUEUE_DEPTH = Gauge(
+    "stylesense_upload_queue_depth",
+    "Async wardrobe upload jobs queued or processing in this worker."
+)
+CIRCUIT_STATE = Gauge(
+    "stylesense_circuit_breaker_state",
+    "Circuit breaker state per dependency (0 closed, 1 half-open, 2 open).",
+    ("breaker",)
+)
+CIRCUIT_REJECTIONS = Counter(
+    "stylesense_circuit_breaker_rejections_total",
+    "Calls failed fast because the dependency's breaker was open.",
+    ("breaker",)
+)
+HTTP_REQUEST_LATENCY = Histogram(
+    "stylesense_http_request_duration_seconds",
+    "HTTP request latency by route and status code.",
+    ("method", "route", "status")
+)
+HTTP_IN_FLIGHT = Gauge(
+    "stylesense_http_requests_in_flight",
+    "HTTP requests currently being handled.",
+    ("method", "route")
+)
+
+@contextmanager
+def track_stage(stage):
+    """Time a recommendation pipeline stage (histogram plus a span on the request trace)."""
+    STAGE_IN_FLIGHT.inc(stage=stage)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_LATENCY.observe(duration, stage=stage)
+        STAGE_IN_FLIGHT.dec(stage=stage)
+        record_span("stage", stage, start, duration, error)
+
+@contextmanager
+def track_dependency(dependency, operation):
+    """Time a call to an external dependency, count its failures and record a trace span."""
+    DEPENDENCY_IN_FLIGHT.inc(dependency=dependency)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = str(e)
+        DEPENDENCY_ERRORS.inc(dependency=dependency, operation=operation)
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        DEPENDENCY_LATENCY.observe(duration, dependency=dependency, operation=operation)
+        DEPENDENCY_IN_FLIGHT.dec(dependency=dependency)
+        record_span(dependency, operation, start, duration, error)
+
+def record_cache(cache, hit):
+    """Count a cache hit or miss."""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+def record_singleflight(flight, leader):
+    """Count a call that either ran (leader) or waited for an identical in-flight call (follower)."""
+    SINGLEFLIGHT_CALLS.inc(flight=flight, role="leader" if leader else "follower")
+
+def record_microbatch(batcher, size):
+    """Observe how many queued requests one batched call served."""
+    MICROBATCH_SIZE.observe(size, batcher=batcher)
+
+def record_deadline_event(operation, event):
+    DEADLINE_EVENTS.inc(operation=operation, event=event)
+
+def record_speculative_catalog(used, wasted):
+    if used:
+        SPECULATIVE_CATALOG.inc(used, outcome="used")
+    if wasted:
+        SPECULATIVE_CATALOG.inc(wasted, outcome="wasted")
+
+def record_upload_job(status):
+    UPLOAD_JOBS.inc(status=status)
+
+_BREAKER_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+def record_breaker_state(breaker, state):
+    CIRCUIT_STATE.set(_BREAKER_STATE_VALUES.get(state, 0), breaker=breaker)
+
+def record_breaker_rejection(breaker):
+    CIRCUIT_REJECTIONS.inc(breaker=breaker)
+
+def record_gemini_usage(stage, response):
+    """Count prompt/completion tokens from a Gemini response's usage metadata."""
+    usage = getattr(response, "usage_metadata", None)
+    if not usage:
+        return
+    GEMINI_TOKENS.inc(getattr(usage, "prompt_token_count", 0) or 0, stage=stage, kind="prompt")
+    GEMINI_TOKENS.inc(getattr(usage, "candidates_token_count", 0) or 0, stage=stage, kind="completion")
+
+def _render_cache_hit_ratio():
+    with CACHE_REQUESTS._lock:
+        values = dict(CACHE_REQUESTS._values)
+    caches = sorted({cache for cache, _ in values})
+    lines = [
+        "# HELP stylesense_cache_hit_ratio Fraction of cache lookups that were hits since startup.",
+        "# TYPE stylesense_cache_hit_ratio gauge"
+    ]
+    for cache in caches:
+        hits = values.get((cache, "hit"), 0)
+        total = hits + values.get((cache, "miss"), 0)
+        lines.append(f'stylesense_cache_hit_ratio{{cache="{cache}"}} {hits / total if total else 0.0}')
+    return lines
+
+def render_metrics():
+    """Prometheus text exposition of every registered metric."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    lines.extend(_render_cache_hit_ratio())
+    return "\n".join(lines) + "\n"
@@ -1,15 +1,71 @@
 import os
+import copy
+import contextvars
 import requests
-import google.generativeai as genai
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from .database import CHROMA_COLLECTIONS, COLLECTION_MYNTRA_CATALOG, COLLECTION_USER_STYLES, COLLECTION_CELEB_STYLES, create_embedding
-from sentence_transformers import SentenceTransformer
+from .database import CHROMA_COLLECTIONS, COLLECTION_MYNTRA_CATALOG, COLLECTION_USER_STYLES, COLLECTION_CELEB_STYLES, create_embedding, chroma_call, get_wardrobe_version, get_user_wardrobe_matrix, get_user_styles_collection
+from .catalog_index import get_catalog_index
+from .celebrity_index import get_celebrity_index, normalise_celebrity_name
+from .ingestion import is_collection_ready
+from .llm import generate_content
+from .metrics import track_stage, track_dependency, record_speculative_catalog
+from .log import get_logger, SAMPLED
+from .singleflight import SingleFlight
+from .cache import TTLCache
+from .deadline import request_deadline, run_with_deadline, time_budget, WEATHER_TIMEOUT_SECONDS, BudgetExhausted
+from .circuit_breaker import get_breaker
+from .concept_table import get_concept_table, parse_weather
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-EMBEDDING_MODEL = SentenceTransformer('all-MiniLM-L6-v2')
-GENERATIVE_MODEL = genai.GenerativeModel('gemini-2.5-flash')
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
+WEATHER_API_URL = os.getenv("WEATHER_API_URL", "https://api.weatherapi.com/v1/current.json")
+WEATHER_CACHE_TTL = int(os.getenv("WEATHER_CACHE_TTL", 600))
+# Temperatures within the same bucket share cached recommendations
+WEATHER_BUCKET_DEGREES = int(os.getenv("WEATHER_BUCKET_DEGREES", 5))
+# Whole-response cache; a TTL of 0 disables it
+RECOMMENDATION_CACHE_TTL = int(os.getenv("RECOMMENDATION_CACHE_TTL", 300))
+RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", 1000))
+# Search the catalog for every outfit item alongside the wardrobe match instead of after each miss
+SPECULATIVE_CATALOG = os.getenv("SPECULATIVE_CATALOG", "false").lower() == "true"
+SPECULATIVE_CATALOG_WORKERS = int(os.getenv("SPECULATIVE_CATALOG_WORKERS", 16))
+
+logger = get_logger(__name__)
+
+_weather_flight = SingleFlight("weather")
+_celebrity_flight = SingleFlight("celebrity_search")
+_weather_breaker = get_breaker("weatherapi", ignore=(BudgetExhausted,))
+_weather_cache = TTLCache("weather", 1024, WEATHER_CACHE_TTL)
+_recommendation_cache = TTLCache("recommendation", RECOMMENDATION_CACHE_SIZE, RECOMMENDATION_CACHE_TTL)
+# Stages of the current /recommend that fell back; shared with its worker threads via copied contexts
+_fallbacks = contextvars.ContextVar("stylesense_fallbacks", default=None)
+_catalog_executor = ThreadPoolExecutor(max_workers=SPECULATIVE_CATALOG_WORKERS, thread_name_prefix="catalog")
+
+EMOTIONS = ['confident', 'casual', 'romantic', 'professional', 'adventurous',
+            'cozy', 'elegant', 'playful', 'edgy', 'minimalist', 'bohemian', 'sporty']
+DEFAULT_CELEBRITY_TWIN = "Zendaya"
+# Outfit per mood when the concept LLM call fails (catalog matches for these are precomputed too)
+FALLBACK_OUTFITS = {
+    "professional": ["Tailored blazer", "Crisp button-down shirt", "Dress pants"],
+    "casual": ["Comfortable jeans", "Soft cotton t-shirt", "Lightweight cardigan"],
+    "elegant": ["Little black dress", "Statement jewelry", "Elegant heels"],
+    "romantic": ["Flowy midi dress", "Soft cardigan", "Delicate accessories"],
+    "confident": ["Bold colored top", "Well-fitted jeans", "Statement jacket"]
+}
+DEFAULT_OUTFIT = ["Casual shirt", "Comfortable jeans", "Versatile jacket"]
+
+# Metric stage names for semantic searches, by collection
+SEARCH_STAGES = {
+    COLLECTION_USER_STYLES: "wardrobe_search",
+    COLLECTION_MYNTRA_CATALOG: "catalog_search",
+    COLLECTION_CELEB_STYLES: "celebrity_search",
+}
+
+def mark_fallback(stage: str):
+    """Record that a stage served its fallback, so the degraded response is not cached."""
+    fallbacks = _fallbacks.get()
+    if fallbacks is not None:
+        fallbacks.append(stage)
 
 def extract_emotion_from_prompt(user_prompt: str):
     """Extract emotion/mood from user prompt using LLM."""
@@ -22,63 +78,108 @@ def extract_emotion_from_prompt(user_prompt: str):
         Respond with only the emotion word, nothing else.
         """
         
-        response = GENERATIVE_MODEL.generate_content(emotion_prompt)
+        response = generate_content("emotion", emotion_prompt)
         if response.text:
             emotion = response.text.strip().lower()
-            valid_emotions = ['confident', 'casual', 'romantic', 'professional', 'adventurous', 
-                            'cozy', 'elegant', 'playful', 'edgy', 'minimalist', 'bohemian', 'sporty']
-            if emotion in valid_emotions:
+            if emotion in EMOTIONS:
                 return emotion
         
         return "confident"
         
     except Exception as e:
-        print(f"Error extracting emotion: {e}")
+        logger.warning("Error extracting emotion: %s", e)
+        mark_fallback("emotion")
         return "confident"
 
 def get_weather(location: str):
     """Calls a real Weather API to get current weather info."""
+    cached = _weather_cache.get(location)
+    if cached is not None:
+        return cached
+    return _weather_flight.do(location, _get_weather, location)
+
+def _get_weather(location: str):
     try:
         if not WEATHER_API_KEY:
             return f"Weather data for {location} is unavailable. Assume mild conditions."
             
-        response = requests.get(
-            f"https://api.weatherapi.com/v1/current.json?key={WEATHER_API_KEY}&q={location}&aqi=no",
-            timeout=5
-        )
-        response.raise_for_status()
+        with track_dependency("weatherapi", "current"):
+            # Hard bound from the request budget (requests' own timeout is per socket operation)
+            response = _weather_breaker.call(run_with_deadline, "weatherapi", _fetch_weather,
+                f"{WEATHER_API_URL}?key={WEATHER_API_KEY}&q={location}&aqi=no",
+                time_budget(WEATHER_TIMEOUT_SECONDS),
+                cap=WEATHER_TIMEOUT_SECONDS
+            )
+            response.raise_for_status()
         data = response.json()
         temp = data['current']['temp_c']
         condition = data['current']['condition']['text']
-        return f"The weather in {location} is {temp}°C with {condition}. Dress accordingly."
+        weather_info = f"The weather in {location} is {temp}°C with {condition}. Dress accordingly."
+        _weather_cache.set(location, weather_info)
+        return weather_info
     except Exception as e:
-        print(f"Weather API error: {e}")
+        logger.warning("Weather API error: %s", e, extra={'location': location})
         return f"Weather data for {location} is unavailable. Assume mild conditions."
 
+def _fetch_weather(url, timeout):
+    response = requests.get(url, timeout=timeout)
+    # Only server errors say the service is unhealthy; 4xx (e.g. unknown location) is raised by the caller
+    if response.status_code >= 500:
+        response.raise_for_status()
+    return response
+
+def weather_bucket(weather_info: str):
+    """Coarse weather key for caching: temperature rounded to WEATHER_BUCKET_DEGREES plus condition."""
+    parsed = parse_weather(weather_info)
+    if parsed is None:
+        return "unavailable"
+    step = max(WEATHER_BUCKET_DEGREES, 1)
+    return f"{int(round(parsed[0] / step)) * step}C/{parsed[1].lower()}"
+
+def normalise_prompt(user_prompt: str):
+    return " ".join((user_prompt or "").lower().split()).rstrip(".!? ")
+
+def recommendation_cache_key(user_id: str, user_prompt: str, location: str, weather_info: str):
+    """(user, normalised prompt, location, weather bucket, wardrobe version) for the response cache."""
+    return (user_id, normalise_prompt(user_prompt), (location or "").strip().lower(),
+            weather_bucket(weather_info), get_wardrobe_version(user_id))
+
 def semantic_search(query_text: str, collection_name: str, user_id: str = None, n_results: int = 3):
     """Performs a semantic search on a specified ChromaDB collection."""
+    with track_stage(SEARCH_STAGES.get(collection_name, "semantic_search")):
+        return _semantic_search(query_text, collection_name, user_id, n_results)
+
+def _semantic_search(query_text: str, collection_name: str, user_id: str = None, n_results: int = 3):
     try:
-        if collection_name not in CHROMA_COLLECTIONS:
-            print(f"Collection {collection_name} not found")
+        if collection_name == COLLECTION_USER_STYLES and user_id:
+            collection = get_user_styles_collection(user_id, create=False)
+            if collection is None:
+                return []
+        elif collection_name not in CHROMA_COLLECTIONS:
+            logger.error("Collection %s not found", collection_name)
             return []
-        
-        collection = CHROMA_COLLECTIONS[collection_name]
+        else:
+            collection = CHROMA_COLLECTIONS[collection_name]
         query_embedding = create_embedding(query_text)
         
         if not query_embedding:
-            print("Failed to create embedding for query")
+            logger.error("Failed to create embedding for query", extra={'collection': collection_name})
             return []
         
         where_clause = None
         if collection_name == COLLECTION_USER_STYLES and user_id:
             where_clause = {"user_id": user_id}
         
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results,
-            where=where_clause,
-            include=['documents', 'metadatas', 'distances']
-        )
+        catalog_index = get_catalog_index(collection) if collection_name == COLLECTION_MYNTRA_CATALOG else None
+        if catalog_index:
+            results = catalog_index.search(collection, query_embedding, n_results=n_results)
+        else:
+            results = chroma_call("query", collection.query,
+                query_embeddings=[query_embedding],
+                n_results=n_results,
+                where=where_clause,
+                include=['documents', 'metadatas', 'distances']
+            )
         
         formatted_results = []
         if results['documents'] and results['documents'][0]:
@@ -89,15 +190,85 @@ def semantic_search(query_text: str, collection_name: str, user_id: str = None,
                     'distance': results['distances'][0][i] if results.get('distances') and results['distances'][0] else 0.5
                 })
         
-        print(f"Semantic search found {len(formatted_results)} results for '{query_text}' in {collection_name}")
+        logger.info("Semantic search found %d results", len(formatted_results),
+                    extra={**SAMPLED, 'collection': collection_name, 'query': query_text[:100]})
         return formatted_results
         
     except Exception as e:
-        print(f"Error in semantic search for '{query_text}' in {collection_name}: {e}")
+        logger.error("Error in semantic search: %s", e, extra={'collection': collection_name, 'query': query_text[:100]})
+        mark_fallback(SEARCH_STAGES.get(collection_name, "semantic_search"))
         return []
 
+def match_wardrobe_items(item_concepts: list, user_id: str, n_results: int = 3):
+    """Wardrobe matches for each outfit item: one local matrix product over the cached wardrobe, else a Chroma query per item."""
+    wardrobe = get_user_wardrobe_matrix(user_id) if item_concepts else None
+    if wardrobe is None:
+        return [semantic_search(item, COLLECTION_USER_STYLES, user_id=user_id, n_results=n_results) for item in item_concepts]
+
+    with track_stage("wardrobe_search"):
+        embeddings = [create_embedding(item) for item in item_concepts]
+        valid = [i for i, embedding in enumerate(embeddings) if embedding]
+        matches = [[] for _ in item_concepts]
+        if valid:
+            for i, results in zip(valid, wardrobe.search([embeddings[i] for i in valid], n_results=n_results)):
+                matches[i] = results
+        return matches
+
+def start_catalog_searches(item_concepts: list, n_results: int = 3):
+    """Catalog searches for every item, started before the wardrobe match is known; None while the catalog loads.
+    Items with precomputed matches get no search (None in their slot)."""
+    if not item_concepts or not is_collection_ready(COLLECTION_MYNTRA_CATALOG):
+        return None
+    table = get_concept_table()
+    return [None if table.catalog_matches(item) is not None else
+            _catalog_executor.submit(contextvars.copy_context().run, semantic_search, item,
+                                     COLLECTION_MYNTRA_CATALOG, None, n_results)
+            for item in item_concepts]
+
+def finish_catalog_searches(searches: list, used: list):
+    """Drop the speculative searches for items the wardrobe covered and record hit/waste counts."""
+    started = wasted = 0
+    for search, was_used in zip(searches, used):
+        if search is None:
+            continue
+        started += 1
+        if not was_used:
+            search.cancel()
+            wasted += 1
+    record_speculative_catalog(started - wasted, wasted)
+    logger.debug("Speculative catalog searches", extra={**SAMPLED, 'used': started - wasted, 'wasted': wasted})
+
+def find_celebrity_twin(twin_prompt: str):
+    """Closest celebrity as (name, image_url) from the per-celebrity index, or None."""
+    index = get_celebrity_index(CHROMA_COLLECTIONS.get(COLLECTION_CELEB_STYLES))
+    if index is None:
+        # Index disabled or not built: search every image description as before
+        twin_results = semantic_search(twin_prompt, COLLECTION_CELEB_STYLES, n_results=1)
+        if not twin_results:
+            return None
+        meta = twin_results[0]['meta']
+        return (meta.get('celebrity_name') or normalise_celebrity_name(meta.get('celebrity', 'Zendaya')),
+                meta.get('image_url', ''))
+
+    with track_stage("celebrity_search"):
+        query_embedding = create_embedding(twin_prompt)
+        matches = index.search(query_embedding, n_results=1) if query_embedding else []
+    if not matches:
+        return None
+    return matches[0]['celebrity'], matches[0]['image_url']
+
 def generate_outfit_concept(user_prompt: str, weather_info: str, celebrity_twin: str, emotion: str):
-    """Generate outfit concept using LLM."""
+    """Outfit concept from the precomputed table for common (emotion, twin, weather bucket) combinations,
+    else from the LLM, else the mood's fallback outfit."""
+    outfit_items = get_concept_table().concept(emotion, celebrity_twin, weather_info)
+    if outfit_items:
+        logger.debug("Outfit concept from table", extra={**SAMPLED, 'items': outfit_items})
+        return outfit_items
+    return request_outfit_concept(user_prompt, weather_info, celebrity_twin, emotion) or \
+        list(FALLBACK_OUTFITS.get(emotion, DEFAULT_OUTFIT))
+
+def request_outfit_concept(user_prompt: str, weather_info: str, celebrity_twin: str, emotion: str):
+    """Generate outfit concept using LLM; None when the call fails or returns no items."""
     concept_prompt = f"""
     You are StyleSense AI. Create an outfit concept based on:
     
@@ -120,10 +291,10 @@ def generate_outfit_concept(user_prompt: str, weather_info: str, celebrity_twin:
     """
     
     try:
-        response = GENERATIVE_MODEL.generate_content(concept_prompt)
+        response = generate_content("outfit_concept", concept_prompt)
         if response.text:
             outfit_text = response.text.strip()
-            print(f"Generated outfit concept: {outfit_text}")
+            logger.debug("Generated outfit concept", extra={**SAMPLED, 'outfit_text': outfit_text})
             
             lines = [line.strip() for line in outfit_text.split('\n') if line.strip()]
             outfit_items = []
@@ -145,21 +316,14 @@ def generate_outfit_concept(user_prompt: str, weather_info: str, celebrity_twin:
                         outfit_items.append(clean_item)
             
             if outfit_items:
-                print(f"Parsed outfit items: {outfit_items}")
+                logger.info("Parsed outfit items", extra={**SAMPLED, 'items': outfit_items[:3]})
                 return outfit_items[:3]
         
     except Exception as e:
-        print(f"Error generating outfit concept: {e}")
+        logger.warning("Error generating outfit concept: %s", e)
         
-    fallback_outfits = {
-        "professional": ["Tailored blazer", "Crisp button-down shirt", "Dress pants"],
-        "casual": ["Comfortable jeans", "Soft cotton t-shirt", "Lightweight cardigan"],
-        "elegant": ["Little black dress", "Statement jewelry", "Elegant heels"],
-        "romantic": ["Flowy midi dress", "Soft cardigan", "Delicate accessories"],
-        "confident": ["Bold colored top", "Well-fitted jeans", "Statement jacket"]
-    }
-    
-    return fallback_outfits.get(emotion, ["Casual shirt", "Comfortable jeans", "Versatile jacket"])
+    mark_fallback("outfit_concept")
+    return None
 
 def generate_final_recommendation(user_prompt: str, weather_info: str, celebrity_twin: str, 
                                 items_owned: list, items_to_buy: list, emotion: str):
@@ -187,60 +351,76 @@ def generate_final_recommendation(user_prompt: str, weather_info: str, celebrity
     """
     
     try:
-        response = GENERATIVE_MODEL.generate_content(final_prompt)
+        response = generate_content("final_recommendation", final_prompt)
         if response.text:
             return response.text.strip()
     except Exception as e:
-        print(f"Error generating final recommendation: {e}")
+        logger.warning("Error generating final recommendation: %s", e)
     
+    mark_fallback("final_recommendation")
     owned_items_text = ", ".join([item.get('owned_item', '') for item in items_owned]) if items_owned else "your existing wardrobe pieces"
     buy_items_text = ", ".join([item.get('suggested_product', '') for item in items_to_buy]) if items_to_buy else "some versatile pieces"
     
     return f"Channel {celebrity_twin}'s effortless {emotion} style! Start with {owned_items_text} from your wardrobe. To complete the look, consider adding {buy_items_text}. The weather calls for {weather_info.lower()}, so layer smartly and choose breathable fabrics. Remember, confidence is your best accessory - own your style and make it uniquely yours!"
 
 def generate_style_recommendation(user_id: str, user_prompt: str, location: str):
-    """Orchestrates the entire Dual-RAG process with emotion extraction."""
-    
+    """Orchestrates the entire Dual-RAG process with emotion extraction.
+    Runs within RECOMMEND_BUDGET_SECONDS; LLM and weather calls that would overrun it use their fallbacks."""
+    token = _fallbacks.set([])
+    try:
+        with track_stage("total"), request_deadline():
+            return _generate_style_recommendation(user_id, user_prompt, location)
+    finally:
+        _fallbacks.reset(token)
+
+def _generate_style_recommendation(user_id: str, user_prompt: str, location: str):
     try:
-        print(f"Starting style recommendation for user {user_id}")
-        print(f"User prompt: {user_prompt}")
-        print(f"Location: {location}")
+        logger.info("Starting style recommendation", extra={'user_id': user_id, 'location': location})
+        logger.debug("User prompt", extra={**SAMPLED, 'user_prompt': user_prompt})
         
-        extracted_emotion = extract_emotion_from_prompt(user_prompt)
-        print(f"Extracted emotion: {extracted_emotion}")
+        with track_stage("weather"):
+            weather_info = get_weather(location)
+        logger.info("Weather info", extra={**SAMPLED, 'weather': weather_info})
         
-        weather_info = get_weather(location)
-        print(f"Weather info: {weather_info}")
+        cache_key = recommendation_cache_key(user_id, user_prompt, location, weather_info)
+        cached = _recommendation_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Recommendation cache hit", extra={'user_id': user_id})
+            return copy.deepcopy(cached)
+        
+        with track_stage("emotion"):
+            extracted_emotion = extract_emotion_from_prompt(user_prompt)
+        logger.info("Extracted emotion", extra={**SAMPLED, 'emotion': extracted_emotion})
         
         twin_prompt = f"Based on the user's request '{user_prompt}' and their {extracted_emotion} mood, find a celebrity style that matches."
-        twin_results = semantic_search(twin_prompt, COLLECTION_CELEB_STYLES, n_results=1)
+        twin = None
+        if is_collection_ready(COLLECTION_CELEB_STYLES):
+            twin = _celebrity_flight.do(twin_prompt, find_celebrity_twin, twin_prompt)
+        else:
+            logger.info("Celebrity styles still loading, using default style inspiration", extra=SAMPLED)
+            mark_fallback("celebrity_search")
         
-        celebrity_twin = "Zendaya"
+        celebrity_twin = DEFAULT_CELEBRITY_TWIN
         celebrity_image_url = None
         
-        if twin_results:
-            celebrity_name = twin_results[0]['meta'].get('celebrity', 'Zendaya')
-            celebrity_twin = celebrity_name.split('_')[0] if '_' in celebrity_name else celebrity_name
-            celebrity_twin = celebrity_twin.replace('.jpg', '').replace('.png', '').replace('.jpeg', '')
-            celebrity_twin = ' '.join(word.capitalize() for word in celebrity_twin.split())
-            
-            celebrity_image_url = twin_results[0]['meta'].get('image_url', '')
+        if twin:
+            celebrity_twin, celebrity_image_url = twin
         
-        print(f"Celebrity style inspiration: {celebrity_twin}")
+        logger.info("Celebrity style inspiration", extra={**SAMPLED, 'celebrity_twin': celebrity_twin})
         
-        outfit_concept_list = generate_outfit_concept(user_prompt, weather_info, celebrity_twin, extracted_emotion)
-        print(f"Generated outfit concept: {outfit_concept_list}")
+        with track_stage("outfit_concept"):
+            outfit_concept_list = generate_outfit_concept(user_prompt, weather_info, celebrity_twin, extracted_emotion)
         
         items_owned = []
         items_to_buy = []
         
-        for item_concept in outfit_concept_list:
-            if not item_concept or len(item_concept.strip()) < 3:
-                continue
-                
-            print(f"Searching for: {item_concept}")
-            
-            style_results = semantic_search(item_concept, COLLECTION_USER_STYLES, user_id=user_id, n_results=3)
+        item_concepts = [item for item in outfit_concept_list if item and len(item.strip()) >= 3]
+        catalog_searches = start_catalog_searches(item_concepts, n_results=3) if SPECULATIVE_CATALOG else None
+        wardrobe_matches = match_wardrobe_items(item_concepts, user_id, n_results=3)
+        catalog_used = [False] * len(item_concepts)
+        
+        for index, (item_concept, style_results) in enumerate(zip(item_concepts, wardrobe_matches)):
+            logger.debug("Searching for item", extra={**SAMPLED, 'item': item_concept})
             
             best_match = None
             for result in style_results:
@@ -255,9 +435,21 @@ def generate_style_recommendation(user_id: str, user_prompt: str, location: str)
                     "confidence": round(max(0, 1 - best_match.get('distance', 0.5)), 2),
                     "source": best_match['meta'].get('source', 'user_style')
                 })
-                print(f"Found owned item: {best_match['text']} (confidence: {1 - best_match.get('distance', 0.5):.2f})")
+                logger.info("Found owned item", extra={**SAMPLED, 'item': item_concept, 'match': best_match['text'],
+                                                       'confidence': items_owned[-1]['confidence']})
             else:
-                catalog_results = semantic_search(item_concept, COLLECTION_MYNTRA_CATALOG, n_results=3)
+                catalog_results = get_concept_table().catalog_matches(item_concept)
+                if catalog_results is None:
+                    catalog_results = []
+                    search = catalog_searches[index] if catalog_searches is not None else None
+                    if search is not None:
+                        catalog_used[index] = True
+                        catalog_results = search.result()
+                    elif is_collection_ready(COLLECTION_MYNTRA_CATALOG):
+                        catalog_results = semantic_search(item_concept, COLLECTION_MYNTRA_CATALOG, n_results=3)
+                    else:
+                        # Generic suggestions while the catalog loads must not outlive ingestion in the cache
+                        mark_fallback("catalog_search")
                 
                 if catalog_results:
                     best_product = catalog_results[0]
@@ -268,7 +460,8 @@ def generate_style_recommendation(user_id: str, user_prompt: str, location: str)
                         "link": best_product['meta'].get('link', ''),
                         "confidence": round(max(0, 1 - best_product.get('distance', 0.5)), 2)
                     })
-                    print(f"Suggested to buy: {best_product['text']} (confidence: {1 - best_product.get('distance', 0.5):.2f})")
+                    logger.info("Suggested product", extra={**SAMPLED, 'item': item_concept, 'product': best_product['text'],
+                                                            'confidence': items_to_buy[-1]['confidence']})
                 else:
                     items_to_buy.append({
                         "item": item_concept,
@@ -277,12 +470,16 @@ def generate_style_recommendation(user_id: str, user_prompt: str, location: str)
                         "link": "",
                         "confidence": 0.7
                     })
-                    print(f"No specific products found, added generic suggestion: {item_concept}")
+                    logger.info("No specific products found, added generic suggestion", extra={**SAMPLED, 'item': item_concept})
+        
+        if catalog_searches is not None:
+            finish_catalog_searches(catalog_searches, catalog_used)
 
-        final_recommendation = generate_final_recommendation(
-            user_prompt, weather_info, celebrity_twin, 
-            items_owned, items_to_buy, extracted_emotion
-        )
+        with track_stage("final_recommendation"):
+            final_recommendation = generate_final_recommendation(
+                user_prompt, weather_info, celebrity_twin, 
+                items_owned, items_to_buy, extracted_emotion
+            )
 
         result = {
             "celebrity_twin": celebrity_twin,
@@ -294,11 +491,21 @@ def generate_style_recommendation(user_id: str, user_prompt: str, location: str)
             "extracted_emotion": extracted_emotion
         }
         
-        print(f"Generated recommendation with {len(items_owned)} owned items and {len(items_to_buy)} items to buy")
+        # Weather failures reach callers sharing the lookup too, so detect them from the text
+        if WEATHER_API_KEY and weather_bucket(weather_info) == "unavailable":
+            mark_fallback("weather")
+        fallbacks = _fallbacks.get()
+        if fallbacks:
+            # Serving a degraded answer for the whole TTL would outlast the Gemini/weather outage
+            logger.info("Not caching degraded recommendation", extra={'user_id': user_id, 'fallbacks': sorted(set(fallbacks))})
+        else:
+            _recommendation_cache.set(cache_key, copy.deepcopy(result))
+        logger.info("Generated recommendation", extra={'user_id': user_id, 'items_owned': len(items_owned),
+                                                       'items_to_buy': len(items_to_buy), 'emotion': extracted_emotion})
         return result
         
     except Exception as e:
-        print(f"Error in generate_style_recommendation: {e}")
+        logger.exception("Error in generate_style_recommendation: %s", e, extra={'user_id': user_id})
         return {
             "celebrity_twin": "Zendaya",
             "celebrity_image_url": None,
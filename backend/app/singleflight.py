@@ -0,0 +1,61 @@
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from .metrics import record_singleflight
+from .tracing import record_span
+
+load_dotenv()
+
+# Share one execution among concurrent identical calls (weather, embeddings, celebrity search, Gemini)
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() == "true"
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one; followers block and receive the leader's result."""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        if not SINGLEFLIGHT_ENABLED or key is None:
+            return fn(*args, **kwargs)
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+        record_singleflight(self.name, leader)
+
+        if not leader:
+            start = time.perf_counter()
+            call.done.wait()
+            record_span("singleflight", self.name, start, time.perf_counter() - start,
+                        str(call.error) if call.error else None)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
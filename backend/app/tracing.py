@@ -0,0 +1,225 @@
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import tracemalloc
+import logging
+import uuid
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# log.py imports this module for request ids, so take the stylesense logger directly instead of get_logger
+logger = logging.getLogger(f"stylesense.{__name__}")
+
+# Always attach traces (not only when the request sends X-Debug-Trace)
+TRACE_ALL_REQUESTS = os.getenv("TRACE_ALL_REQUESTS", "false").lower() == "true"
+# Honour X-Debug-Trace / X-Debug-Profile from clients; they make the server profile and write to disk
+ALLOW_DEBUG_HEADERS = os.getenv("ALLOW_DEBUG_HEADERS", "false").lower() == "true"
+# Directory for per-request trace JSON dumps; empty disables dumping
+TRACE_DUMP_DIR = os.getenv("TRACE_DUMP_DIR", "")
+# Fraction of requests profiled without an explicit X-Debug-Profile header
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_MODE = os.getenv("PROFILE_MODE", "cprofile").lower()
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profiles")
+)
+PROFILE_TOP_N = 25
+
+PROFILE_MODES = ("cprofile", "tracemalloc")
+# Client-supplied request ids name trace and profile files, so anything else is replaced
+_REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+class RequestTrace:
+    """Spans recorded while handling one request."""
+
+    def __init__(self, request_id, name=""):
+        self.request_id = request_id
+        self.name = name
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms = None
+        self.spans = []
+        self.profile = None
+        self._lock = threading.Lock()
+
+    def add_span(self, kind, name, start, duration, error=None, **attributes):
+        span = {
+            "kind": kind,
+            "name": name,
+            "start_ms": round((start - self._start) * 1000, 3),
+            "duration_ms": round(duration * 1000, 3),
+            "thread": threading.current_thread().name
+        }
+        if error:
+            span["error"] = error
+        if attributes:
+            span["attributes"] = attributes
+        with self._lock:
+            self.spans.append(span)
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 3)
+
+    def to_dict(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start_ms"])
+        trace = {
+            "request_id": self.request_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "spans": spans
+        }
+        if self.profile:
+            trace["profile"] = self.profile
+        return trace
+
+_current_trace = contextvars.ContextVar("stylesense_trace", default=None)
+
+def new_request_id():
+    return uuid.uuid4().hex[:16]
+
+def start_trace(request_id=None, name=""):
+    """Begin a trace for the current request context; a missing or malformed request id is regenerated."""
+    if not request_id or not _REQUEST_ID_PATTERN.fullmatch(request_id):
+        request_id = new_request_id()
+    trace = RequestTrace(request_id, name)
+    _current_trace.set(trace)
+    return trace
+
+def current_trace():
+    return _current_trace.get()
+
+def current_request_id():
+    trace = _current_trace.get()
+    return trace.request_id if trace else None
+
+def record_span(kind, name, start, duration, error=None, **attributes):
+    """Attach a timed span to the current request's trace, if any."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span(kind, name, start, duration, error, **attributes)
+
+def dump_trace(trace):
+    """Write the trace as JSON to TRACE_DUMP_DIR. Returns the file path or None."""
+    if not TRACE_DUMP_DIR:
+        return None
+    try:
+        os.makedirs(TRACE_DUMP_DIR, exist_ok=True)
+        path = os.path.join(TRACE_DUMP_DIR, f"{trace.request_id}.json")
+        with open(path, "w") as f:
+            json.dump(trace.to_dict(), f, indent=2)
+        return path
+    except Exception as e:
+        logger.error("Error dumping trace %s: %s", trace.request_id, e)
+        return None
+
+def choose_profile_mode(requested=None):
+    """Profile mode for this request: explicit header value (with ALLOW_DEBUG_HEADERS), else sampled at PROFILE_SAMPLE_RATE."""
+    if requested and ALLOW_DEBUG_HEADERS:
+        requested = requested.lower()
+        return requested if requested in PROFILE_MODES else None
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return PROFILE_MODE if PROFILE_MODE in PROFILE_MODES else "cprofile"
+    return None
+
+# cProfile and tracemalloc are process-wide, so only one request is profiled at a time
+_profile_lock = threading.Lock()
+_current_profiler = contextvars.ContextVar("stylesense_profiler", default=None)
+
+class RequestProfiler:
+    """Captures a cProfile or tracemalloc snapshot around a request handler.
+    cProfile only sees the thread that enabled it, so work handed to other threads goes through profiled()."""
+
+    def __init__(self, mode, request_id):
+        self.mode = mode
+        self.request_id = request_id
+        self.active = False
+        self._profiler = None
+        self._thread_id = None
+        self._thread_profiles = []
+        self._thread_lock = threading.Lock()
+
+    def start(self):
+        if not _profile_lock.acquire(blocking=False):
+            logger.info("Profiler busy, not profiling request %s", self.request_id)
+            return False
+        self.active = True
+        self._thread_id = threading.get_ident()
+        _current_profiler.set(self)
+        if self.mode == "tracemalloc":
+            tracemalloc.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return True
+
+    def run(self, fn, *args, **kwargs):
+        """Call fn under a cProfile of its own thread, merged into the request's profile on stop."""
+        if not self.active or self.mode == "tracemalloc" or threading.get_ident() == self._thread_id:
+            return fn(*args, **kwargs)
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.disable()
+            with self._thread_lock:
+                self._thread_profiles.append(profile)
+
+    def stop(self):
+        """Stop profiling and save the result. Returns a summary dict for the trace."""
+        if not self.active:
+            return None
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            if self.mode == "tracemalloc":
+                snapshot = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                top = snapshot.statistics("lineno")[:PROFILE_TOP_N]
+                path = os.path.join(PROFILE_DIR, f"{self.request_id}.tracemalloc.txt")
+                with open(path, "w") as f:
+                    f.write("\n".join(str(stat) for stat in top))
+                return {
+                    "mode": self.mode,
+                    "path": path,
+                    "current_bytes": current,
+                    "peak_bytes": peak,
+                    "top": [str(stat) for stat in top[:10]]
+                }
+
+            self._profiler.disable()
+            path = os.path.join(PROFILE_DIR, f"{self.request_id}.prof")
+            buffer = io.StringIO()
+            stats = pstats.Stats(self._profiler, stream=buffer)
+            with self._thread_lock:
+                for profile in self._thread_profiles:
+                    stats.add(profile)
+                self._thread_profiles = []
+            stats.dump_stats(path)
+            stats.sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+            with open(path + ".txt", "w") as f:
+                f.write(buffer.getvalue())
+            return {"mode": self.mode, "path": path}
+        except Exception as e:
+            logger.error("Error saving profile for request %s: %s", self.request_id, e)
+            return None
+        finally:
+            self.active = False
+            _profile_lock.release()
+
+def profiled(fn, *args, **kwargs):
+    """Call fn under the current request's profiler, if any; wrap callables handed to worker threads with this."""
+    profiler = _current_profiler.get()
+    if profiler is None:
+        return fn(*args, **kwargs)
+    return profiler.run(fn, *args, **kwargs)
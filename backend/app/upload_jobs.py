@@ -0,0 +1,165 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dotenv import load_dotenv
+from .metrics import record_upload_job, UPLOAD_QUEUE_DEPTH
+from .log import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Images processed at once per web worker (each holds a Gemini vision call)
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", 4))
+# Jobs queued or running per web worker before new uploads get 503 + Retry-After
+UPLOAD_QUEUE_MAX = int(os.getenv("UPLOAD_QUEUE_MAX", 100))
+# Finished jobs are kept (and identical retries deduplicated) this long
+UPLOAD_JOB_TTL = int(os.getenv("UPLOAD_JOB_TTL", 3600))
+# A job not updated for this long was lost with its worker and is reported as failed
+UPLOAD_JOB_TIMEOUT = int(os.getenv("UPLOAD_JOB_TIMEOUT", 300))
+# SQLite file shared by all web workers on a host, so any worker can answer a status poll
+UPLOAD_JOBS_DB = os.getenv("UPLOAD_JOBS_DB", os.path.join(tempfile.gettempdir(), "stylesense_upload_jobs.db"))
+
+STATUS_QUEUED = "queued"
+STATUS_PROCESSING = "processing"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+# Rough progress per stage for the client's progress bar
+STAGE_PROGRESS = {"queued": 5, "analyzing": 30, "storing": 75, "counting": 90, "done": 100, "failed": 100}
+
+class UploadQueueFull(RuntimeError):
+    pass
+
+class UploadJobStore:
+    """Job records in SQLite; lookups and inserts run in one immediate transaction across processes."""
+
+    def __init__(self, path=UPLOAD_JOBS_DB):
+        self.path = path
+        self._initialised = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if not self._initialised:
+            with self._lock:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""CREATE TABLE IF NOT EXISTS upload_jobs (
+                    job_id TEXT PRIMARY KEY, user_id TEXT NOT NULL, image_digest TEXT NOT NULL,
+                    status TEXT NOT NULL, stage TEXT NOT NULL, result TEXT, error TEXT,
+                    created_at REAL NOT NULL, updated_at REAL NOT NULL)""")
+                conn.execute("CREATE INDEX IF NOT EXISTS upload_jobs_image ON upload_jobs (user_id, image_digest)")
+                self._initialised = True
+        return conn
+
+    def _expired(self, row, now):
+        return row["status"] in (STATUS_QUEUED, STATUS_PROCESSING) and now - row["updated_at"] > UPLOAD_JOB_TIMEOUT
+
+    def create(self, user_id, image_digest):
+        """(job, created): the live or finished job for the same user and image, else a new queued job."""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM upload_jobs WHERE updated_at < ?", (now - UPLOAD_JOB_TTL,))
+                for row in conn.execute(
+                        "SELECT * FROM upload_jobs WHERE user_id = ? AND image_digest = ? AND status != ? "
+                        "ORDER BY created_at DESC", (user_id, image_digest, STATUS_FAILED)):
+                    if not self._expired(row, now):
+                        conn.execute("COMMIT")
+                        return self._to_dict(row), False
+                job_id = uuid.uuid4().hex
+                conn.execute("INSERT INTO upload_jobs VALUES (?, ?, ?, ?, ?, NULL, NULL, ?, ?)",
+                             (job_id, user_id, image_digest, STATUS_QUEUED, "queued", now, now))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(job_id), True
+
+    def update(self, job_id, status, stage, result=None, error=None):
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE upload_jobs SET status = ?, stage = ?, result = ?, error = ?, updated_at = ? WHERE job_id = ?",
+                         (status, stage, json.dumps(result) if result is not None else None, error, time.time(), job_id))
+
+    def get(self, job_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM upload_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def _to_dict(self, row):
+        job = {key: row[key] for key in ("job_id", "user_id", "status", "stage", "error", "created_at", "updated_at")}
+        job["result"] = json.loads(row["result"]) if row["result"] else None
+        if self._expired(row, time.time()):
+            job.update(status=STATUS_FAILED, stage="failed", error="Upload processing was interrupted; please upload again")
+        job["progress"] = STAGE_PROGRESS.get(job["stage"], 0)
+        return job
+
+class UploadQueue:
+    """Bounded background processing for wardrobe uploads; the request returns as soon as the job is queued."""
+
+    def __init__(self, store, workers=UPLOAD_WORKERS, max_pending=UPLOAD_QUEUE_MAX):
+        self.store = store
+        self.workers = max(workers, 1)
+        self.max_pending = max_pending
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _ensure_executor(self):
+        # Created lazily, and again in a forked worker where the parent's threads do not exist
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="upload")
+            self._pid = os.getpid()
+            self._pending = 0
+
+    def submit(self, user_id, image_digest, process_fn, *args):
+        """Queue process_fn(on_stage, *args) unless the same image is already queued or done for this user.
+        Returns the job; raises UploadQueueFull when this worker's backlog is full."""
+        with self._lock:
+            self._ensure_executor()
+            if self._pending >= self.max_pending:
+                record_upload_job("rejected")
+                raise UploadQueueFull(f"{self._pending} uploads already queued")
+            job, created = self.store.create(user_id, image_digest)
+            if not created:
+                record_upload_job("deduplicated")
+                return job
+            self._pending += 1
+            UPLOAD_QUEUE_DEPTH.set(self._pending)
+            self._executor.submit(self._run, job["job_id"], process_fn, *args)
+        record_upload_job(STATUS_QUEUED)
+        return job
+
+    def _run(self, job_id, process_fn, *args):
+        def on_stage(stage):
+            self.store.update(job_id, STATUS_PROCESSING, stage)
+
+        try:
+            result = process_fn(on_stage, *args)
+            self.store.update(job_id, STATUS_DONE, "done", result=result)
+            record_upload_job(STATUS_DONE)
+        except Exception as e:
+            logger.error("Upload job failed: %s", e, extra={'job_id': job_id})
+            self.store.update(job_id, STATUS_FAILED, "failed", error=str(e))
+            record_upload_job(STATUS_FAILED)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                UPLOAD_QUEUE_DEPTH.set(self._pending)
+
+_store = UploadJobStore()
+_queue = UploadQueue(_store)
+
+def get_upload_job_store():
+    return _store
+
+def get_upload_queue():
+    return _queue
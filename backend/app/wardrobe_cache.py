@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from .metrics import record_cache
+
+class WardrobeMatrix:
+    """One user's wardrobe as a float32 embedding matrix plus documents and metadata."""
+
+    def __init__(self, ids, embeddings, documents, metadatas, version=0):
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = [meta or {} for meta in metadatas]
+        self.embeddings = (np.asarray(embeddings, dtype=np.float32).reshape(len(self.ids), -1) if self.ids
+                           else np.zeros((0, 0), dtype=np.float32))
+        self.norms = (self.embeddings ** 2).sum(axis=1)
+        self.version = version
+
+    def search(self, query_embeddings, n_results=3):
+        """Squared-L2 nearest items for each query (same distance as the Chroma collection), in one matrix product."""
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+        if not self.ids:
+            return [[] for _ in range(len(queries))]
+
+        distances = self.norms[None, :] - 2 * (queries @ self.embeddings.T) + (queries ** 2).sum(axis=1)[:, None]
+        k = min(n_results, len(self.ids))
+        results = []
+        for row in distances:
+            top = np.argpartition(row, k - 1)[:k] if k < len(row) else np.arange(len(row))
+            top = top[np.argsort(row[top])]
+            results.append([
+                {'text': self.documents[i], 'meta': self.metadatas[i], 'distance': max(float(row[i]), 0.0)}
+                for i in top
+            ])
+        return results
+
+    def memory_bytes(self):
+        return self.embeddings.nbytes + self.norms.nbytes
+
+    def __len__(self):
+        return len(self.ids)
+
+class WardrobeCache:
+    """LRU of per-user WardrobeMatrix entries; an entry is only served while its wardrobe version is current."""
+
+    def __init__(self, max_users):
+        self.max_users = max_users
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_users > 0
+
+    def get(self, user_id, version, loader):
+        """Cached matrix for user_id at version, loading it with loader(user_id) on a miss."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(user_id)
+            else:
+                entry = None
+        record_cache("wardrobe", entry is not None)
+        if entry is not None:
+            return entry
+
+        entry = loader(user_id)
+        if entry is None:
+            return None
+        entry.version = version
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'users': len(self._entries),
+                'items': sum(len(entry) for entry in self._entries.values()),
+                'bytes': sum(entry.memory_bytes() for entry in self._entries.values())
+            }
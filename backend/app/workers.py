@@ -0,0 +1,133 @@
+import gc
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from dotenv import load_dotenv
+from .ingestion import mark_collection, is_collection_ready, share_ingestion_progress, STATUS_PENDING, STATUS_FAILED
+from .embeddings import embedding_threads, set_torch_threads
+from .log import get_logger, reset_after_fork
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Server worker processes; 1 keeps the single uvicorn process, more runs gunicorn (see gunicorn_conf.py)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 1))
+# Shared-memory slots for wardrobe versions across workers
+WARDROBE_VERSION_SLOTS = int(os.getenv("WARDROBE_VERSION_SLOTS", 65536))
+INGESTION_POLL_SECONDS = 1.0
+
+def _ingest(load_datasets, collection_names):
+    from .database import reconnect_chroma, flush_user_styles
+    from .embedding_pool import shutdown_embedding_pool
+    # Forked from the gunicorn master: drop its signal handlers so a plain SIGTERM stops ingestion
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGQUIT, signal.SIGCHLD, signal.SIGUSR1, signal.SIGUSR2):
+        signal.signal(sig, signal.SIG_DFL)
+    reset_after_fork()
+    reconnect_chroma()
+    succeeded = False
+    try:
+        succeeded = load_datasets() is not False
+    finally:
+        # multiprocessing children skip atexit: write buffered rows, release the pool and its shared memory
+        flush_user_styles()
+        shutdown_embedding_pool()
+        # Progress is shared with the workers; nothing may be left pending once this process is gone
+        for name in collection_names:
+            if not is_collection_ready(name):
+                mark_collection(name, STATUS_FAILED, "Ingestion ended before this collection was loaded")
+    if not succeeded:
+        sys.exit(1)
+
+_ingestion_process = None
+
+def start_ingestion(load_datasets, collection_names):
+    """Start dataset ingestion in a forked child and return without waiting for it. Its progress is in
+    shared memory (share_ingestion_progress), so workers forked afterwards serve /health and /ready at once.
+    Embedding in the parent would start torch's OpenMP pool, which does not survive a later fork."""
+    global _ingestion_process
+    share_ingestion_progress(collection_names)
+    for name in collection_names:
+        mark_collection(name, STATUS_PENDING)
+    _ingestion_process = multiprocessing.get_context("fork").Process(
+        target=_ingest, args=(load_datasets, collection_names), name="dataset-ingestion")
+    _ingestion_process.start()
+    logger.info("Started dataset ingestion", extra={'pid': _ingestion_process.pid})
+    return _ingestion_process
+
+def stop_ingestion():
+    """Terminate a still running ingestion process (master shutdown)."""
+    # gunicorn reaps every child itself, so go by the shared progress rather than the exit code alone
+    if _ingestion_process is None or all(is_collection_ready(name) for name in _ingested_collections()):
+        return
+    if _ingestion_process.exitcode is None:
+        _ingestion_process.terminate()
+
+def _ingested_collections():
+    from .database import COLLECTION_MYNTRA_CATALOG, COLLECTION_CELEB_STYLES, COLLECTION_USER_STYLES
+    return [COLLECTION_MYNTRA_CATALOG, COLLECTION_CELEB_STYLES, COLLECTION_USER_STYLES]
+
+def warm_indexes(wait=False):
+    """Build the compressed catalog and celebrity indexes once ingestion has finished, instead of on the first search."""
+    from .database import CHROMA_COLLECTIONS, COLLECTION_MYNTRA_CATALOG, COLLECTION_CELEB_STYLES
+    from .catalog_index import refresh_catalog_index
+    from .celebrity_index import get_celebrity_index
+    catalog_index = refresh_catalog_index(CHROMA_COLLECTIONS.get(COLLECTION_MYNTRA_CATALOG), wait=wait)
+    celebrity_index = get_celebrity_index(CHROMA_COLLECTIONS.get(COLLECTION_CELEB_STYLES))
+    logger.info("Warmed in-memory indexes", extra={
+        'catalog_index': catalog_index is not None,
+        'celebrity_index': celebrity_index is not None
+    })
+
+def _indexed_collections_loaded():
+    """True when the catalog or celebrity collection already holds data (a restart over a loaded store)."""
+    from .database import CHROMA_COLLECTIONS, COLLECTION_MYNTRA_CATALOG, COLLECTION_CELEB_STYLES
+    try:
+        return any(CHROMA_COLLECTIONS[name].count() > 0
+                   for name in (COLLECTION_MYNTRA_CATALOG, COLLECTION_CELEB_STYLES) if name in CHROMA_COLLECTIONS)
+    except Exception as e:
+        logger.warning("Could not count indexed collections: %s", e)
+        return False
+
+def _warm_after_ingestion(collection_names):
+    """Worker side: build only the indexes the master did not (cold start) or that a sync made outdated."""
+    from .database import CHROMA_COLLECTIONS, COLLECTION_MYNTRA_CATALOG, COLLECTION_CELEB_STYLES
+    from .catalog_index import get_catalog_index
+    from .celebrity_index import get_celebrity_index
+    while not all(is_collection_ready(name) for name in collection_names):
+        time.sleep(INGESTION_POLL_SECONDS)
+    get_catalog_index(CHROMA_COLLECTIONS.get(COLLECTION_MYNTRA_CATALOG))
+    get_celebrity_index(CHROMA_COLLECTIONS.get(COLLECTION_CELEB_STYLES))
+
+def preload(load_datasets=None):
+    """Runs once in the gunicorn master before workers fork: the embedding model is already loaded by
+    importing the app and is shared copy-on-write. Ingestion runs in its own process alongside the workers.
+    On a restart over loaded collections the indexes are built here too, so workers share them."""
+    from .database import share_wardrobe_versions
+
+    share_wardrobe_versions(WARDROBE_VERSION_SLOTS)
+    if _indexed_collections_loaded():
+        warm_indexes(wait=True)
+    if load_datasets is not None:
+        start_ingestion(load_datasets, _ingested_collections())
+
+    # Move everything allocated so far out of the collector's reach so worker GC passes
+    # do not write to (and un-share) the parent's pages
+    gc.freeze()
+
+def init_worker(workers=WEB_CONCURRENCY):
+    """Runs in each worker right after fork: per-process log thread, ChromaDB and Gemini clients,
+    and a thread that builds the in-memory indexes once ingestion is done."""
+    from . import database, llm
+
+    reset_after_fork()
+    database.reconnect_chroma()
+    llm.reset_client()
+    threads = embedding_threads(workers)
+    set_torch_threads(threads)
+    threading.Thread(target=_warm_after_ingestion, args=(_ingested_collections(),),
+                     name="warm-indexes", daemon=True).start()
+    logger.info("Worker initialised", extra={'pid': os.getpid(), 'torch_threads': threads})
@@ -0,0 +1,103 @@
+"""
+Recall / memory report for compressed catalog vectors (PCA and int8 quantisation)
+Compares coarse-only and re-ranked results against exact search on the full vectors
+"""
+
+import json
+import time
+import argparse
+from pathlib import Path
+import numpy as np
+
+from app.database import CHROMA_COLLECTIONS, COLLECTION_MYNTRA_CATALOG, create_embedding
+from app.catalog_index import CompressedCatalogIndex, fetch_collection_embeddings, measure_recall
+from benchmark_utils import SAMPLE_QUERIES
+
+def parse_configs(values):
+    """Parse 'mode' or 'mode:dim' strings into (mode, pca_dim) pairs."""
+    configs = []
+    for value in values:
+        mode, _, dim = value.partition(':')
+        configs.append((mode, int(dim) if dim else None))
+    return configs
+
+def exact_top_k(ids, embeddings, norms, query, k):
+    distances = norms - 2 * (embeddings @ query)
+    return [ids[i] for i in np.argsort(distances)[:k]]
+
+def main():
+    parser = argparse.ArgumentParser(description="Report recall@k of compressed catalog search")
+    parser.add_argument("--configs", nargs="+", default=["int8", "pca:64", "pca:128", "pca_int8:64", "pca_int8:128"])
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--catalog-queries", type=int, default=200, help="Catalog documents sampled as extra queries")
+    parser.add_argument("--output", default="compression_results.json")
+    args = parser.parse_args()
+
+    if COLLECTION_MYNTRA_CATALOG not in CHROMA_COLLECTIONS:
+        print("Catalog collection not available. Is ChromaDB running?")
+        return
+
+    collection = CHROMA_COLLECTIONS[COLLECTION_MYNTRA_CATALOG]
+    print("Fetching full catalog vectors...")
+    ids, embeddings = fetch_collection_embeddings(collection)
+    if not ids:
+        print("Catalog collection is empty.")
+        return
+    norms = (embeddings ** 2).sum(axis=1)
+    print(f"Catalog: {len(ids)} products x {embeddings.shape[1]} dims ({embeddings.nbytes / 1e6:.1f} MB float32)")
+
+    # Real outfit-style queries plus catalog documents as held-in queries
+    queries = [create_embedding(text) for text in SAMPLE_QUERIES]
+    rng = np.random.default_rng(0)
+    sampled = rng.choice(len(ids), min(args.catalog_queries, len(ids)), replace=False)
+    sampled_docs = collection.get(ids=[ids[i] for i in sampled], include=['documents'])['documents']
+    queries.extend(create_embedding(doc) for doc in sampled_docs)
+    queries = np.asarray([q for q in queries if q], dtype=np.float32)
+    exact = [set(exact_top_k(ids, embeddings, norms, q, args.k)) for q in queries]
+
+    report = {
+        'products': len(ids),
+        'dimensions': int(embeddings.shape[1]),
+        'full_vector_bytes': int(embeddings.nbytes),
+        'k': args.k,
+        'queries': len(queries),
+        'configs': []
+    }
+
+    for mode, pca_dim in parse_configs(args.configs):
+        index = CompressedCatalogIndex(mode, pca_dim or embeddings.shape[1])
+        start = time.time()
+        index.build(ids, embeddings)
+        build_seconds = time.time() - start
+
+        coarse_recall = measure_recall(index, ids, embeddings, queries, args.k)
+
+        reranked_hits = 0
+        start = time.time()
+        for query, exact_ids in zip(queries, exact):
+            results = index.search(collection, query, n_results=args.k)
+            reranked_hits += len(exact_ids.intersection(results['ids'][0]))
+        search_ms = (time.time() - start) * 1000 / len(queries)
+
+        result = {
+            'mode': mode,
+            'pca_dim': pca_dim if index.uses_pca else None,
+            'code_bytes': index.memory_bytes(),
+            'compression_ratio': round(embeddings.nbytes / max(index.memory_bytes(), 1), 1),
+            'coarse_recall_at_k': round(coarse_recall, 4),
+            'reranked_recall_at_k': round(reranked_hits / (args.k * len(queries)), 4),
+            'rerank_candidates': index.rerank_candidates,
+            'avg_search_ms': round(search_ms, 2),
+            'build_seconds': round(build_seconds, 2)
+        }
+        report['configs'].append(result)
+        print(f"{mode:>9} dim={str(result['pca_dim']):>4}  ratio={result['compression_ratio']:>5}x  "
+              f"coarse R@{args.k}={result['coarse_recall_at_k']:.3f}  reranked R@{args.k}={result['reranked_recall_at_k']:.3f}  "
+              f"{result['avg_search_ms']:.2f} ms/query")
+
+    with open(Path(args.output), 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
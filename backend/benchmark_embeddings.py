@@ -0,0 +1,121 @@
+"""
+Accuracy drift and speed of the embedding backends (torch, onnx, onnx-int8)
+Compares each backend's MiniLM vectors with the reference backend that embedded the stored
+collections: cosine similarity per text, recall@k of queries against a reference-embedded corpus
+(stored vectors kept) and against a corpus re-embedded with the backend, plus encode latency
+"""
+
+import sys
+import time
+import random
+import argparse
+import numpy as np
+
+from app.embeddings import load_embedding_model, EMBEDDING_BACKENDS
+from benchmark_utils import SAMPLE_QUERIES, summarize_latencies, save_results, percentile
+from generate_synthetic_data import product_name
+
+def build_corpus(size, corpus_file=None, seed=0):
+    """Product descriptions from a file (one per line) or generated like the synthetic catalog."""
+    if corpus_file:
+        with open(corpus_file) as f:
+            texts = [line.strip() for line in f if line.strip()]
+        return texts[:size]
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(size):
+        name, category, color = product_name(rng)
+        texts.append(f"A {name}, a {category.lower()} item in {color.lower()}.")
+    return texts
+
+def top_k(corpus, queries, k):
+    scores = queries @ corpus.T
+    return [set(np.argsort(-row)[:k]) for row in scores]
+
+def recall(reference_top, candidate_top, k):
+    hits = sum(len(ref & cand) for ref, cand in zip(reference_top, candidate_top))
+    return hits / (k * len(reference_top)) if reference_top else 0.0
+
+def encode_timings(model, queries, corpus, batch_size, repeats):
+    """Single-query latencies (the /recommend path) and batch throughput (the ingestion path)."""
+    model.encode(queries[0])
+    latencies = []
+    for _ in range(repeats):
+        for query in queries:
+            start = time.perf_counter()
+            model.encode(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+    start = time.perf_counter()
+    model.encode(corpus, batch_size=batch_size)
+    throughput = len(corpus) / (time.perf_counter() - start)
+    return summarize_latencies(latencies), throughput
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure embedding backend drift and speed")
+    parser.add_argument("--backends", nargs="+", choices=EMBEDDING_BACKENDS, default=list(EMBEDDING_BACKENDS),
+                        help="First backend is the reference (the one the stored collections were embedded with)")
+    parser.add_argument("--corpus-size", type=int, default=2000)
+    parser.add_argument("--corpus-file", help="Text file with one product description per line")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--repeats", type=int, default=5, help="Passes over the queries for latency")
+    parser.add_argument("--output", default="embedding_backend_results.json")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.corpus_size, args.corpus_file)
+    queries = list(SAMPLE_QUERIES) + corpus[:200]
+    print(f"Corpus: {len(corpus)} texts, {len(queries)} queries, k={args.k}")
+
+    reference_name = args.backends[0]
+    report = {'reference': reference_name, 'corpus': len(corpus), 'queries': len(queries), 'k': args.k, 'backends': []}
+    reference = None
+
+    # Load every backend up front: a silent torch fallback would report torch's numbers under another name
+    models = {}
+    for backend in args.backends:
+        try:
+            models[backend] = load_embedding_model(backend, strict=True)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            return 1
+
+    for backend in args.backends:
+        model = models[backend]
+
+        corpus_vectors = np.asarray(model.encode(corpus, batch_size=args.batch_size), dtype=np.float32)
+        query_vectors = np.asarray(model.encode(queries, batch_size=args.batch_size), dtype=np.float32)
+        latency, throughput = encode_timings(model, queries[:len(SAMPLE_QUERIES)], corpus, args.batch_size, args.repeats)
+        result = {'backend': backend, 'query_latency': latency,
+                  'batch_texts_per_second': round(throughput, 1)}
+
+        if reference is None:
+            reference = {
+                'corpus': corpus_vectors,
+                'queries': query_vectors,
+                'top': top_k(corpus_vectors, query_vectors, args.k)
+            }
+        else:
+            cosine = (corpus_vectors * reference['corpus']).sum(axis=1) / np.maximum(
+                np.linalg.norm(corpus_vectors, axis=1) * np.linalg.norm(reference['corpus'], axis=1), 1e-12)
+            result.update({
+                'cosine_mean': round(float(cosine.mean()), 5),
+                'cosine_p1': round(float(percentile(cosine.tolist(), 1)), 5),
+                'cosine_min': round(float(cosine.min()), 5),
+                # New query vectors searched against vectors already stored by the reference backend
+                'mixed_recall_at_k': round(recall(reference['top'], top_k(reference['corpus'], query_vectors, args.k), args.k), 4),
+                # Everything re-embedded with this backend
+                'reembedded_recall_at_k': round(recall(reference['top'], top_k(corpus_vectors, query_vectors, args.k), args.k), 4)
+            })
+        report['backends'].append(result)
+
+        line = f"{backend:>9}: p50 {latency['p50_ms']:.2f} ms/query, {result['batch_texts_per_second']:.0f} texts/s"
+        if 'cosine_mean' in result:
+            line += (f", cosine mean {result['cosine_mean']:.4f} min {result['cosine_min']:.4f}, "
+                     f"R@{args.k} mixed {result['mixed_recall_at_k']:.3f} re-embedded {result['reembedded_recall_at_k']:.3f}")
+        print(line)
+
+    save_results(report, args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
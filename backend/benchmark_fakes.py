@@ -0,0 +1,107 @@
+"""
+Deterministic stand-ins for external services used by the offline benchmarks
+A fake Gemini GenerativeModel with canned responses and configurable latency,
+and a local weatherapi.com-compatible stub server
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+FAKE_GEMINI_LATENCY_MS = float(os.getenv("BENCH_GEMINI_LATENCY_MS", 0))
+FAKE_WEATHER_LATENCY_MS = float(os.getenv("BENCH_WEATHER_LATENCY_MS", 0))
+
+CANNED_EMOTION = "casual"
+CANNED_OUTFIT = """1. Light blue linen button-down shirt
+2. Slim fit beige chino trousers
+3. White leather low-top sneakers"""
+CANNED_RECOMMENDATION = (
+    "Channel an easy, relaxed look built around breathable linen and neutral tones. "
+    "Pair the shirt you already own with the chinos, roll the sleeves and finish with clean white sneakers."
+)
+CANNED_VISION = "A light blue cotton casual shirt with a button-down collar, solid color, regular fit."
+
+class FakeUsageMetadata:
+    def __init__(self, prompt_tokens, completion_tokens):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = completion_tokens
+        self.total_token_count = prompt_tokens + completion_tokens
+
+class FakeResponse:
+    def __init__(self, text, prompt_text):
+        self.text = text
+        self.usage_metadata = FakeUsageMetadata(len(prompt_text.split()), len(text.split()))
+
+class FakeGenerativeModel:
+    """Drop-in for genai.GenerativeModel returning canned responses after a fixed latency."""
+
+    latency_ms = FAKE_GEMINI_LATENCY_MS
+    calls = 0
+    _lock = threading.Lock()
+
+    def __init__(self, model_name='gemini-2.5-flash', **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, contents, **kwargs):
+        with FakeGenerativeModel._lock:
+            FakeGenerativeModel.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+        if isinstance(contents, (list, tuple)):
+            prompt_text = " ".join(part for part in contents if isinstance(part, str))
+            if any(isinstance(part, dict) for part in contents):
+                return FakeResponse(CANNED_VISION, prompt_text)
+        else:
+            prompt_text = str(contents)
+
+        if "emotional state" in prompt_text:
+            return FakeResponse(CANNED_EMOTION, prompt_text)
+        if "EXACTLY 3 clothing items" in prompt_text:
+            return FakeResponse(CANNED_OUTFIT, prompt_text)
+        return FakeResponse(CANNED_RECOMMENDATION, prompt_text)
+
+def install_fake_gemini(latency_ms=None):
+    """Replace google.generativeai.GenerativeModel with the fake. Call before importing app modules."""
+    import google.generativeai as genai
+    if latency_ms is not None:
+        FakeGenerativeModel.latency_ms = latency_ms
+    genai.GenerativeModel = FakeGenerativeModel
+    return FakeGenerativeModel
+
+class _WeatherHandler(BaseHTTPRequestHandler):
+    latency_ms = FAKE_WEATHER_LATENCY_MS
+
+    def do_GET(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        location = parse_qs(urlparse(self.path).query).get('q', ['Mumbai'])[0]
+        body = json.dumps({
+            "location": {"name": location},
+            "current": {"temp_c": 29.0, "condition": {"text": "Partly cloudy"}}
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_weather_stub(latency_ms=None):
+    """Start a local weatherapi.com-compatible server. Returns (server, url for WEATHER_API_URL)."""
+    if latency_ms is not None:
+        _WeatherHandler.latency_ms = latency_ms
+    server = ThreadingHTTPServer(("127.0.0.1", free_port()), _WeatherHandler)
+    threading.Thread(target=server.serve_forever, name="weather-stub", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/current.json"
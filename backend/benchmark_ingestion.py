@@ -0,0 +1,172 @@
+"""
+Ingestion throughput benchmark for StyleSense AI
+Generates synthetic datasets at several sizes and measures rows/sec, peak RSS and
+per-stage time for catalog, order-history and celebrity ingestion.
+Each size runs in a fresh process so peak RSS is measured per size.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+
+from benchmark_utils import save_results, load_baseline, compare_to_baseline, print_regressions
+
+RESULT_MARKER = "INGESTION_RESULT "
+BENCH_USER_ID = "bench_ingest_user"
+
+def current_rss_mb():
+    """Resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        return 0.0
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+def run_stage(name, load, count_rows):
+    """Run one ingestion stage and record its timing and memory."""
+    print(f"--- Stage: {name}")
+    start = time.perf_counter()
+    load()
+    seconds = time.perf_counter() - start
+    rows = count_rows()
+    result = {
+        'rows': rows,
+        'seconds': round(seconds, 2),
+        'rows_per_sec': round(rows / seconds, 1) if seconds > 0 else 0.0,
+        'rss_mb': round(current_rss_mb(), 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1)
+    }
+    print(f"    {rows} rows in {seconds:.2f}s ({result['rows_per_sec']} rows/s), peak RSS {result['peak_rss_mb']} MB")
+    return result
+
+def run_one(args):
+    """Child-process entry point: ingest one synthetic data directory and print the stage results."""
+    os.environ["STYLESENSE_DATA_DIR"] = args.data_dir
+    os.environ["CHROMA_MODE"] = args.chroma_mode
+    os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+    from benchmark_fakes import install_fake_gemini
+    install_fake_gemini(args.gemini_latency_ms)
+
+    import app.data_loader as data_loader
+    from app.database import (
+        COLLECTION_MYNTRA_CATALOG, COLLECTION_CELEB_STYLES, get_user_style_count
+    )
+    data_loader.RATE_LIMIT_DELAY = args.vision_delay
+
+    baseline_rss = current_rss_mb()
+    stages = {}
+    stages['catalog'] = run_stage(
+        "catalog",
+        lambda: data_loader.load_product_catalog(sync_mode="skip"),
+        lambda: data_loader.check_collection_exists_and_size(COLLECTION_MYNTRA_CATALOG)
+    )
+    stages['order_history'] = run_stage(
+        "order_history",
+        lambda: data_loader.load_order_history_to_user_styles(BENCH_USER_ID),
+        lambda: get_user_style_count(BENCH_USER_ID)
+    )
+    stages['celebrity'] = run_stage(
+        "celebrity",
+        data_loader.load_celebrity_styles,
+        lambda: data_loader.check_collection_exists_and_size(COLLECTION_CELEB_STYLES)
+    )
+    print(RESULT_MARKER + json.dumps({'startup_rss_mb': round(baseline_rss, 1), 'stages': stages}))
+
+def run_size(args, rows):
+    """Generate data for one size and ingest it in a child process."""
+    from generate_synthetic_data import generate
+
+    data_dir = tempfile.mkdtemp(prefix=f"stylesense_ingest_{rows}_")
+    try:
+        print(f"\n{'=' * 80}\nSize: {rows} rows\n{'=' * 80}")
+        start = time.perf_counter()
+        generate(data_dir, rows, rows, args.images)
+        generate_seconds = time.perf_counter() - start
+
+        command = [sys.executable, os.path.abspath(__file__), "--run-one", "--data-dir", data_dir,
+                   "--chroma-mode", args.chroma_mode, "--vision-delay", str(args.vision_delay)]
+        if args.gemini_latency_ms is not None:
+            command += ["--gemini-latency-ms", str(args.gemini_latency_ms)]
+        process = subprocess.run(command, capture_output=True, text=True,
+                                 cwd=os.path.dirname(os.path.abspath(__file__)))
+
+        result = None
+        for line in process.stdout.splitlines():
+            if line.startswith(RESULT_MARKER):
+                result = json.loads(line[len(RESULT_MARKER):])
+            elif line.startswith("---") or line.startswith("    "):
+                print(line)
+        if result is None:
+            print(process.stdout[-2000:])
+            print(process.stderr[-2000:])
+            return {'rows': rows, 'error': f"Ingestion process exited with code {process.returncode}"}
+
+        result['rows'] = rows
+        result['generate_seconds'] = round(generate_seconds, 2)
+        return result
+    finally:
+        if not args.keep_data:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dataset ingestion on synthetic data")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--images", type=int, default=100, help="Celebrity images per run")
+    parser.add_argument("--chroma-mode", default="ephemeral", choices=["ephemeral", "persistent", "http"])
+    parser.add_argument("--gemini-latency-ms", type=float, default=None, help="Fake Gemini Vision latency")
+    parser.add_argument("--vision-delay", type=float, default=0.0, help="Overrides the loader's per-image rate-limit sleep")
+    parser.add_argument("--keep-data", action="store_true", help="Keep generated data directories")
+    parser.add_argument("--output", default="ingestion_benchmark_results.json")
+    parser.add_argument("--baseline", default="ingestion_benchmark_baseline.json")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--run-one", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        run_one(args)
+        return 0
+
+    results = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'config': {'images': args.images, 'chroma_mode': args.chroma_mode, 'vision_delay': args.vision_delay},
+        'sizes': {str(rows): run_size(args, rows) for rows in args.sizes}
+    }
+
+    print(f"\n{'=' * 80}\nINGESTION SUMMARY\n{'=' * 80}")
+    for rows, result in results['sizes'].items():
+        if 'error' in result:
+            print(f"{rows:>9} rows: {result['error']}")
+            continue
+        stages = result['stages']
+        print(f"{rows:>9} rows: " + "  ".join(
+            f"{name}={stage['rows_per_sec']} rows/s ({stage['seconds']}s)" for name, stage in stages.items()
+        ) + f"  peak RSS {max(stage['peak_rss_mb'] for stage in stages.values())} MB")
+
+    save_results(results, args.output)
+    if args.update_baseline:
+        save_results(results, args.baseline)
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        return 0
+    regressions = compare_to_baseline(results['sizes'], baseline.get('sizes', {}), args.tolerance)
+    print_regressions(regressions, args.tolerance)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
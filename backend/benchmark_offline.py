@@ -0,0 +1,231 @@
+"""
+Offline performance benchmark for StyleSense AI Backend
+Runs the real API against a fake Gemini model, a local weather stub and an
+embedded (ephemeral by default) ChromaDB, then records latency percentiles and
+embedding throughput and compares them against a stored baseline
+"""
+
+import os
+import sys
+import time
+import base64
+import io
+import argparse
+import threading
+import requests
+from PIL import Image, ImageDraw
+
+from benchmark_fakes import install_fake_gemini, start_weather_stub, free_port, FakeGenerativeModel
+from benchmark_utils import summarize_latencies, save_results, load_baseline, compare_to_baseline, print_regressions
+
+BENCH_USER_ID = "bench_user"
+
+CATALOG_COLORS = ["black", "white", "navy blue", "beige", "olive", "maroon", "grey", "light blue"]
+CATALOG_GARMENTS = ["linen shirt", "chino trousers", "denim jacket", "midi dress", "leather sneakers",
+                    "cotton t-shirt", "wool blazer", "pleated skirt", "ankle boots", "knit cardigan"]
+CATALOG_BRANDS = ["Roadster", "HRX", "Mango", "H&M", "Puma", "Levis"]
+CELEBRITIES = ["zendaya", "ranveer_singh", "deepika_padukone", "harry_styles", "emma_stone", "priyanka_chopra"]
+WARDROBE_ITEMS = [
+    "Light blue cotton button-down shirt", "Dark wash slim denim jeans", "White canvas sneakers",
+    "Black wool blazer", "Beige knit cardigan", "Floral print midi dress", "Brown leather belt",
+    "Grey hooded sweatshirt"
+]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline latency/throughput benchmark for the StyleSense API")
+    parser.add_argument("--iterations", type=int, default=30, help="Timed requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed requests per endpoint")
+    parser.add_argument("--gemini-latency-ms", type=float, default=None, help="Fake Gemini latency per call")
+    parser.add_argument("--weather-latency-ms", type=float, default=None, help="Weather stub latency per call")
+    parser.add_argument("--chroma-mode", default="ephemeral", choices=["ephemeral", "persistent", "http"])
+    parser.add_argument("--embedding-texts", type=int, default=256, help="Texts used for embedding throughput")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default="benchmark_baseline.json")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression vs baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline")
+    return parser.parse_args()
+
+def configure_environment(args, weather_url):
+    """Point the app at offline stand-ins. Must run before any app module is imported."""
+    os.environ["CHROMA_MODE"] = args.chroma_mode
+    os.environ["WEATHER_API_URL"] = weather_url
+    os.environ["WEATHER_API_KEY"] = "offline-benchmark"
+    os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+    # Repeated identical requests would otherwise be served from the response cache
+    os.environ.setdefault("RECOMMENDATION_CACHE_TTL", "0")
+
+def create_test_image(text="Benchmark Item", size=(400, 400)):
+    """Same synthetic clothing image as the system test suite."""
+    img = Image.new('RGB', size, color='lightblue')
+    draw = ImageDraw.Draw(img)
+    draw.text((50, 50), text, fill='black')
+    draw.rectangle([100, 100, 300, 350], outline='darkblue', width=3)
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG')
+    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+def seed_collections():
+    """Load a small deterministic catalog, celebrity set and wardrobe into the collections."""
+    from app.database import (
+        CHROMA_COLLECTIONS, COLLECTION_MYNTRA_CATALOG, COLLECTION_CELEB_STYLES,
+        create_embeddings, add_user_style_item, clear_user_styles
+    )
+
+    catalog = CHROMA_COLLECTIONS[COLLECTION_MYNTRA_CATALOG]
+    if catalog.count() == 0:
+        documents, metadatas, ids = [], [], []
+        for i, (color, garment) in enumerate((c, g) for c in CATALOG_COLORS for g in CATALOG_GARMENTS):
+            brand = CATALOG_BRANDS[i % len(CATALOG_BRANDS)]
+            documents.append(f"{color.title()} {garment} by {brand}")
+            metadatas.append({'brand': brand, 'link': f"https://www.myntra.com/bench/{i}", 'name': f"{color} {garment}"})
+            ids.append(f"prod_bench_{i}")
+        catalog.add(embeddings=create_embeddings(documents), documents=documents, metadatas=metadatas, ids=ids)
+
+    celebs = CHROMA_COLLECTIONS[COLLECTION_CELEB_STYLES]
+    if celebs.count() == 0:
+        documents = [f"{name.replace('_', ' ').title()} wearing a {garment} in {color}"
+                     for name in CELEBRITIES for color, garment in zip(CATALOG_COLORS[:3], CATALOG_GARMENTS[:3])]
+        metadatas = [{'celebrity': f"{name}_{i}", 'image_url': f"local://bench/{name}_{i}.jpg"}
+                     for name in CELEBRITIES for i in range(3)]
+        celebs.add(embeddings=create_embeddings(documents), documents=documents, metadatas=metadatas,
+                   ids=[f"celeb_bench_{i}" for i in range(len(documents))])
+
+    clear_user_styles(BENCH_USER_ID)
+    for description in WARDROBE_ITEMS:
+        add_user_style_item(BENCH_USER_ID, description, 'wardrobe_upload', {'upload_method': 'benchmark'})
+
+def start_api_server(port):
+    """Run the FastAPI app with uvicorn on a background thread."""
+    import uvicorn
+    from app.api import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="benchmark-api", daemon=True).start()
+    deadline = time.time() + 30
+    while not server.started and time.time() < deadline:
+        time.sleep(0.05)
+    if not server.started:
+        raise RuntimeError("API server did not start within 30 seconds")
+    return server
+
+def time_requests(name, send, iterations, warmup):
+    """Time a request function; returns (latency summary, error count)."""
+    for _ in range(warmup):
+        send()
+    latencies = []
+    errors = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        try:
+            response = send()
+            if response.status_code >= 400:
+                errors += 1
+        except Exception as e:
+            print(f"     {name} request failed: {e}")
+            errors += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+    summary = summarize_latencies(latencies)
+    summary['errors'] = errors
+    print(f"{name:>10}: p50={summary['p50_ms']:.1f} ms  p95={summary['p95_ms']:.1f} ms  "
+          f"p99={summary['p99_ms']:.1f} ms  errors={errors}")
+    return summary
+
+def measure_embedding_throughput(n_texts):
+    """Single-call and batched embedding throughput in texts per second."""
+    from app.database import create_embedding, create_embeddings
+
+    texts = [f"{color} {garment} for a {mood} look" for color in CATALOG_COLORS for garment in CATALOG_GARMENTS
+             for mood in ("casual", "formal", "party", "weekend")][:n_texts]
+    create_embedding(texts[0])
+
+    start = time.perf_counter()
+    for text in texts:
+        create_embedding(text)
+    single_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    create_embeddings(texts)
+    batch_seconds = time.perf_counter() - start
+
+    result = {
+        'texts': len(texts),
+        'single_texts_per_sec': round(len(texts) / single_seconds, 1),
+        'batch_texts_per_sec': round(len(texts) / batch_seconds, 1)
+    }
+    print(f" embedding: single={result['single_texts_per_sec']:.1f} texts/s  batch={result['batch_texts_per_sec']:.1f} texts/s")
+    return result
+
+def main():
+    args = parse_args()
+
+    weather_server, weather_url = start_weather_stub(args.weather_latency_ms)
+    configure_environment(args, weather_url)
+    install_fake_gemini(args.gemini_latency_ms)
+
+    print("=" * 80)
+    print("StyleSense AI - OFFLINE PERFORMANCE BENCHMARK")
+    print("=" * 80)
+    print(f"Chroma mode: {args.chroma_mode}  Fake Gemini latency: {FakeGenerativeModel.latency_ms} ms")
+    print()
+
+    seed_collections()
+    port = free_port()
+    server = start_api_server(port)
+    base_url = f"http://127.0.0.1:{port}"
+    session = requests.Session()
+    image_b64 = create_test_image()
+
+    endpoints = {
+        'recommend': time_requests("recommend", lambda: session.post(f"{base_url}/recommend", json={
+            "user_id": BENCH_USER_ID,
+            "user_prompt": "Something casual and cozy for a coffee date",
+            "current_location": "Mumbai"
+        }), args.iterations, args.warmup),
+        'upload': time_requests("upload", lambda: session.post(f"{base_url}/user/styles/upload-base64", json={
+            "user_id": BENCH_USER_ID,
+            "image_base64": image_b64
+        }), args.iterations, args.warmup),
+        'status': time_requests("status", lambda: session.get(f"{base_url}/user/{BENCH_USER_ID}/status"),
+                                args.iterations, args.warmup),
+    }
+    embedding = measure_embedding_throughput(args.embedding_texts)
+
+    server.should_exit = True
+    weather_server.shutdown()
+
+    results = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'config': {
+            'iterations': args.iterations,
+            'chroma_mode': args.chroma_mode,
+            'gemini_latency_ms': FakeGenerativeModel.latency_ms,
+            'weather_latency_ms': args.weather_latency_ms or 0,
+            'python': sys.version.split()[0]
+        },
+        'endpoints': endpoints,
+        'embedding': embedding,
+        'gemini_calls': FakeGenerativeModel.calls
+    }
+
+    print()
+    save_results(results, args.output)
+
+    if args.update_baseline:
+        save_results(results, args.baseline)
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+
+    regressions = compare_to_baseline(
+        {'endpoints': endpoints, 'embedding': embedding},
+        {'endpoints': baseline.get('endpoints', {}), 'embedding': baseline.get('embedding', {})},
+        args.tolerance
+    )
+    print_regressions(regressions, args.tolerance)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
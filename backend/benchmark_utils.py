@@ -0,0 +1,92 @@
+"""
+Shared helpers for the StyleSense AI benchmark and load-test scripts
+Latency summaries, JSON result files and baseline comparison
+"""
+
+import json
+import math
+from pathlib import Path
+
+# Outfit-style search queries shared by the embedding / catalog search benchmarks
+SAMPLE_QUERIES = [
+    "A tailored navy blue blazer",
+    "White silk blouse with subtle texture",
+    "High-waisted black trousers",
+    "Comfortable jeans",
+    "Soft cotton t-shirt",
+    "Lightweight cardigan",
+    "Little black dress",
+    "Flowy midi dress",
+    "Statement jacket",
+    "White canvas sneakers",
+    "Brown suede ankle boots",
+    "Floral print summer dress",
+]
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+def summarize_latencies(latencies_ms):
+    """p50/p95/p99/mean/max summary of latencies in milliseconds."""
+    if not latencies_ms:
+        return {'count': 0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'mean_ms': 0.0, 'max_ms': 0.0}
+    return {
+        'count': len(latencies_ms),
+        'p50_ms': round(percentile(latencies_ms, 50), 2),
+        'p95_ms': round(percentile(latencies_ms, 95), 2),
+        'p99_ms': round(percentile(latencies_ms, 99), 2),
+        'mean_ms': round(sum(latencies_ms) / len(latencies_ms), 2),
+        'max_ms': round(max(latencies_ms), 2)
+    }
+
+def save_results(results, path):
+    """Write results as indented JSON, like test_results.json."""
+    with open(Path(path), 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"📄 Detailed results saved to: {path}")
+
+def load_baseline(path):
+    """Load a stored baseline, or None if it does not exist yet."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def compare_to_baseline(current, baseline, tolerance=0.2, ignore=('max_ms',)):
+    """
+    Compare benchmark metrics against a baseline.
+    Keys ending in _ms are lower-is-better, keys ending in _per_sec are higher-is-better.
+    Returns a list of regressions exceeding the relative tolerance.
+    """
+    regressions = []
+
+    def walk(cur, base, path):
+        if isinstance(cur, dict) and isinstance(base, dict):
+            for key, value in cur.items():
+                if key in base and key not in ignore:
+                    walk(value, base[key], f"{path}.{key}" if path else key)
+            return
+        if not isinstance(cur, (int, float)) or not isinstance(base, (int, float)) or base <= 0:
+            return
+        if path.endswith('_ms') and cur > base * (1 + tolerance):
+            regressions.append({'metric': path, 'baseline': base, 'current': cur, 'change_pct': round(100 * (cur / base - 1), 1)})
+        elif path.endswith('_per_sec') and cur < base * (1 - tolerance):
+            regressions.append({'metric': path, 'baseline': base, 'current': cur, 'change_pct': round(100 * (cur / base - 1), 1)})
+
+    walk(current, baseline, "")
+    return regressions
+
+def print_regressions(regressions, tolerance):
+    """Print a baseline comparison report."""
+    if not regressions:
+        print(f"✅ No regressions beyond {tolerance * 100:.0f}% of baseline")
+        return
+    print(f"❌ {len(regressions)} regression(s) beyond {tolerance * 100:.0f}% of baseline:")
+    for regression in regressions:
+        print(f"   • {regression['metric']}: {regression['baseline']} -> {regression['current']} ({regression['change_pct']:+.1f}%)")
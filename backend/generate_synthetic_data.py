@@ -0,0 +1,98 @@
+"""
+Synthetic dataset generator for StyleSense AI ingestion benchmarks
+Writes a Myntra-style catalog (name, seller, purl), an Order_History.csv and a
+Celeb_FBI_Dataset image directory with the same layout the data loader expects
+"""
+
+import os
+import csv
+import random
+import argparse
+from PIL import Image, ImageDraw
+
+COLORS = ["Black", "White", "Navy Blue", "Beige", "Olive", "Maroon", "Grey", "Light Blue", "Mustard",
+          "Pink", "Teal", "Rust", "Lavender", "Charcoal", "Cream", "Burgundy"]
+FITS = ["Slim Fit", "Regular Fit", "Relaxed Fit", "Oversized", "Tailored", "Cropped", "High-Rise", "A-Line"]
+MATERIALS = ["Cotton", "Linen", "Denim", "Wool Blend", "Silk", "Polyester", "Leather", "Knit", "Corduroy", "Satin"]
+GARMENTS = [("Shirt", "Apparel"), ("T-shirt", "Apparel"), ("Jeans", "Apparel"), ("Trousers", "Apparel"),
+            ("Blazer", "Apparel"), ("Kurta", "Apparel"), ("Midi Dress", "Apparel"), ("Skirt", "Apparel"),
+            ("Jacket", "Apparel"), ("Cardigan", "Apparel"), ("Sneakers", "Footwear"), ("Ankle Boots", "Footwear"),
+            ("Loafers", "Footwear"), ("Handbag", "Bag"), ("Backpack", "Bag"), ("Necklace", "Jewelry"),
+            ("Belt", "Accessories"), ("Sunglasses", "Accessories")]
+SELLERS = ["Roadster", "HRX by Hrithik Roshan", "Mango", "H&M", "Puma", "Levis", "WROGN", "Anouk",
+           "Libas", "U.S. Polo Assn.", "Van Heusen", "ONLY", "Nike", "Allen Solly", "FabAlley", "Bata"]
+NON_FASHION = [("Stainless Steel Water Bottle", "Kitchen"), ("Wireless Earbuds", "Electronics"),
+               ("Notebook Set", "Stationery")]
+CELEBRITIES = ["zendaya", "ranveer singh", "deepika padukone", "harry styles", "emma stone", "priyanka chopra",
+               "shah rukh khan", "rihanna", "alia bhatt", "timothee chalamet", "kareena kapoor", "ryan reynolds"]
+
+def product_name(rng):
+    color = rng.choice(COLORS)
+    garment, category = rng.choice(GARMENTS)
+    return f"{rng.choice(FITS)} {color} {rng.choice(MATERIALS)} {garment}", category, color
+
+def write_catalog(path, rows, seed=0, duplicate_rate=0.01):
+    """Myntra-style catalog CSV with name, seller and purl columns (plus a few duplicate rows)."""
+    rng = random.Random(seed)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'name', 'seller', 'purl', 'price', 'rating'])
+        last = None
+        for i in range(rows):
+            if last and rng.random() < duplicate_rate:
+                writer.writerow([i] + last)
+                continue
+            name, _, _ = product_name(rng)
+            seller = rng.choice(SELLERS)
+            purl = f"https://www.myntra.com/synthetic/{seller.lower().replace(' ', '-')}/{i}/buy"
+            last = [name, seller, purl, rng.randint(299, 7999), round(rng.uniform(2.5, 5.0), 1)]
+            writer.writerow([i] + last)
+    print(f"Wrote {rows} catalog rows to {path}")
+
+def write_order_history(path, rows, seed=1, non_fashion_rate=0.1):
+    """Order_History.csv with Product_Description and Product_Category columns."""
+    rng = random.Random(seed)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Order_ID', 'Product_Description', 'Product_Category'])
+        for i in range(rows):
+            if rng.random() < non_fashion_rate:
+                description, category = rng.choice(NON_FASHION)
+            else:
+                description, category, _ = product_name(rng)
+            writer.writerow([f"ORD{i:08d}", description, category])
+    print(f"Wrote {rows} order history rows to {path}")
+
+def write_celebrity_images(directory, count, seed=2, size=(256, 320)):
+    """Simple generated outfit images named <celebrity>_<n>.jpg."""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    palette = [(20, 20, 20), (240, 240, 240), (30, 50, 110), (220, 200, 170), (110, 120, 60), (120, 20, 40)]
+    for i in range(count):
+        celebrity = CELEBRITIES[i % len(CELEBRITIES)]
+        img = Image.new('RGB', size, color=rng.choice(palette))
+        draw = ImageDraw.Draw(img)
+        draw.rectangle([60, 60, 196, 180], fill=rng.choice(palette), outline=(0, 0, 0), width=2)
+        draw.rectangle([80, 180, 176, 300], fill=rng.choice(palette), outline=(0, 0, 0), width=2)
+        draw.text((10, 10), celebrity.title(), fill=(255, 0, 0))
+        img.save(os.path.join(directory, f"{celebrity.replace(' ', '_')}_{i // len(CELEBRITIES)}.jpg"), quality=80)
+    print(f"Wrote {count} celebrity images to {directory}")
+
+def generate(output_dir, catalog_rows, order_rows, images):
+    """Write a complete synthetic data directory laid out like backend/data."""
+    os.makedirs(output_dir, exist_ok=True)
+    write_catalog(os.path.join(output_dir, "myntra202305041052.csv"), catalog_rows)
+    write_order_history(os.path.join(output_dir, "Order_History.csv"), order_rows)
+    write_celebrity_images(os.path.join(output_dir, "Celeb_FBI_Dataset"), images)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Myntra / order history / celebrity datasets")
+    parser.add_argument("--output-dir", default="synthetic_data")
+    parser.add_argument("--rows", type=int, default=10000, help="Catalog rows")
+    parser.add_argument("--orders", type=int, default=None, help="Order history rows (defaults to --rows)")
+    parser.add_argument("--images", type=int, default=100, help="Celebrity images")
+    args = parser.parse_args()
+    generate(args.output_dir, args.rows, args.orders if args.orders is not None else args.rows, args.images)
+
+if __name__ == "__main__":
+    main()
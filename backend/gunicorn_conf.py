@@ -0,0 +1,34 @@
+"""
+Gunicorn settings for multi-worker serving
+Usage: gunicorn -c gunicorn_conf.py app.api:app   (or WEB_CONCURRENCY=4 python main.py)
+The app is imported and preloaded once in the master, then shared copy-on-write with the workers;
+each worker opens its own ChromaDB and Gemini clients after fork. Dataset ingestion runs in a
+separate process started by the master, so workers serve /health and /ready while it runs.
+"""
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = os.getenv("BIND", "0.0.0.0:8080")
+workers = max(int(os.getenv("WEB_CONCURRENCY", 2)), 1)
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", 120))
+graceful_timeout = 30
+loglevel = "info"
+
+def when_ready(server):
+    """Master, after app import and before the first fork: start ingestion without waiting for it."""
+    from main import load_datasets
+    from app.workers import preload
+    preload(load_datasets)
+
+def post_fork(server, worker):
+    from app.workers import init_worker
+    init_worker(server.cfg.workers)
+
+def on_exit(server):
+    from app.workers import stop_ingestion
+    stop_ingestion()
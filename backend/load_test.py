@@ -0,0 +1,315 @@
+"""
+Concurrent load test for StyleSense AI Backend
+Replays the StyleSenseTestSuite scenarios (status, base64 upload, load-orders,
+recommend) from many virtual users and reports throughput, latency percentiles
+and error rates per endpoint. A step sweep finds the saturation point.
+"""
+
+import sys
+import time
+import random
+import argparse
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+from complete_sys_test import StyleSenseTestSuite, API_BASE_URL
+from benchmark_utils import summarize_latencies, save_results, load_baseline, compare_to_baseline, print_regressions
+
+DEFAULT_MIX = "recommend=5,status=3,upload=1,load_orders=1"
+RECOMMEND_PROMPTS = [
+    "I need a confident outfit for a job interview",
+    "Something casual and cozy for a coffee date",
+    "I want to look elegant for a dinner party"
+]
+
+def parse_mix(mix):
+    """Parse 'recommend=5,status=3' into {scenario: weight}."""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}'. Choose from: {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    if not any(weights.values()):
+        raise ValueError("Scenario mix has no positive weights")
+    return weights
+
+class VirtualUser:
+    """One simulated client with its own HTTP session and user ID."""
+
+    def __init__(self, base_url, user_id, image_b64):
+        self.base_url = base_url
+        self.user_id = user_id
+        self.image_b64 = image_b64
+        self.session = requests.Session()
+
+    def status(self):
+        return self.session.get(f"{self.base_url}/user/{self.user_id}/status")
+
+    def upload(self):
+        return self.session.post(f"{self.base_url}/user/styles/upload-base64", json={
+            "user_id": self.user_id,
+            "image_base64": self.image_b64
+        })
+
+    def load_orders(self):
+        return self.session.post(f"{self.base_url}/user/styles/load-orders", data={"user_id": self.user_id})
+
+    def recommend(self):
+        return self.session.post(f"{self.base_url}/recommend", json={
+            "user_id": self.user_id,
+            "user_prompt": random.choice(RECOMMEND_PROMPTS),
+            "current_location": "Mumbai"
+        })
+
+SCENARIOS = {
+    'status': VirtualUser.status,
+    'upload': VirtualUser.upload,
+    'load_orders': VirtualUser.load_orders,
+    'recommend': VirtualUser.recommend,
+}
+
+class LoadRecorder:
+    """Thread-safe collection of per-request outcomes."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def begin(self):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def record(self, scenario, latency_ms, ok, status_code):
+        with self.lock:
+            self.in_flight -= 1
+            self.samples.setdefault(scenario, []).append((latency_ms, ok, status_code))
+
+    def summary(self, elapsed):
+        """Per-endpoint throughput, latency percentiles and error rates."""
+        endpoints = {}
+        all_latencies, total_errors = [], 0
+        for scenario, samples in sorted(self.samples.items()):
+            latencies = [latency for latency, _, _ in samples]
+            errors = sum(1 for _, ok, _ in samples if not ok)
+            status_codes = {}
+            for _, _, code in samples:
+                status_codes[str(code)] = status_codes.get(str(code), 0) + 1
+            endpoint = summarize_latencies(latencies)
+            endpoint.update({
+                'throughput_per_sec': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+                'errors': errors,
+                'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+                'status_codes': status_codes
+            })
+            endpoints[scenario] = endpoint
+            all_latencies.extend(latencies)
+            total_errors += errors
+
+        overall = summarize_latencies(all_latencies)
+        overall.update({
+            'throughput_per_sec': round(len(all_latencies) / elapsed, 2) if elapsed else 0.0,
+            'errors': total_errors,
+            'error_rate': round(total_errors / len(all_latencies), 4) if all_latencies else 0.0,
+            'max_in_flight': self.max_in_flight,
+            'elapsed_seconds': round(elapsed, 2)
+        })
+        return {'overall': overall, 'endpoints': endpoints}
+
+def execute(user, scenario, recorder, scheduled_at=None):
+    """Send one request. Open-loop latency counts from the scheduled time to avoid coordinated omission."""
+    recorder.begin()
+    start = scheduled_at if scheduled_at is not None else time.perf_counter()
+    ok, status_code = False, 'error'
+    try:
+        response = SCENARIOS[scenario](user)
+        status_code = response.status_code
+        ok = response.status_code < 400
+    except requests.RequestException:
+        pass
+    recorder.record(scenario, (time.perf_counter() - start) * 1000, ok, status_code)
+
+def run_closed_loop(users, weights, duration, ramp_up, think_time):
+    """Each virtual user sends a request, waits for it, thinks, and repeats. Users start staggered over ramp_up."""
+    recorder = LoadRecorder()
+    scenarios, scenario_weights = list(weights), list(weights.values())
+    start = time.perf_counter()
+    end = start + duration
+
+    def loop(index, user):
+        time.sleep(ramp_up * index / max(len(users), 1))
+        while time.perf_counter() < end:
+            execute(user, random.choices(scenarios, scenario_weights)[0], recorder)
+            if think_time:
+                time.sleep(random.expovariate(1.0 / think_time))
+
+    threads = [threading.Thread(target=loop, args=(i, user), daemon=True) for i, user in enumerate(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.summary(time.perf_counter() - start)
+
+def run_open_loop(users, weights, duration, ramp_up, rate, max_concurrency):
+    """Poisson arrivals at `rate` req/s (ramped linearly over ramp_up), independent of response times."""
+    recorder = LoadRecorder()
+    scenarios, scenario_weights = list(weights), list(weights.values())
+    start = time.perf_counter()
+    next_arrival = start
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        while True:
+            elapsed = next_arrival - start
+            if elapsed >= duration:
+                break
+            next_arrival += random.expovariate(rate)
+            # Thinning: during ramp-up keep each full-rate arrival with probability elapsed/ramp_up
+            if ramp_up and random.random() > elapsed / ramp_up:
+                continue
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(execute, random.choice(users), random.choices(scenarios, scenario_weights)[0],
+                            recorder, next_arrival)
+    return recorder.summary(time.perf_counter() - start)
+
+def prepare_users(suite, count, prefix, wardrobe_items):
+    """Create virtual users and give each a small wardrobe so /recommend has data to work with."""
+    image_b64 = suite.create_test_image("Load Test Item")
+    users = [VirtualUser(suite.base_url, f"{prefix}_{i}", image_b64) for i in range(count)]
+    for user in users:
+        for _ in range(wardrobe_items):
+            user.upload()
+    return users
+
+def print_step(label, result):
+    overall = result['overall']
+    print(f"{label:>12}: {overall['throughput_per_sec']:>8.2f} req/s  p50={overall['p50_ms']:.0f} ms  "
+          f"p95={overall['p95_ms']:.0f} ms  p99={overall['p99_ms']:.0f} ms  errors={overall['error_rate'] * 100:.1f}%")
+    for scenario, endpoint in result['endpoints'].items():
+        print(f"{'':>14}{scenario:<12} {endpoint['throughput_per_sec']:>7.2f} req/s  p50={endpoint['p50_ms']:.0f} ms  "
+              f"p95={endpoint['p95_ms']:.0f} ms  p99={endpoint['p99_ms']:.0f} ms  errors={endpoint['errors']}")
+
+def find_saturation(steps, min_gain, max_error_rate):
+    """First step where throughput stops growing by min_gain or the error rate exceeds max_error_rate."""
+    previous = None
+    for step in steps:
+        overall = step['result']['overall']
+        if overall['error_rate'] > max_error_rate:
+            return {'step': step['load'], 'reason': f"error rate {overall['error_rate'] * 100:.1f}%"}
+        if previous and overall['throughput_per_sec'] < previous['throughput_per_sec'] * (1 + min_gain):
+            return {'step': step['load'], 'reason': f"throughput gain below {min_gain * 100:.0f}%"}
+        previous = overall
+    return None
+
+def compare_runs(paths):
+    """Print peak throughput of several saved runs side by side (e.g. 1, 2 and 4 workers)."""
+    print(f"{'label':<20} {'workers':>7} {'peak req/s':>11} {'at load':>8} {'saturation':>11}")
+    for path in paths:
+        run = load_baseline(path)
+        if run is None:
+            print(f"{path}: not found")
+            continue
+        best = max(run['steps'], key=lambda step: step['result']['overall']['throughput_per_sec'])
+        saturation = run.get('saturation') or {}
+        print(f"{run['config'].get('label') or path:<20} {str(run['config'].get('workers') or '-'):>7} "
+              f"{best['result']['overall']['throughput_per_sec']:>11.2f} {best['load']:>8} "
+              f"{str(saturation.get('step', '-')):>11}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the StyleSense API")
+    parser.add_argument("--base-url", default=API_BASE_URL)
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed",
+                        help="closed: fixed virtual users; open: fixed arrival rate")
+    parser.add_argument("--steps", type=float, nargs="+", default=[1, 2, 4, 8, 16],
+                        help="Virtual users (closed) or requests/sec (open) per step")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per step")
+    parser.add_argument("--ramp-up", type=float, default=5, help="Seconds to reach full load in each step")
+    parser.add_argument("--think-time", type=float, default=0, help="Mean think time between requests (closed)")
+    parser.add_argument("--max-concurrency", type=int, default=256, help="Client thread cap (open)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Scenario weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--user-pool", type=int, default=None,
+                        help="Distinct user IDs (default: largest step in closed mode, 16 in open mode)")
+    parser.add_argument("--user-prefix", default="load_test_user")
+    parser.add_argument("--wardrobe-items", type=int, default=1, help="Uploads per user before the run")
+    parser.add_argument("--min-gain", type=float, default=0.1, help="Throughput gain below which a step is saturated")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--workers", type=int, default=None, help="Server worker count, recorded with the results")
+    parser.add_argument("--label", default=None)
+    parser.add_argument("--output", default="load_test_results.json")
+    parser.add_argument("--baseline", default=None, help="Fail on >tolerance regression vs this result file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--compare", nargs="+", metavar="RESULTS", help="Compare saved runs and exit")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.compare:
+        compare_runs(args.compare)
+        return 0
+
+    weights = parse_mix(args.mix)
+    suite = StyleSenseTestSuite(args.base_url)
+
+    print("=" * 80)
+    print("StyleSense AI - LOAD TEST")
+    print("=" * 80)
+    print(f"API Base URL: {args.base_url}  Mode: {args.mode}  Mix: {weights}")
+    print()
+    if not suite.test_api_health():
+        print("❌ Critical: API not accessible. Stopping load test.")
+        return 1
+
+    pool_size = args.user_pool or (int(max(args.steps)) if args.mode == "closed" else 16)
+    print(f"Preparing {pool_size} virtual users...")
+    users = prepare_users(suite, pool_size, args.user_prefix, args.wardrobe_items)
+
+    steps = []
+    for load in args.steps:
+        if args.mode == "closed":
+            result = run_closed_loop(users[:int(load)], weights, args.duration, args.ramp_up, args.think_time)
+            label = f"{int(load)} users"
+        else:
+            result = run_open_loop(users, weights, args.duration, args.ramp_up, load, args.max_concurrency)
+            label = f"{load:g} req/s"
+        print_step(label, result)
+        steps.append({'load': load, 'result': result})
+
+    saturation = find_saturation(steps, args.min_gain, args.max_error_rate)
+    print()
+    if saturation:
+        print(f"⚠️  Saturation at {saturation['step']:g} ({saturation['reason']})")
+    else:
+        print("✅ No saturation within the tested steps")
+
+    results = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'config': {
+            'base_url': args.base_url, 'mode': args.mode, 'mix': weights, 'duration': args.duration,
+            'ramp_up': args.ramp_up, 'think_time': args.think_time, 'workers': args.workers, 'label': args.label
+        },
+        'steps': steps,
+        'saturation': saturation
+    }
+    save_results(results, args.output)
+
+    if not args.baseline:
+        return 0
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}")
+        return 0
+    regressions = compare_to_baseline(
+        {str(step['load']): step['result'] for step in steps},
+        {str(step['load']): step['result'] for step in baseline.get('steps', [])},
+        args.tolerance
+    )
+    print_regressions(regressions, args.tolerance)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
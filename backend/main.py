@@ -21,6 +21,7 @@ def check_environment():
     optional_vars = {
         "CHROMA_HOST": "localhost",
         "CHROMA_PORT": "8000", 
+        "CHROMA_MODE": "http",
         "MOCK_USER_ID": "test_user"
     }
     
@@ -55,6 +56,7 @@ def load_datasets():
             print("Error: Cannot connect to ChromaDB. Please ensure ChromaDB server is running.")
             print("Start ChromaDB with: chroma run --host localhost --port 8000")
             print("Or install and run: pip install chromadb && chroma run")
+            print("Or run without a server: set CHROMA_MODE=persistent (or ephemeral) in .env")
             return False
             
         if not CHROMA_COLLECTIONS:
@@ -72,6 +74,12 @@ def load_datasets():
         print("Make sure ChromaDB is running and files exist in the data directory.")
         return False
 
+def run_workers(workers):
+    """Hand over to gunicorn: app preloaded once, then forked into UvicornWorkers (see gunicorn_conf.py)."""
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    os.chdir(current_dir)
+    os.execvp(sys.executable, [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "app.api:app"])
+
 def main():
     """Main entry point with proper startup sequence."""
     print("=" * 60)
@@ -83,16 +91,32 @@ def main():
         print("Environment check failed. Please fix the issues above.")
         sys.exit(1)
     
-    # Load datasets (non-blocking)
-    load_datasets()
+    workers = int(os.getenv("WEB_CONCURRENCY", 1))
+    if workers > 1 and os.getenv("CHROMA_MODE", "http").lower() != "http":
+        # Embedded ChromaDB cannot be opened by several processes at once
+        print(f"WEB_CONCURRENCY={workers} needs CHROMA_MODE=http; starting a single worker instead.")
+        workers = 1
     
     # Import and start the API server
     print("\n" + "=" * 60)
-    print("Starting API Server on http://0.0.0.0:8080")
+    print(f"Starting API Server on http://0.0.0.0:8080 ({workers} worker{'s' if workers > 1 else ''})")
     print("=" * 60)
     
+    if workers > 1:
+        run_workers(workers)
+    
     try:
         from app.api import app
+        from app.ingestion import start_background_ingestion
+        from app.workers import warm_indexes
+        from app.database import COLLECTION_USER_STYLES, COLLECTION_MYNTRA_CATALOG, COLLECTION_CELEB_STYLES
+        
+        # Load datasets in the background; progress is reported on /ready
+        start_background_ingestion(
+            load_datasets,
+            [COLLECTION_MYNTRA_CATALOG, COLLECTION_CELEB_STYLES, COLLECTION_USER_STYLES],
+            on_finished=warm_indexes
+        )
         
         uvicorn.run(
             app, 
@@ -0,0 +1,103 @@
+"""
+Move User_Styles items between storage layouts (shared, sharded, per_user)
+Copies every item with its stored embedding into the collection the target layout routes its user to.
+Run with the API stopped, then start it with USER_STYLES_STORAGE set to the target layout.
+"""
+
+import argparse
+import sys
+import time
+
+from app.database import (
+    CHROMA_CLIENT, COLLECTION_USER_STYLES, USER_STYLES_PER_USER_PREFIX, USER_STYLES_STORAGE_MODES,
+    chroma_call, user_styles_collection_name, user_styles_shard_name
+)
+
+def source_collection_names(client, storage, shards):
+    if storage == "shared":
+        return [COLLECTION_USER_STYLES]
+    existing = [getattr(c, 'name', c) for c in chroma_call("list_collections", client.list_collections)]
+    if storage == "sharded":
+        names = {user_styles_shard_name(shard) for shard in range(shards)}
+        return sorted(name for name in existing if name in names)
+    return sorted(name for name in existing if name.startswith(USER_STYLES_PER_USER_PREFIX))
+
+def migrate_collection(client, source_name, target_storage, target_shards, batch_size, delete_source, dry_run):
+    """Copy one source collection page by page; returns (copied, skipped)."""
+    source = chroma_call("get_collection", client.get_collection, name=source_name)
+    targets = {}
+    copied, skipped, migrated_ids = 0, 0, []
+    offset = 0
+    while True:
+        page = chroma_call("get", source.get,
+            include=['embeddings', 'documents', 'metadatas'], limit=batch_size, offset=offset
+        )
+        if not page['ids']:
+            break
+        offset += len(page['ids'])
+
+        groups = {}
+        for i, item_id in enumerate(page['ids']):
+            meta = page['metadatas'][i] or {}
+            user_id = meta.get('user_id')
+            if not user_id:
+                skipped += 1
+                continue
+            target_name = user_styles_collection_name(user_id, target_storage, target_shards)
+            if target_name == source_name:
+                continue
+            group = groups.setdefault(target_name, {'ids': [], 'embeddings': [], 'documents': [], 'metadatas': []})
+            group['ids'].append(item_id)
+            group['embeddings'].append(list(page['embeddings'][i]))
+            group['documents'].append(page['documents'][i])
+            group['metadatas'].append(meta)
+
+        for target_name, group in groups.items():
+            if not dry_run:
+                if target_name not in targets:
+                    targets[target_name] = chroma_call("get_or_create_collection", client.get_or_create_collection, name=target_name)
+                chroma_call("upsert", targets[target_name].upsert, **group)
+            copied += len(group['ids'])
+            migrated_ids.extend(group['ids'])
+
+    # Deleting only after the full pass keeps the offset paging above stable
+    if delete_source and not dry_run:
+        for start in range(0, len(migrated_ids), batch_size):
+            chroma_call("delete", source.delete, ids=migrated_ids[start:start + batch_size])
+    return copied, skipped
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate User_Styles items to another storage layout")
+    parser.add_argument("--from", dest="source", choices=USER_STYLES_STORAGE_MODES, default="shared")
+    parser.add_argument("--to", dest="target", choices=USER_STYLES_STORAGE_MODES, required=True)
+    parser.add_argument("--source-shards", type=int, default=16, help="Shard count of a sharded source")
+    parser.add_argument("--shards", type=int, default=16, help="Shard count of a sharded target")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--delete-source", action="store_true", help="Remove migrated items from the source collections")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be copied")
+    args = parser.parse_args()
+
+    if CHROMA_CLIENT is None:
+        print("Cannot migrate User_Styles: ChromaDB client is not ready.")
+        sys.exit(1)
+    if args.source == args.target and (args.source != "sharded" or args.source_shards == args.shards):
+        print("Source and target layouts are the same; nothing to do.")
+        return
+
+    start_time = time.time()
+    total_copied, total_skipped = 0, 0
+    for source_name in source_collection_names(CHROMA_CLIENT, args.source, args.source_shards):
+        copied, skipped = migrate_collection(
+            CHROMA_CLIENT, source_name, args.target, args.shards, args.batch_size, args.delete_source, args.dry_run
+        )
+        total_copied += copied
+        total_skipped += skipped
+        print(f"{source_name}: {'would copy' if args.dry_run else 'copied'} {copied} items, skipped {skipped} without user_id")
+
+    print(f"Migrated {total_copied} items from {args.source} to {args.target} in {time.time() - start_time:.2f} seconds")
+    if not args.dry_run:
+        print(f"Start the API with USER_STYLES_STORAGE={args.target}"
+              + (f" USER_STYLES_SHARDS={args.shards}" if args.target == "sharded" else ""))
+
+if __name__ == "__main__":
+    main()
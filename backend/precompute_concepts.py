@@ -0,0 +1,106 @@
+"""
+Precompute outfit concepts for common emotion x celebrity twin x weather bucket combinations
+Run off-peak (e.g. nightly after sync_catalog.py). Also stores the catalog matches for every
+precomputed item and for the static fallback outfits, so /recommend can skip both the concept
+LLM call and the catalog searches for most traffic. Uncommon combinations are still served live.
+"Common" means the celebrities with the most reference images and the usual weather buckets;
+a run that would exceed --max-calls Gemini calls is refused.
+"""
+
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from app.database import CHROMA_COLLECTIONS, COLLECTION_MYNTRA_CATALOG, COLLECTION_CELEB_STYLES
+from app.celebrity_index import get_celebrity_index
+from app.concept_table import CONCEPT_TABLE_PATH, concept_key, weather_keys, describe_weather_key, save_concept_table
+from app.recommender import (
+    EMOTIONS, FALLBACK_OUTFITS, DEFAULT_OUTFIT, DEFAULT_CELEBRITY_TWIN, request_outfit_concept, semantic_search
+)
+
+# Temperate-to-hot buckets that cover most traffic, plus the no-weather-data bucket
+POPULAR_WEATHER_KEYS = ["unavailable", "mild/clear", "mild/cloudy", "warm/clear", "warm/cloudy",
+                        "hot/clear", "cool/cloudy", "mild/rain"]
+
+def celebrity_names(requested, top):
+    """Requested names, else the top celebrities by reference images in the index, plus the default
+    twin used when none is found."""
+    names = list(requested or [])
+    if not names:
+        index = get_celebrity_index(CHROMA_COLLECTIONS.get(COLLECTION_CELEB_STYLES))
+        if index is not None:
+            ranked = sorted(zip(index.image_counts, index.names), key=lambda entry: (-entry[0], entry[1]))
+            names = [name for _, name in ranked[:top]]
+    return sorted(set(names) | {DEFAULT_CELEBRITY_TWIN})
+
+def generate_concepts(emotions, celebrities, weathers, concurrency):
+    combinations = [(emotion, celebrity, weather) for emotion in emotions for celebrity in celebrities
+                    for weather in weathers]
+
+    def generate(combination):
+        emotion, celebrity, weather = combination
+        return request_outfit_concept(f"An outfit for a {emotion} mood", describe_weather_key(weather), celebrity, emotion)
+
+    concepts = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for (emotion, celebrity, weather), items in zip(combinations, executor.map(generate, combinations)):
+            if items:
+                concepts[concept_key(emotion, celebrity, weather=weather)] = items
+    return concepts, len(combinations)
+
+def match_catalog(items, concurrency):
+    """Catalog search results per item; items without results are left to the live search."""
+    catalog = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for item, results in zip(items, executor.map(
+                lambda item: semantic_search(item, COLLECTION_MYNTRA_CATALOG, n_results=3), items)):
+            if results:
+                catalog[item] = results
+    return catalog
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the outfit-concept table served by /recommend")
+    parser.add_argument("--emotions", nargs="+", default=EMOTIONS, choices=EMOTIONS)
+    parser.add_argument("--celebrities", nargs="+", help="Celebrity twins (default: the --top-celebrities in the index)")
+    parser.add_argument("--top-celebrities", type=int, default=10,
+                        help="Celebrities with the most reference images to precompute (default: 10)")
+    parser.add_argument("--weather-keys", nargs="+", default=POPULAR_WEATHER_KEYS, choices=weather_keys(),
+                        help="Weather buckets to precompute (default: the popular ones)")
+    parser.add_argument("--max-calls", type=int, default=1500, help="Refuse runs needing more concept LLM calls")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent Gemini calls and catalog searches")
+    parser.add_argument("--output", default=CONCEPT_TABLE_PATH)
+    parser.add_argument("--dry-run", action="store_true", help="Only print how many combinations would be generated")
+    args = parser.parse_args()
+
+    if not CHROMA_COLLECTIONS:
+        print("Cannot precompute concepts: ChromaDB client is not ready.")
+        sys.exit(1)
+
+    celebrities = celebrity_names(args.celebrities, args.top_celebrities)
+    combinations = len(args.emotions) * len(celebrities) * len(args.weather_keys)
+    print(f"{len(args.emotions)} emotions x {len(celebrities)} celebrities x {len(args.weather_keys)} weather buckets "
+          f"= {combinations} concept LLM calls")
+    if args.dry_run:
+        return
+    if combinations > args.max_calls:
+        print(f"Refusing to make {combinations} calls (--max-calls {args.max_calls}); "
+              "narrow --emotions/--top-celebrities/--weather-keys or raise --max-calls.")
+        sys.exit(1)
+
+    start_time = time.time()
+    concepts, attempted = generate_concepts(args.emotions, celebrities, args.weather_keys, args.concurrency)
+    print(f"Generated {len(concepts)}/{attempted} concepts in {time.time() - start_time:.2f} seconds")
+
+    start_time = time.time()
+    items = {item for outfit in concepts.values() for item in outfit}
+    items.update(item for outfit in FALLBACK_OUTFITS.values() for item in outfit)
+    items.update(DEFAULT_OUTFIT)
+    catalog = match_catalog(sorted(items), args.concurrency)
+    print(f"Matched {len(catalog)}/{len(items)} items against the catalog in {time.time() - start_time:.2f} seconds")
+
+    save_concept_table(concepts, catalog, args.output)
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
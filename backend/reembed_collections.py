@@ -0,0 +1,59 @@
+"""
+Re-embed stored documents with the configured EMBEDDING_BACKEND
+Migration path when benchmark_embeddings.py shows too much drift between the backend that built the
+collections and the one now serving queries. Documents and ids are kept; only the vectors are replaced.
+"""
+
+import sys
+import time
+import argparse
+
+from app.database import CHROMA_CLIENT, COLLECTION_USER_STYLES, COLLECTION_MYNTRA_CATALOG, COLLECTION_CELEB_STYLES, chroma_call, create_embeddings
+from app.embeddings import EMBEDDING_BACKEND, load_embedding_model
+
+def stored_collection_names(client):
+    """The catalog, celebrity and every User_Styles collection (shared, shards or per-user)."""
+    existing = [getattr(c, 'name', c) for c in chroma_call("list_collections", client.list_collections)]
+    return sorted(name for name in existing
+                  if name in (COLLECTION_MYNTRA_CATALOG, COLLECTION_CELEB_STYLES) or name.startswith(COLLECTION_USER_STYLES))
+
+def reembed_collection(client, name, batch_size):
+    collection = chroma_call("get_collection", client.get_collection, name=name)
+    updated, offset = 0, 0
+    while True:
+        page = chroma_call("get", collection.get, include=['documents'], limit=batch_size, offset=offset)
+        if not page['ids']:
+            break
+        offset += len(page['ids'])
+        embeddings = create_embeddings(page['documents'], batch_size=min(batch_size, 256))
+        if embeddings is None:
+            raise RuntimeError(f"Embedding failed for {name} at offset {offset}")
+        chroma_call("update", collection.update, ids=page['ids'], embeddings=embeddings)
+        updated += len(page['ids'])
+    return updated
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-embed collections with the configured embedding backend")
+    parser.add_argument("--collections", nargs="+", help="Collection names (default: all StyleSense collections)")
+    parser.add_argument("--batch-size", type=int, default=512)
+    args = parser.parse_args()
+
+    if CHROMA_CLIENT is None:
+        print("Cannot re-embed: ChromaDB client is not ready.")
+        sys.exit(1)
+
+    # The app falls back to torch when the backend cannot load; re-embedding with it would defeat the migration
+    try:
+        load_embedding_model(strict=True)
+    except RuntimeError as e:
+        print(f"Cannot re-embed: {e}")
+        sys.exit(1)
+
+    print(f"Re-embedding with EMBEDDING_BACKEND={EMBEDDING_BACKEND}")
+    for name in args.collections or stored_collection_names(CHROMA_CLIENT):
+        start_time = time.time()
+        updated = reembed_collection(CHROMA_CLIENT, name, args.batch_size)
+        print(f"{name}: {updated} items re-embedded in {time.time() - start_time:.2f} seconds")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""
+Nightly Myntra catalog refresh
+Embeds only new or changed products from the latest export and deletes removed ones
+"""
+
+import sys
+import time
+
+from app.data_loader import load_product_catalog, MYNTRA_CATALOG_FILE
+from app.database import CHROMA_COLLECTIONS
+
+def main():
+    if not CHROMA_COLLECTIONS:
+        print("Cannot sync catalog: ChromaDB client is not ready.")
+        sys.exit(1)
+    
+    print(f"Syncing catalog from {MYNTRA_CATALOG_FILE}")
+    start_time = time.time()
+    load_product_catalog(sync_mode="delta")
+    print(f"Catalog sync finished in {time.time() - start_time:.2f} seconds")
+
+if __name__ == "__main__":
+    main()
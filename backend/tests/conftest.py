@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Unit tests for the concurrency primitives: no Chroma server, and no embedding model loaded at import
+# (with a pool the model only loads in the pool processes, which these tests never start)
+os.environ.setdefault("CHROMA_MODE", "ephemeral")
+os.environ.setdefault("EMBEDDING_POOL_WORKERS", "1")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
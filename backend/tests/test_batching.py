@@ -0,0 +1,109 @@
+import threading
+import time
+import pytest
+from app.batching import MicroBatcher
+
+class RecordingBatch:
+    """batch_fn that records the size of every batch it is given."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sizes = []
+
+    def __call__(self, items):
+        self.sizes.append(len(items))
+        time.sleep(self.delay)
+        return [item * 10 for item in items]
+
+def _submit_concurrently(batcher, items):
+    results = {}
+    errors = {}
+
+    def worker(item):
+        try:
+            results[item] = batcher.submit(item)
+        except Exception as e:
+            errors[item] = e
+
+    threads = [threading.Thread(target=worker, args=(item,)) for item in items]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+def test_concurrent_items_are_split_by_max_batch_size():
+    batch_fn = RecordingBatch(delay=0.05)
+    batcher = MicroBatcher("test", batch_fn, max_batch_size=4, window_ms=50)
+    results, errors = _submit_concurrently(batcher, list(range(20)))
+    assert errors == {}
+    assert results == {item: item * 10 for item in range(20)}
+    assert sum(batch_fn.sizes) == 20
+    assert max(batch_fn.sizes) <= 4
+    assert len(batch_fn.sizes) < 20
+
+def test_lone_caller_does_not_wait_out_the_window():
+    batch_fn = RecordingBatch()
+    batcher = MicroBatcher("test", batch_fn, window_ms=500)
+    start = time.perf_counter()
+    for item in range(3):
+        assert batcher.submit(item) == item * 10
+    assert time.perf_counter() - start < 0.5
+    assert batch_fn.sizes == [1, 1, 1]
+
+def test_window_gathers_late_arrivals_under_contention():
+    batch_fn = RecordingBatch()
+    batcher = MicroBatcher("test", batch_fn, window_ms=300)
+    batcher._last_batch_size = 2  # The previous batch had company, so the window is held open
+
+    first = threading.Thread(target=batcher.submit, args=(1,))
+    first.start()
+    time.sleep(0.05)
+    assert batcher.submit(2) == 20
+    first.join(5)
+    assert batch_fn.sizes == [2]
+
+def test_window_closes_on_time_under_contention():
+    batch_fn = RecordingBatch()
+    batcher = MicroBatcher("test", batch_fn, window_ms=20)
+    batcher._last_batch_size = 2
+
+    first = threading.Thread(target=batcher.submit, args=(1,))
+    first.start()
+    time.sleep(0.2)
+    assert not first.is_alive()
+    assert batcher.submit(2) == 20
+    first.join(5)
+    assert batch_fn.sizes[0] == 1
+
+def test_batch_error_reaches_every_caller():
+    failure = RuntimeError("encoder crashed")
+
+    def failing_batch(items):
+        time.sleep(0.05)
+        raise failure
+
+    batcher = MicroBatcher("test", failing_batch, window_ms=50)
+    results, errors = _submit_concurrently(batcher, list(range(5)))
+    assert results == {}
+    assert set(errors) == set(range(5))
+    assert all(error is failure for error in errors.values())
+
+def test_result_count_mismatch_is_an_error():
+    batcher = MicroBatcher("test", lambda items: items[:-1])
+    with pytest.raises(RuntimeError, match="returned 0 results for 1 items"):
+        batcher.submit("text")
+
+def test_dispatcher_survives_a_failed_batch():
+    calls = []
+
+    def flaky_batch(items):
+        calls.append(items)
+        if len(calls) == 1:
+            raise ValueError("first batch fails")
+        return items
+
+    batcher = MicroBatcher("test", flaky_batch)
+    with pytest.raises(ValueError):
+        batcher.submit("a")
+    assert batcher.submit("b") == "b"
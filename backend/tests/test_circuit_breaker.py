@@ -0,0 +1,117 @@
+import pytest
+from app import circuit_breaker
+from app.circuit_breaker import CircuitBreaker, CircuitOpenError, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+
+class Clock:
+    """Stands in for time.monotonic so open_seconds can elapse instantly."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+def _breaker(**kwargs):
+    options = dict(failure_rate=0.5, min_calls=4, window_seconds=30, open_seconds=15, half_open_calls=2)
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+def _fail():
+    raise ConnectionError("dependency down")
+
+def _ok():
+    return "ok"
+
+def _trip(breaker):
+    for _ in range(breaker.min_calls):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+
+def test_opens_once_failure_rate_is_reached(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+    assert breaker.state == STATE_CLOSED  # Below min_calls
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+    assert breaker.state == STATE_OPEN
+
+def test_stays_closed_below_failure_rate(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.call(_ok)
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+    assert breaker.state == STATE_CLOSED
+
+def test_open_breaker_fails_fast_without_calling(clock):
+    breaker = _breaker()
+    _trip(breaker)
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(calls.append, 1)
+    assert calls == []
+    assert breaker.snapshot()["retry_in_seconds"] == 15
+
+def test_half_open_trials_close_the_breaker(clock):
+    breaker = _breaker()
+    _trip(breaker)
+    clock.now += 15
+    assert breaker.call(_ok) == "ok"
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.call(_ok) == "ok"
+    assert breaker.state == STATE_CLOSED
+    assert breaker.snapshot()["calls_in_window"] == 0
+
+def test_half_open_failure_reopens(clock):
+    breaker = _breaker()
+    _trip(breaker)
+    clock.now += 15
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+    assert breaker.state == STATE_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(_ok)
+
+def test_half_open_limits_concurrent_trials(clock):
+    breaker = _breaker(half_open_calls=1)
+    _trip(breaker)
+    clock.now += 15
+
+    def nested_trial():
+        # A second call while the only trial is still running is rejected
+        with pytest.raises(CircuitOpenError):
+            breaker.call(_ok)
+        return "trial"
+
+    assert breaker.call(nested_trial) == "trial"
+    assert breaker.state == STATE_CLOSED
+
+def test_ignored_errors_do_not_count(clock):
+    breaker = _breaker(ignore=(TimeoutError,))
+
+    def out_of_budget():
+        raise TimeoutError("no budget left")
+
+    for _ in range(10):
+        with pytest.raises(TimeoutError):
+            breaker.call(out_of_budget)
+    assert breaker.state == STATE_CLOSED
+    assert breaker.snapshot()["calls_in_window"] == 0
+
+def test_old_failures_leave_the_window(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+    clock.now += 31
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+    assert breaker.state == STATE_CLOSED
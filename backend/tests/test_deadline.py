@@ -0,0 +1,65 @@
+import threading
+import time
+import pytest
+from app.deadline import (run_with_deadline, request_deadline, time_budget, remaining_seconds,
+                          DeadlineExceeded, BudgetExhausted)
+
+def test_slow_call_is_abandoned_at_the_cap():
+    finished = threading.Event()
+
+    def slow_call():
+        time.sleep(0.5)
+        finished.set()
+        return "late"
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        run_with_deadline("test.slow", slow_call, cap=0.1)
+    assert time.monotonic() - start < 0.4
+    # The abandoned call keeps running in the background; its result is dropped
+    assert not finished.is_set()
+    assert finished.wait(2)
+
+def test_fast_call_returns_its_result():
+    assert run_with_deadline("test.fast", lambda x, y=0: x + y, 1, y=2, cap=1) == 3
+
+def test_call_error_is_raised_to_the_caller():
+    def failing():
+        raise ConnectionError("gemini down")
+
+    with pytest.raises(ConnectionError, match="gemini down"):
+        run_with_deadline("test.error", failing, cap=1)
+
+def test_request_budget_bounds_the_call():
+    with request_deadline(0.1):
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            run_with_deadline("test.budget", time.sleep, 0.5, cap=10)
+        assert time.monotonic() - start < 0.4
+
+def test_exhausted_budget_skips_the_call():
+    calls = []
+    with request_deadline(0.05):
+        time.sleep(0.1)
+        with pytest.raises(BudgetExhausted):
+            run_with_deadline("test.exhausted", calls.append, 1, cap=10)
+    assert calls == []
+
+def test_budget_is_scoped_to_the_block():
+    with request_deadline(5):
+        assert 0 < remaining_seconds() <= 5
+        assert time_budget(1) == 1
+        assert time_budget() <= 5
+    assert remaining_seconds() is None
+
+def test_non_positive_cap_means_uncapped():
+    assert time_budget(0) is None
+    assert time_budget(-1) is None
+    assert time_budget(None) is None
+    assert run_with_deadline("test.uncapped", lambda: threading.current_thread().name, cap=0) \
+        == threading.current_thread().name
+
+def test_disabled_budget_leaves_calls_uncapped():
+    with request_deadline(0):
+        assert remaining_seconds() is None
+        assert time_budget(0) is None
@@ -0,0 +1,96 @@
+import threading
+import time
+import pytest
+from app.singleflight import SingleFlight
+
+def _run_concurrently(count, target):
+    results, errors = [None] * count, [None] * count
+    start = threading.Barrier(count)
+
+    def worker(i):
+        start.wait()
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    calls = []
+
+    def slow_lookup(city):
+        calls.append(city)
+        time.sleep(0.2)
+        return f"sunny in {city}"
+
+    results, errors = _run_concurrently(8, lambda: flight.do("pune", slow_lookup, "pune"))
+    assert calls == ["pune"]
+    assert results == ["sunny in pune"] * 8
+    assert errors == [None] * 8
+    assert flight.in_flight() == 0
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight("test")
+    calls = []
+
+    def lookup(key):
+        calls.append(key)
+        time.sleep(0.1)
+        return key
+
+    keys = iter(["a", "b", "a", "b"])
+    lock = threading.Lock()
+
+    def next_call():
+        with lock:
+            key = next(keys)
+        return flight.do(key, lookup, key)
+
+    results, _ = _run_concurrently(4, next_call)
+    assert sorted(calls) == ["a", "b"]
+    assert sorted(results) == ["a", "a", "b", "b"]
+
+def test_leader_error_reaches_every_follower():
+    flight = SingleFlight("test")
+    calls = []
+    failure = ConnectionError("weather API down")
+
+    def failing_lookup():
+        calls.append(1)
+        time.sleep(0.2)
+        raise failure
+
+    results, errors = _run_concurrently(6, lambda: flight.do("pune", failing_lookup))
+    assert len(calls) == 1
+    assert results == [None] * 6
+    assert all(error is failure for error in errors)
+
+def test_key_is_released_after_a_failure():
+    flight = SingleFlight("test")
+
+    def failing():
+        raise ValueError("first")
+
+    with pytest.raises(ValueError):
+        flight.do("k", failing)
+    assert flight.in_flight() == 0
+    assert flight.do("k", lambda: "second") == "second"
+
+def test_none_key_runs_without_coalescing():
+    flight = SingleFlight("test")
+    calls = []
+
+    def lookup():
+        calls.append(1)
+        time.sleep(0.1)
+        return len(calls)
+
+    _run_concurrently(3, lambda: flight.do(None, lookup))
+    assert len(calls) == 3
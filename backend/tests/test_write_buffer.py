@@ -0,0 +1,92 @@
+import threading
+import pytest
+from app import database
+from app.database import UserStylesWriteBuffer
+
+class FakeCollection:
+    """Records add() calls; ids in reject are refused, failing the whole batched add like Chroma does."""
+
+    def __init__(self, name, reject=()):
+        self.name = name
+        self.reject = set(reject)
+        self.adds = []
+
+    def add(self, ids, embeddings, documents, metadatas):
+        if self.reject.intersection(ids):
+            raise ValueError(f"rejected {sorted(self.reject.intersection(ids))}")
+        self.adds.append(list(ids))
+
+@pytest.fixture
+def versions(monkeypatch):
+    """Record wardrobe version bumps along with what the collections held at the time."""
+    bumps = []
+    monkeypatch.setattr(database, "bump_wardrobe_version", lambda user_id: bumps.append(user_id))
+    return bumps
+
+def _add(buffer, collection, user_id, item_id):
+    return buffer.add(collection, user_id, item_id, [0.1, 0.2], f"doc {item_id}", {"user_id": user_id})
+
+def test_flush_writes_one_batched_add_per_collection(versions):
+    buffer = UserStylesWriteBuffer(flush_ms=60000, max_items=100)
+    shared, shard = FakeCollection("User_Styles"), FakeCollection("User_Styles_shard_001")
+    futures = [_add(buffer, shared, "u1", "a"), _add(buffer, shard, "u2", "b"), _add(buffer, shared, "u1", "c")]
+    assert buffer.has_unflushed("u1")
+
+    assert buffer.flush() == 3
+    assert shared.adds == [["a", "c"]]
+    assert shard.adds == [["b"]]
+    assert [future.result(0) for future in futures] == [True, True, True]
+    assert sorted(versions) == ["u1", "u2"]
+    assert not buffer.has_unflushed("u1")
+    assert buffer.flush() == 0
+
+def test_version_is_bumped_only_after_the_write(monkeypatch):
+    buffer = UserStylesWriteBuffer(flush_ms=60000, max_items=100)
+    collection = FakeCollection("User_Styles")
+    seen = []
+    monkeypatch.setattr(database, "bump_wardrobe_version", lambda user_id: seen.append(list(collection.adds)))
+
+    future = _add(buffer, collection, "u1", "a")
+    assert seen == []
+    assert not future.done()
+    buffer.flush()
+    assert seen == [[["a"]]]
+    assert future.result(0) is True
+
+def test_bad_row_is_dropped_without_losing_the_batch(versions):
+    buffer = UserStylesWriteBuffer(flush_ms=60000, max_items=100)
+    collection = FakeCollection("User_Styles", reject={"bad"})
+    good = _add(buffer, collection, "u1", "good")
+    bad = _add(buffer, collection, "u2", "bad")
+
+    buffer.flush()
+    assert collection.adds == [["good"]]
+    assert good.result(0) is True
+    assert bad.result(0) is False
+    # Nothing of u2's was written, so its cached wardrobe stays valid
+    assert versions == ["u1"]
+    assert not buffer.has_unflushed("u2")
+
+def test_full_buffer_flushes_on_add(versions):
+    buffer = UserStylesWriteBuffer(flush_ms=60000, max_items=2)
+    collection = FakeCollection("User_Styles")
+    first = _add(buffer, collection, "u1", "a")
+    second = _add(buffer, collection, "u1", "b")
+    assert collection.adds == [["a", "b"]]
+    assert first.result(0) and second.result(0)
+
+def test_flusher_thread_writes_after_the_interval(versions):
+    buffer = UserStylesWriteBuffer(flush_ms=10, max_items=100)
+    collection = FakeCollection("User_Styles")
+    assert _add(buffer, collection, "u1", "a").result(2) is True
+    assert collection.adds == [["a"]]
+    assert versions == ["u1"]
+
+def test_real_version_bump_is_visible_to_readers():
+    buffer = UserStylesWriteBuffer(flush_ms=60000, max_items=100)
+    user_id = f"write-buffer-test-{threading.get_ident()}"
+    before = database.get_wardrobe_version(user_id)
+    _add(buffer, FakeCollection("User_Styles"), user_id, "a")
+    assert database.get_wardrobe_version(user_id) == before
+    buffer.flush()
+    assert database.get_wardrobe_version(user_id) == before + 1
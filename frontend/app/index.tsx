@@ -20,7 +20,7 @@ import { Animated } from 'react-native';
 import { LinearGradient } from 'expo-linear-gradient';
 import { FontAwesome5, MaterialCommunityIcons, Ionicons } from '@expo/vector-icons';
 
-import { styleSenseAPI } from './services/api';
+import { styleSenseAPI, UploadJob } from './services/api';
 import { useUser } from '../contexts/UserContext';
 import { UploadProgressView } from '../components/uploadProgressView';
 import { simulateDelay } from '../utils/helpers';
@@ -34,6 +34,8 @@ export default function HomeScreen() {
   const [isUploading, setIsUploading] = useState(false);
   const [uploadProgress, setUploadProgress] = useState(0);
   const [uploadStatusText, setUploadStatusText] = useState('Initializing upload...');
+  const [uploadJobIds, setUploadJobIds] = useState<string[] | null>(null);
+  const [uploadSelectedCount, setUploadSelectedCount] = useState(0);
   
   const userName = 'Prism'; 
   const router = useRouter(); 
@@ -143,7 +145,7 @@ export default function HomeScreen() {
     }
   };
 
-  const uploadImageToBackend = async (imageUri: string, base64Data?: string) => {
+  const uploadImageToBackend = async (imageUri: string, base64Data?: string): Promise<UploadJob> => {
     try {
       let imageBase64 = base64Data;
       
@@ -152,12 +154,12 @@ export default function HomeScreen() {
         const blob = await response.blob();
         const reader = new FileReader();
         
-        return new Promise((resolve, reject) => {
+        return new Promise<UploadJob>((resolve, reject) => {
           reader.onloadend = async () => {
             try {
               const base64String = (reader.result as string).split(',')[1];
-              const uploadResponse = await styleSenseAPI.uploadWardrobeBase64(userId, base64String);
-              resolve(uploadResponse);
+              const uploadJob = await styleSenseAPI.startWardrobeUpload(userId, base64String);
+              resolve(uploadJob);
             } catch (error) {
               reject(error);
             }
@@ -166,7 +168,7 @@ export default function HomeScreen() {
           reader.readAsDataURL(blob);
         });
       } else {
-        return await styleSenseAPI.uploadWardrobeBase64(userId, imageBase64);
+        return await styleSenseAPI.startWardrobeUpload(userId, imageBase64);
       }
     } catch (error) {
       console.error('Upload to backend failed:', error);
@@ -174,51 +176,41 @@ export default function HomeScreen() {
     }
   };
 
-  const simulateProcessingWithRealUpload = async (selectedImages: any[]) => {
-    const totalSteps = 3 + selectedImages.length;
-    let currentStep = 0;
-
-    setUploadStatusText('Preparing to upload...');
-    setUploadProgress(Math.floor((currentStep / totalSteps) * 100));
-    await simulateDelay(800);
-
-    currentStep++;
-    setUploadStatusText('Initializing AI analysis...');
-    setUploadProgress(Math.floor((currentStep / totalSteps) * 100));
-    await simulateDelay(1000);
-
-    let uploadedCount = 0;
+  // Each image is only validated and queued here; UploadProgressView polls the jobs and calls
+  // handleUploadJobsFinished once all of them are done or failed
+  const startOutfitUploads = async (selectedImages: any[]) => {
+    setUploadSelectedCount(selectedImages.length);
+    const jobIds: string[] = [];
     for (let i = 0; i < selectedImages.length; i++) {
       const image = selectedImages[i];
-      currentStep++;
-      
-      setUploadStatusText(`Analyzing outfit ${i + 1} of ${selectedImages.length}...`);
-      setUploadProgress(Math.floor((currentStep / totalSteps) * 100));
+      setUploadStatusText(`Sending outfit ${i + 1} of ${selectedImages.length}...`);
+      setUploadProgress(Math.floor((i / selectedImages.length) * 5));
 
       try {
-        await uploadImageToBackend(image.uri, image.base64);
-        uploadedCount++;
-        await simulateDelay(600);
+        const job = await uploadImageToBackend(image.uri, image.base64);
+        jobIds.push(job.job_id);
       } catch (error) {
         console.error(`Upload error for image ${i + 1}:`, error);
       }
     }
 
-    currentStep++;
-    setUploadStatusText('Processing your wardrobe...');
-    setUploadProgress(Math.floor((currentStep / totalSteps) * 100));
-    await simulateDelay(1500);
+    if (jobIds.length === 0) {
+      throw new Error('No images could be uploaded');
+    }
+    setUploadJobIds(jobIds);
+  };
 
-    currentStep++;
-    setUploadStatusText('Complete! Redirecting...');
-    setUploadProgress(100);
+  const handleUploadJobsFinished = async (jobs: UploadJob[]) => {
+    const uploadedCount = jobs.filter(job => job.status === 'done').length;
+    jobs.filter(job => job.status === 'failed').forEach(job => console.error('Upload job failed:', job.error));
     await simulateDelay(500);
+    setUploadJobIds(null);
 
     await refreshUserStatus();
 
     Alert.alert(
       'Upload Complete!', 
-      `Successfully uploaded ${uploadedCount} out of ${selectedImages.length} images to your wardrobe.`,
+      `Successfully uploaded ${uploadedCount} out of ${uploadSelectedCount} images to your wardrobe.`,
       [
         { text: 'OK', onPress: () => {
           setIsUploading(false);
@@ -249,7 +241,7 @@ export default function HomeScreen() {
       setUploadProgress(0);
 
       try {
-        await simulateProcessingWithRealUpload(result.assets);
+        await startOutfitUploads(result.assets);
       } catch (error) {
         console.error('Upload process failed:', error);
         Alert.alert('Upload Failed', 'Some images could not be uploaded. Please try again.');
@@ -320,7 +312,12 @@ export default function HomeScreen() {
 
             <View style={styles.contentBox}>
               {isUploading ? (
-                <UploadProgressView progress={uploadProgress} statusText={uploadStatusText} />
+                <UploadProgressView
+                  progress={uploadProgress}
+                  statusText={uploadStatusText}
+                  jobIds={uploadJobIds ?? undefined}
+                  onJobsFinished={handleUploadJobsFinished}
+                />
               ) : (
                 <>
                   <Text style={styles.greetingText}>
@@ -36,6 +36,22 @@ interface UserStatus {
   message: string;
 }
 
+interface UploadJob {
+  job_id: string;
+  user_id: string;
+  status: 'queued' | 'processing' | 'done' | 'failed';
+  stage: string;
+  progress: number;
+  result: any | null;
+  error: string | null;
+  created_at: number;
+  updated_at: number;
+}
+
+const UPLOAD_START_RETRIES = 3;
+
+const wait = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
 class StyleSenseAPI {
   private baseURL: string;
 
@@ -77,6 +93,53 @@ class StyleSenseAPI {
     return response.json();
   }
 
+  // Returns as soon as the image is validated and queued; poll getUploadJob for the outcome.
+  // Retrying is safe: the backend hands back the same job for the same image.
+  async startWardrobeUpload(userId: string, imageBase64: string): Promise<UploadJob> {
+    let lastError: Error = new Error('Failed to upload image');
+    for (let attempt = 0; attempt < UPLOAD_START_RETRIES; attempt++) {
+      try {
+        const response = await fetch(`${this.baseURL}/user/styles/upload-base64?async=true`, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+          },
+          body: JSON.stringify({
+            user_id: userId,
+            image_base64: imageBase64
+          }),
+        });
+
+        if (response.status === 503) {
+          lastError = new Error('Upload queue is busy');
+          await wait(Number(response.headers.get('Retry-After') || 2) * 1000);
+          continue;
+        }
+        if (!response.ok) {
+          const errorData = await response.json().catch(() => ({ detail: response.statusText }));
+          throw new Error(errorData.detail || `Failed to upload image: ${response.statusText}`);
+        }
+        return response.json();
+      } catch (error) {
+        // Network errors (e.g. a mobile timeout) are retried; HTTP errors are final
+        if (!(error instanceof TypeError)) {
+          throw error;
+        }
+        lastError = error;
+        await wait(1000 * (attempt + 1));
+      }
+    }
+    throw lastError;
+  }
+
+  async getUploadJob(jobId: string): Promise<UploadJob> {
+    const response = await fetch(`${this.baseURL}/user/styles/upload-jobs/${jobId}`);
+    if (!response.ok) {
+      throw new Error(`Failed to get upload status: ${response.statusText}`);
+    }
+    return response.json();
+  }
+
   async loadOrderHistory(userId: string): Promise<any> {
     const formData = new FormData();
     formData.append('user_id', userId);
@@ -110,4 +173,4 @@ class StyleSenseAPI {
 }
 
 export const styleSenseAPI = new StyleSenseAPI();
-export type { StyleRequest, StyleRecommendation, UserStatus };
\ No newline at end of file
+export type { StyleRequest, StyleRecommendation, UserStatus, UploadJob };
\ No newline at end of file
@@ -1,12 +1,79 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
 import { View, Text, StyleSheet } from 'react-native';
 
+import { styleSenseAPI, UploadJob } from '../app/services/api';
+
+const POLL_INTERVAL_MS = 1000;
+const POLL_TIMEOUT_MS = 180000;
+
+const STAGE_LABELS: Record<string, string> = {
+  queued: 'Waiting in line',
+  analyzing: 'Analyzing',
+  storing: 'Saving',
+  counting: 'Saving',
+};
+
 interface UploadProgressViewProps {
   progress: number;
   statusText: string;
+  // Async uploads to poll; progress and status then follow the jobs
+  jobIds?: string[];
+  onJobsFinished?: (jobs: UploadJob[]) => void;
 }
 
-export const UploadProgressView: React.FC<UploadProgressViewProps> = ({ progress, statusText }) => {
+const isFinished = (job: UploadJob) => job.status === 'done' || job.status === 'failed';
+
+const describeJobs = (jobs: UploadJob[]) => {
+  const finished = jobs.filter(isFinished).length;
+  if (finished === jobs.length) {
+    return 'Complete! Redirecting...';
+  }
+  const active = jobs.findIndex(job => !isFinished(job));
+  const label = STAGE_LABELS[jobs[active].stage] || 'Processing';
+  return `${label} outfit ${active + 1} of ${jobs.length}...`;
+};
+
+export const UploadProgressView: React.FC<UploadProgressViewProps> = ({ progress, statusText, jobIds, onJobsFinished }) => {
+  const [jobs, setJobs] = useState<UploadJob[] | null>(null);
+
+  useEffect(() => {
+    if (!jobIds || jobIds.length === 0) {
+      setJobs(null);
+      return;
+    }
+    let cancelled = false;
+    const startedAt = Date.now();
+
+    const poll = async () => {
+      const latest = await Promise.all(jobIds.map(jobId =>
+        styleSenseAPI.getUploadJob(jobId).catch((): UploadJob => ({
+          job_id: jobId, user_id: '', status: 'queued', stage: 'queued', progress: 0,
+          result: null, error: null, created_at: 0, updated_at: 0,
+        }))
+      ));
+      if (cancelled) {
+        return;
+      }
+      setJobs(latest);
+      const timedOut = Date.now() - startedAt > POLL_TIMEOUT_MS;
+      if (latest.every(isFinished) || timedOut) {
+        onJobsFinished?.(latest.map(job => isFinished(job) ? job : { ...job, status: 'failed' as const, error: 'Timed out' }));
+      } else {
+        setTimeout(poll, POLL_INTERVAL_MS);
+      }
+    };
+    poll();
+
+    return () => {
+      cancelled = true;
+    };
+  }, [jobIds]);
+
+  if (jobs) {
+    progress = Math.floor(jobs.reduce((sum, job) => sum + job.progress, 0) / jobs.length);
+    statusText = describeJobs(jobs);
+  }
+
   return (
     <View style={styles.container}>
       <Text style={styles.statusText}>{statusText}</Text>